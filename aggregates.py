@@ -0,0 +1,145 @@
+"""Dashboard aggregates maintained incrementally as submissions are saved"""
+import sqlite3
+import threading
+
+from grading import PASS_MARK
+
+
+def submission_key(submission):
+    """Identity used to apply each submission once; older records have no submission ID"""
+    return submission.get("submission_id") or f"{submission['timestamp']}|{submission['user_info']['employee_id']}"
+
+
+class AggregateStore:
+    """Running totals behind the admin dashboard, kept in a local SQLite table.
+
+    `add` folds one submission into overall, per-department and per-day
+    sums and counts, into per-question answer histograms and into how many
+    candidates each question was presented to (a sampled form shows only
+    some), all in one transaction. A submission is only ever counted once,
+    however many times its save is retried. Question accuracy is derived from the histograms
+    and the current answer key when read, so fixing a key needs no rebuild;
+    re-scoring does, since it changes the stored percentages.
+    """
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        counts_presented = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'presented'").fetchone()
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS applied (submission_key TEXT PRIMARY KEY);
+            CREATE TABLE IF NOT EXISTS departments (
+                department TEXT PRIMARY KEY,
+                count INTEGER NOT NULL,
+                percentage_sum REAL NOT NULL,
+                passed INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS days (
+                day TEXT PRIMARY KEY,
+                count INTEGER NOT NULL,
+                percentage_sum REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS answers (
+                question TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (question, answer)
+            );
+            CREATE TABLE IF NOT EXISTS presented (question TEXT PRIMARY KEY, count INTEGER NOT NULL);
+        """)
+        if not counts_presented:
+            # Totals from before presentations were counted: mark them for a full rebuild
+            self._conn.execute("DELETE FROM meta WHERE key = 'built_at'")
+
+    def add(self, submission, bank):
+        """Count one submission against a QuestionBank's MCQs; returns False if it was already counted"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                added = self._apply(submission, bank)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return added
+
+    def rebuild(self, submissions, bank, built_at):
+        """Recompute everything from scratch (recovery, or after a re-grade); returns the submissions counted"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for table in ("applied", "departments", "days", "answers", "presented"):
+                    self._conn.execute(f"DELETE FROM {table}")
+                counted = sum(1 for submission in submissions if self._apply(submission, bank))
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('built_at', ?)", (built_at,))
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return counted
+
+    def _apply(self, submission, bank):
+        cursor = self._conn.execute("INSERT OR IGNORE INTO applied (submission_key) VALUES (?)",
+                                    (submission_key(submission),))
+        if not cursor.rowcount:
+            return False
+        percentage = submission["percentage"]
+        passed = int(percentage >= PASS_MARK)
+        self._conn.execute("""
+            INSERT INTO departments (department, count, percentage_sum, passed) VALUES (?, 1, ?, ?)
+            ON CONFLICT (department) DO UPDATE SET count = count + 1,
+                percentage_sum = percentage_sum + excluded.percentage_sum, passed = passed + excluded.passed
+        """, (submission["user_info"]["department"] or "", percentage, passed))
+        self._conn.execute("""
+            INSERT INTO days (day, count, percentage_sum) VALUES (?, 1, ?)
+            ON CONFLICT (day) DO UPDATE SET count = count + 1, percentage_sum = percentage_sum + excluded.percentage_sum
+        """, (submission["timestamp"][:10], percentage))
+        answers = submission["answers"]
+        question_ids = [q_id for q_id in bank.presented(submission.get("form"), answers) or bank.answer_key
+                        if q_id in bank.answer_key]
+        self._conn.executemany("""
+            INSERT INTO presented (question, count) VALUES (?, 1)
+            ON CONFLICT (question) DO UPDATE SET count = count + 1
+        """, [(q_id,) for q_id in question_ids])
+        self._conn.executemany("""
+            INSERT INTO answers (question, answer, count) VALUES (?, ?, 1)
+            ON CONFLICT (question, answer) DO UPDATE SET count = count + 1
+        """, [(q_id, answers[q_id]) for q_id in question_ids if answers.get(q_id)])
+        return True
+
+    def snapshot(self):
+        """Every aggregate as plain Python data; the cost depends on questions, departments and days only"""
+        with self._lock:
+            departments = self._conn.execute(
+                "SELECT department, count, percentage_sum, passed FROM departments ORDER BY department"
+            ).fetchall()
+            days = self._conn.execute("SELECT day, count, percentage_sum FROM days ORDER BY day").fetchall()
+            answers = self._conn.execute(
+                "SELECT question, answer, count FROM answers ORDER BY question, count DESC, answer"
+            ).fetchall()
+            presented = dict(self._conn.execute("SELECT question, count FROM presented").fetchall())
+        histograms = {}
+        for question, answer, count in answers:
+            histograms.setdefault(question, {})[answer] = count
+        return {
+            "submissions": sum(row[1] for row in departments),
+            "percentage_sum": sum(row[2] for row in departments),
+            "passed": sum(row[3] for row in departments),
+            "departments": [{"department": d, "count": c, "percentage_sum": s, "passed": p} for d, c, s, p in departments],
+            "days": [{"day": d, "count": c, "percentage_sum": s} for d, c, s in days],
+            "answers": histograms,
+            "presented": presented
+        }
+
+    def built_at(self):
+        """When the last full rebuild ran, or None if these aggregates never had one"""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'built_at'").fetchone()
+        return row[0] if row else None
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,132 @@
+"""Vectorised analytics over submissions for the admin dashboard"""
+import numpy as np
+import pandas as pd
+
+
+def answers_matrix(submissions, question_ids):
+    """Columnar answers: one row per submission, one column per question id.
+
+    Missing and blank answers are NaN, so comparisons and counts run as
+    whole-column pandas operations instead of per-row Python lookups.
+    """
+    answers = pd.DataFrame.from_records((s["answers"] for s in submissions), columns=question_ids)
+    return answers.replace("", np.nan)
+
+
+def submissions_frame(submissions):
+    """Scalar submission fields as a DataFrame with a parsed timestamp column"""
+    frame = pd.DataFrame({
+        "timestamp": [s["timestamp"] for s in submissions],
+        "department": [s["user_info"]["department"] for s in submissions],
+        "percentage": [s["percentage"] for s in submissions],
+    })
+    frame["timestamp"] = pd.to_datetime(frame["timestamp"], errors="coerce")
+    return frame
+
+
+def question_accuracy(answers, correct_answers):
+    """Percentage of submissions answering each question correctly"""
+    key = pd.Series(correct_answers)
+    return (answers.eq(key, axis="columns").mean() * 100).to_dict()
+
+
+def answer_distributions(answers):
+    """Per-question answer counts, most common first"""
+    filled = answers.fillna("Not answered")
+    return [
+        {"Question": q_id, "Answer Distribution": filled[q_id].value_counts().to_dict()}
+        for q_id in answers.columns
+    ]
+
+
+def detailed_analytics(submissions, correct_answers):
+    """Question accuracy, daily trend, department stats and answer distributions"""
+    if not submissions:
+        return None, None, None, None
+
+    answers = answers_matrix(submissions, list(correct_answers))
+    frame = submissions_frame(submissions)
+
+    # Performance over time
+    day = frame["timestamp"].dt.normalize().rename("timestamp")
+    performance_over_time = frame["percentage"].groupby(day).mean().reset_index()
+    performance_over_time["timestamp"] = performance_over_time["timestamp"].dt.date
+
+    # Department-wise performance
+    dept_performance = frame.groupby("department")["percentage"].agg(["mean", "count"]).reset_index()
+
+    return (
+        question_accuracy(answers, correct_answers),
+        performance_over_time,
+        dept_performance,
+        answer_distributions(answers),
+    )
+
+
+def aggregate_analytics(snapshot, correct_answers):
+    """The same four results as `detailed_analytics`, read off an AggregateStore snapshot"""
+    total = snapshot["submissions"]
+    if not total:
+        return None, None, None, None
+
+    histograms = snapshot["answers"]
+    # A sampled form shows each question to only some candidates
+    presented = snapshot["presented"]
+    question_accuracy = {
+        q_id: histograms.get(q_id, {}).get(answer, 0) / presented[q_id] * 100 if presented.get(q_id) else 0.0
+        for q_id, answer in correct_answers.items()
+    }
+
+    performance_over_time = pd.DataFrame({
+        "timestamp": pd.to_datetime([d["day"] for d in snapshot["days"]], errors="coerce").date,
+        "percentage": [d["percentage_sum"] / d["count"] for d in snapshot["days"]],
+    })
+
+    dept_performance = pd.DataFrame({
+        "department": [d["department"] for d in snapshot["departments"]],
+        "mean": [d["percentage_sum"] / d["count"] for d in snapshot["departments"]],
+        "count": [d["count"] for d in snapshot["departments"]],
+    })
+
+    question_details = []
+    for q_id in correct_answers:
+        counts = dict(histograms.get(q_id, {}))
+        unanswered = presented.get(q_id, 0) - sum(counts.values())
+        if unanswered:
+            counts["Not answered"] = unanswered
+        question_details.append({
+            "Question": q_id,
+            "Answer Distribution": dict(sorted(counts.items(), key=lambda item: item[1], reverse=True)),
+        })
+
+    return question_accuracy, performance_over_time, dept_performance, question_details
+
+
+def downsample_extremes(x, y, max_points):
+    """Indices of at most `max_points` points, in x order, keeping each bucket's lowest and highest y.
+
+    Points are split into `max_points // 2` equal runs along x; keeping both
+    extremes of every run means spikes and dips survive in a line chart
+    that the browser only has to draw a few thousand points of.
+    """
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+    order = np.argsort(x, kind="stable")
+    buckets = np.arange(n) * (max_points // 2) // n
+    ranked = np.lexsort((np.asarray(y)[order], buckets))
+    starts = np.flatnonzero(np.r_[True, buckets[ranked][1:] != buckets[ranked][:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    return order[np.unique(np.r_[ranked[starts], ranked[ends]])]
+
+
+def score_trend(submissions, max_points, window=50):
+    """Individual scores (a seeded random sample) and their rolling mean, both capped at `max_points`"""
+    frame = submissions_frame(submissions).dropna(subset=["timestamp"]).sort_values("timestamp", kind="stable")
+    frame["rolling"] = frame["percentage"].rolling(window, min_periods=1).mean()
+    if len(frame) > max_points:
+        sample = np.sort(np.random.default_rng(0).choice(len(frame), max_points, replace=False))
+    else:
+        sample = np.arange(len(frame))
+    keep = downsample_extremes(frame["timestamp"].to_numpy(dtype="int64"), frame["rolling"].to_numpy(), max_points)
+    return frame.iloc[sample][["timestamp", "percentage"]], frame.iloc[keep][["timestamp", "rolling"]]
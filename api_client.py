@@ -0,0 +1,189 @@
+"""Shared Google API client layer: per-quota rate limits, retries and request coalescing"""
+import random
+import socket
+import threading
+import time
+from concurrent.futures import Future
+
+from outbox import Throttle
+
+TRANSIENT_STATUS = {429, 500, 502, 503, 504}
+RATE_LIMITED = 429  # the request was refused, so even a write is safe to repeat
+
+try:
+    # gspread talks HTTP through requests, whose transport errors aren't the built-in ones
+    from requests.exceptions import ChunkedEncodingError, ConnectionError as RequestsConnectionError, Timeout
+    TRANSPORT_ERRORS = (ConnectionError, TimeoutError, socket.timeout,
+                        RequestsConnectionError, Timeout, ChunkedEncodingError)
+except ImportError:
+    TRANSPORT_ERRORS = (ConnectionError, TimeoutError, socket.timeout)
+
+
+def error_status(error):
+    """HTTP status of a googleapiclient or gspread error, if it carries one"""
+    resp = getattr(error, "resp", None)  # googleapiclient.errors.HttpError
+    if resp is not None:
+        return getattr(resp, "status", None)
+    response = getattr(error, "response", None)  # gspread.exceptions.APIError
+    return getattr(response, "status_code", None)
+
+
+def _status(error):
+    try:
+        return int(error_status(error))
+    except (TypeError, ValueError):
+        return None
+
+
+def is_transient(error):
+    """Worth retrying a read: rate limited, a 5xx, or the connection failed or timed out"""
+    return isinstance(error, TRANSPORT_ERRORS) or _status(error) in TRANSIENT_STATUS
+
+
+def is_rate_limited(error):
+    """Worth retrying a write: only a 429 proves the request was not applied"""
+    return _status(error) == RATE_LIMITED
+
+
+class _BucketStats:
+    def __init__(self):
+        self.calls = 0
+        self.retries = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.throttled = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+
+class APIClient:
+    """Runs Google API calls under a token bucket per quota, shared by the whole process.
+
+    `quotas` maps a bucket name to the requests per minute it allows; bursts
+    of up to ten seconds' worth are let through before calls start to queue.
+    Calls failing with 429/5xx or a dropped connection are retried with
+    exponential backoff and full jitter, taking a fresh token each time.
+    Calls made with `idempotent=False` are only retried on 429: after a 5xx
+    or a timeout the write may already have been applied, and repeating it
+    is left to a caller that can check (see spool.SheetSpool).
+    Calls made with the same `key` while one is already in flight wait for
+    and share its result instead of hitting the API again.
+
+    With a `tracer` (see tracing.Tracer), every call is also recorded as a
+    "google.<bucket>" span covering its queueing, retries and backoff.
+    """
+
+    def __init__(self, quotas, max_retries=5, retry_delay=1.0, max_retry_delay=32.0, tracer=None):
+        self.max_retries = max_retries
+        self.tracer = tracer
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._throttles = {
+            bucket: Throttle(per_minute / 60, burst=max(1, per_minute // 6))
+            for bucket, per_minute in quotas.items()
+        }
+        self._stats = {bucket: _BucketStats() for bucket in quotas}
+        self._lock = threading.Lock()
+        self._inflight = {}
+
+    def call(self, bucket, fn, *args, key=None, idempotent=True, **kwargs):
+        """Call `fn(*args, **kwargs)` against `bucket`'s quota"""
+        retryable = is_transient if idempotent else is_rate_limited
+        if key is None:
+            return self._call(bucket, fn, args, kwargs, retryable)
+        with self._lock:
+            future = self._inflight.get((bucket, key))
+            leader = future is None
+            if leader:
+                future = self._inflight[(bucket, key)] = Future()
+            else:
+                self._stats[bucket].coalesced += 1
+        if not leader:
+            return future.result()
+        try:
+            result = self._call(bucket, fn, args, kwargs, retryable)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._inflight[(bucket, key)]
+
+    def _call(self, bucket, fn, args, kwargs, retryable):
+        if self.tracer is None:
+            return self._call_with_retries(bucket, fn, args, kwargs, retryable)
+        with self.tracer.span(f"google.{bucket}", method=getattr(fn, "__name__", None)):
+            return self._call_with_retries(bucket, fn, args, kwargs, retryable)
+
+    def _call_with_retries(self, bucket, fn, args, kwargs, retryable):
+        stats = self._stats[bucket]
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            self._throttles[bucket].acquire()
+            waited = time.monotonic() - started
+            with self._lock:
+                stats.calls += 1
+                stats.wait_total += waited
+                stats.wait_max = max(stats.wait_max, waited)
+                if waited > 0.001:
+                    stats.throttled += 1
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries or not retryable(e):
+                    with self._lock:
+                        stats.errors += 1
+                    raise
+                attempt += 1
+                with self._lock:
+                    stats.retries += 1
+                time.sleep(random.uniform(0, min(self.max_retry_delay, self.retry_delay * 2 ** attempt)))
+
+    def stats(self):
+        """Per-bucket counters, including average and worst time spent queued for a token"""
+        with self._lock:
+            return {
+                bucket: {
+                    "calls": s.calls,
+                    "retries": s.retries,
+                    "coalesced": s.coalesced,
+                    "errors": s.errors,
+                    "throttled": s.throttled,
+                    "avg_wait_ms": round(1000 * s.wait_total / s.calls, 1) if s.calls else 0.0,
+                    "max_wait_ms": round(1000 * s.wait_max, 1)
+                }
+                for bucket, s in self._stats.items()
+            }
+
+
+class RateLimitedWorksheet:
+    """gspread worksheet proxy sending every API method through an APIClient.
+
+    Reads use the "sheets_read" bucket and are coalesced per method and
+    arguments; everything else uses "sheets_write" and is treated as
+    non-idempotent, so a write is only retried when it was rate limited.
+    """
+
+    READS = {"get_all_values", "get_all_records", "get_values", "get", "col_values", "row_values", "acell", "cell"}
+
+    def __init__(self, worksheet, client):
+        self._worksheet = worksheet
+        self._client = client
+
+    def __getattr__(self, name):
+        attr = getattr(self._worksheet, name)
+        if not callable(attr):
+            return attr
+        if name in self.READS:
+            def read(*args, **kwargs):
+                key = (name, repr(args), repr(sorted(kwargs.items())))
+                return self._client.call("sheets_read", attr, *args, key=key, **kwargs)
+            return read
+
+        def write(*args, **kwargs):
+            return self._client.call("sheets_write", attr, *args, idempotent=False, **kwargs)
+        return write
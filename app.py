@@ -1,21 +1,43 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import pandas as pd
 import datetime
 from pathlib import Path
 import plotly.express as px
 import plotly.graph_objects as go
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from fpdf import FPDF
 import io
+import json
 import time
 import base64
-import openpyxl
-import gspread
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseUpload
+import cProfile
+import multiprocessing
+import pstats
+import random
+import re
+import uuid
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+import export
+from aggregates import AggregateStore
+from analytics import aggregate_analytics, downsample_extremes, score_trend
+from api_client import APIClient, RateLimitedWorksheet
+from blobs import BlobStore
+from checkpoints import CheckpointStore
+from dataset import DATASET_VERSION, build_dataset_artifacts
+from grading import append_audit, regrade, score_updates
+from drive_uploads import DriveUploader
+from imaging import prepare_screenshot
+from item_analysis import WEAK_DISCRIMINATION, analyse_submissions
+from jobs import JobQueue
+from outbox import Outbox, SMTPPool
+from pivot_grading import CORRECT, grade_workbook, manual_review
+from question_bank import QuestionBank
+from session_memory import SessionMemory, resident_bytes
+from spool import SheetSpool
+from storage import SHEET_HEADER, SQLiteStorage, SheetsStorage
+from submissions_cache import SubmissionsCache
+from tracing import Tracer
+from uploads import UploadCache
 
 # Configure page
 st.set_page_config(
@@ -79,24 +101,109 @@ EMAIL_SENDER = st.secrets.get("email_sender", "your_email@example.com")
 EMAIL_PASSWORD = st.secrets.get("email_password", "your_email_password")
 SMTP_SERVER = st.secrets.get("smtp_server", "smtp.gmail.com")
 SMTP_PORT = st.secrets.get("smtp_port", 587)
+SMTP_USE_TLS = bool(st.secrets.get("smtp_use_tls", True))
 GOOGLE_SHEET_URL = st.secrets.get("GOOGLE_SHEET_URL", "your-google-sheet-url")
 DRIVE_FOLDER_ID = st.secrets.get("DRIVE_FOLDER_ID", "your-drive-folder-id")
+JOB_QUEUE_PATH = st.secrets.get("job_queue_path", "jobs.db")
+JOB_WORKERS = int(st.secrets.get("job_workers", 4))
+SMTP_POOL_SIZE = int(st.secrets.get("smtp_pool_size", 2))
+SMTP_RATE_LIMIT = float(st.secrets.get("smtp_rate_limit", 5))  # messages per second
+OUTBOX_PATH = st.secrets.get("outbox_path", "outbox.db")
+ADMIN_DIGEST_MINUTES = float(st.secrets.get("admin_digest_minutes", 0))  # 0 = one mail per submission
+SUBMISSIONS_CACHE_TTL = float(st.secrets.get("submissions_cache_ttl", 30))  # seconds
+EXPORT_DIR = st.secrets.get("export_dir")  # defaults to a per-process temp directory
+TEST_DURATION = 30 * 60  # 30 minutes in seconds
+IMAGE_WORKERS = int(st.secrets.get("image_workers", 2))
+IMAGE_TIMEOUT = 30  # seconds allowed to decode and re-encode one screenshot
+DRIVE_UPLOAD_WORKERS = int(st.secrets.get("drive_upload_workers", 6))
+# Set when DRIVE_FOLDER_ID is itself shared "anyone with the link"; files then inherit it
+DRIVE_INHERIT_PERMISSIONS = bool(st.secrets.get("drive_inherit_permissions", False))
+UPLOAD_WAIT_TIMEOUT = 120  # seconds the submit button waits for screenshots still uploading
+QUESTION_BANK_PATH = st.secrets.get("question_bank_path", str(Path(__file__).with_name("questions.json")))
+FORM_SIZE = int(st.secrets.get("form_size", 0))  # MCQs drawn per candidate; 0 = the whole bank
+SHUFFLE_QUESTIONS = bool(st.secrets.get("shuffle_questions", True))
+REGRADE_AUDIT_PATH = st.secrets.get("regrade_audit_path", "regrade_audit.jsonl")
+AGGREGATES_PATH = st.secrets.get("aggregates_path", "aggregates.db")
+CHECKPOINTS_PATH = st.secrets.get("checkpoints_path", "checkpoints.db")
+AUTOSAVE_SECONDS = float(st.secrets.get("autosave_seconds", 2))  # at most this much progress is lost on a restart
+CHART_MAX_POINTS = int(st.secrets.get("chart_max_points", 5000))  # points per trace sent to the browser
+WORKBOOK_MAX_BYTES = 10 * 1024 * 1024
+SCREENSHOT_MAX_BYTES = 5 * 1024 * 1024
+BLOB_DIR = st.secrets.get("blob_dir")  # where uploads wait for Drive; defaults to a per-process temp directory
+SESSION_MEMORY_BUDGET_MB = float(st.secrets.get("session_memory_budget_mb", 8))
+# Recomputable session state dropped (largest first) when a session goes over its budget
+EVICTABLE_STATE = ("rerun_profile",)
+THUMBNAIL_WIDTH = 320  # px; previews load the Drive thumbnail, never the uploaded image
+WORKBOOK_TIMEOUT = 15  # seconds a worker may spend reading one workbook before it goes to manual review
+STORAGE_BACKEND = st.secrets.get("storage_backend", "sheets")  # "sheets" or "sqlite"
+STORAGE_PATH = st.secrets.get("storage_path", "submissions.db")
+SHEETS_MIRROR = bool(st.secrets.get("sheets_mirror", True))  # sqlite backend: also append each submission to the sheet
+SHEET_SPOOL_PATH = st.secrets.get("sheet_spool_path", "sheet_spool.db")
+SHEET_BATCH_SIZE = int(st.secrets.get("sheet_batch_size", 50))  # rows per append_rows call
+SHEET_FLUSH_SECONDS = float(st.secrets.get("sheet_flush_seconds", 2))  # how long a partial batch waits
+# Requests per minute allowed per quota bucket (Sheets defaults to 60 per user per minute)
+API_QUOTAS = {
+    "sheets_read": int(st.secrets.get("sheets_reads_per_minute", 60)),
+    "sheets_write": int(st.secrets.get("sheets_writes_per_minute", 60)),
+    "drive": int(st.secrets.get("drive_requests_per_minute", 600))
+}
+TRACE_BUFFER_SIZE = int(st.secrets.get("trace_buffer_size", 5000))  # recent spans kept for the Performance panel
+PROFILE_TOP_FUNCTIONS = 40  # functions listed in a rerun profile
 
-# Initialize Google Sheets and Drive API
-scopes = [
+# Google Sheets and Drive API clients are created lazily, once per process,
+# and only by the pages that need them. The client libraries are imported
+# inside the factories so the Home page never pays for them.
+GOOGLE_SCOPES = [
     "https://www.googleapis.com/auth/spreadsheets",
     "https://www.googleapis.com/auth/drive"
 ]
-creds = Credentials.from_service_account_info(st.secrets["gcp_service_account"], scopes=scopes)
-sheets_client = gspread.authorize(creds)
-drive_service = build("drive", "v3", credentials=creds)
 
-# Open Google Sheet
-try:
-    sheet = sheets_client.open_by_url(GOOGLE_SHEET_URL).sheet1
-except Exception as e:
-    st.error(f"Failed to connect to Google Sheets: {str(e)}")
-    st.stop()
+@st.cache_resource
+def get_tracer():
+    """Span timings of external calls and heavy work, shared by every session and worker thread"""
+    return Tracer(TRACE_BUFFER_SIZE)
+
+# Every span recorded while this rerun runs on the script thread carries its trace ID
+tracer = get_tracer()
+rerun_trace_id = uuid.uuid4().hex[:12]
+tracer.begin_trace(rerun_trace_id)
+rerun_started = time.perf_counter()
+
+@st.cache_resource
+def get_google_credentials():
+    from google.oauth2.service_account import Credentials
+    return Credentials.from_service_account_info(st.secrets["gcp_service_account"], scopes=GOOGLE_SCOPES)
+
+@st.cache_resource
+def get_api_client():
+    """Rate limits, retries and request coalescing shared by every Google API call in the process"""
+    return APIClient(API_QUOTAS, tracer=get_tracer())
+
+@st.cache_resource
+def get_sheet():
+    """Open the submissions worksheet, adding any header columns newer versions write"""
+    import gspread
+    from gspread.utils import rowcol_to_a1
+    api = get_api_client()
+    sheets_client = gspread.authorize(get_google_credentials())
+    spreadsheet = api.call("sheets_read", sheets_client.open_by_url, GOOGLE_SHEET_URL)
+    worksheet = RateLimitedWorksheet(spreadsheet.sheet1, api)
+    header = worksheet.row_values(1)
+    if header and len(header) < len(SHEET_HEADER):
+        worksheet.update(range_name=rowcol_to_a1(1, len(header) + 1), values=[SHEET_HEADER[len(header):]])
+    return worksheet
+
+@st.cache_resource
+def get_drive_uploader():
+    """Drive upload engine; each of its worker threads builds its own Drive service"""
+    credentials = get_google_credentials()
+    
+    def build_service():
+        from googleapiclient.discovery import build
+        return build("drive", "v3", credentials=credentials, cache_discovery=False)
+    
+    return DriveUploader(build_service, get_api_client(), workers=DRIVE_UPLOAD_WORKERS,
+                         inherit_permissions=DRIVE_INHERIT_PERMISSIONS)
 
 # Initialize session state
 if 'user_answers' not in st.session_state:
@@ -105,159 +212,537 @@ if 'user_info' not in st.session_state:
     st.session_state.user_info = {}
 if 'test_submitted' not in st.session_state:
     st.session_state.test_submitted = False
-if 'time_remaining' not in st.session_state:
-    st.session_state.time_remaining = 30 * 60  # 30 minutes in seconds
-if 'timer_active' not in st.session_state:
-    st.session_state.timer_active = False
+if 'deadline' not in st.session_state:
+    st.session_state.deadline = None  # absolute end time (epoch seconds), set when the test starts
+if 'auto_submitted' not in st.session_state:
+    st.session_state.auto_submitted = False
 if 'shuffled_questions' not in st.session_state:
-    st.session_state.shuffled_questions = []
-
-# Employee data
-employee_data = [
-    {"Employee": "Saravana Kumar R", "Gender": "Male", "Marital Status": "Unmarried", "Region": "South", "Location": "Trichy", "Department": "TSG & IT Hardware", "Total Amount Due": 2000},
-    {"Employee": "Narsi Ram Meena", "Gender": "Male", "Marital Status": "Married", "Region": "North", "Location": "Lucknow", "Department": "TSG & IT Hardware", "Total Amount Due": 6000},
-    {"Employee": "Shahbaz Khan", "Gender": "Male", "Marital Status": "Married", "Region": "North", "Location": "Agra", "Department": "Customer Service Division", "Total Amount Due": 4400},
-    {"Employee": "Aman Mishra", "Gender": "Male", "Marital Status": "Unmarried", "Region": "West", "Location": "Satara", "Department": "TSG & IT Hardware", "Total Amount Due": 2300},
-    {"Employee": "Bherulal Sharma", "Gender": "Male", "Marital Status": "Unmarried", "Region": "West", "Location": "Satara", "Department": "Accounts", "Total Amount Due": 10000},
-    {"Employee": "Brajesh Sharma", "Gender": "Male", "Marital Status": "Married", "Region": "North", "Location": "Lucknow", "Department": "TSG & IT Hardware", "Total Amount Due": 15000},
-    {"Employee": "Suraj Mahor", "Gender": "Male", "Marital Status": "Unmarried", "Region": "North", "Location": "Lucknow", "Department": "TSG & IT Hardware", "Total Amount Due": 14000},
-    {"Employee": "Shikha Yadav", "Gender": "Female", "Marital Status": "Married", "Region": "East", "Location": "Noida", "Department": "Sales", "Total Amount Due": 200},
-    {"Employee": "Sunita Gautam Dudhe", "Gender": "Female", "Marital Status": "Married", "Region": "West", "Location": "Nagpur", "Department": "Customer Service Division", "Total Amount Due": 123},
-    {"Employee": "Dhan Das", "Gender": "Male", "Marital Status": "Unmarried", "Region": "East", "Location": "Guwahati", "Department": "TSG & IT Hardware", "Total Amount Due": 0},
-    {"Employee": "Anamika Singh Chaudhary", "Gender": "Female", "Marital Status": "Unmarried", "Region": "North", "Location": "Agra", "Department": "Customer Service Division", "Total Amount Due": 1},
-    {"Employee": "Chaitram Dhanraj Shahu", "Gender": "Male", "Marital Status": "Married", "Region": "West", "Location": "Nagpur", "Department": "Customer Service Division", "Total Amount Due": 12300},
-    {"Employee": "Dev Singh Saharawat", "Gender": "Male", "Marital Status": "Unmarried", "Region": "North", "Location": "Ambala", "Department": "Accounts", "Total Amount Due": 5300},
-    {"Employee": "Santosh Kumar Singh", "Gender": "Male", "Marital Status": "Married", "Region": "North", "Location": "Noida", "Department": "TSG & IT Hardware", "Total Amount Due": 47000},
-]
+    st.session_state.shuffled_questions = []  # this candidate's form: [question id, option order] pairs
+if 'form_seed' not in st.session_state:
+    st.session_state.form_seed = None
+if 'pending_uploads' not in st.session_state:
+    st.session_state.pending_uploads = {}  # question id -> Future of an upload in flight
+if 'upload_generations' not in st.session_state:
+    st.session_state.upload_generations = {}  # question id -> uploader widget generation, bumped to clear it
+if 'session_key' not in st.session_state:
+    st.session_state.session_key = uuid.uuid4().hex  # identifies this session in process-wide caches
+if 'checkpoint_claimed' not in st.session_state:
+    st.session_state.checkpoint_claimed = None  # employee ID whose saved attempt this session may overwrite
+if 'last_checkpoint' not in st.session_state:
+    st.session_state.last_checkpoint = None  # JSON of the last autosave, so unchanged reruns don't save again
 
-# Correct answers for MCQs only
-correct_answers = {
-    "q1": "a",  # True
-    "q2": "b",  # Column heading
-    "q3": "b",  # Conditional Formatting
-    "q4": "a",  # Right
-    "q5": "b",  # Does not change
-    "q6": "b",  # IF
-    "q7": "a",  # True
-    "q8": "a",  # Show only rows where Category = "Food"
-}
+def restore_attempt(saved):
+    """Take over a checkpointed attempt: info, answers, uploads, form and the original deadline"""
+    st.session_state.user_info = saved["user_info"]
+    st.session_state.user_answers = saved["answers"]
+    st.session_state.deadline = saved["deadline"]
+    st.session_state.form_seed = saved["form_seed"]
+    st.session_state.shuffled_questions = [(q_id, order) for q_id, order in saved["shuffled_questions"]]
+    st.session_state.workbook_grade = tuple(saved["workbook_grade"]) if saved.get("workbook_grade") else None
+    st.session_state.pending_uploads = {}
+    # The MCQ radios are keyed by question id, so they pick the restored answers up from here
+    for q_id, _ in st.session_state.shuffled_questions:
+        if saved["answers"].get(q_id):
+            st.session_state[q_id] = saved["answers"][q_id]
+    st.session_state.checkpoint_claimed = saved["user_info"]["employee_id"].strip()
+    st.session_state.last_checkpoint = None
+
+# Resuming has to happen before any widget is drawn
+if 'resume_checkpoint' in st.session_state:
+    restore_attempt(st.session_state.pop('resume_checkpoint'))
+
+# Profile this whole rerun when an admin asked for it from the Performance panel
+rerun_profiler = None
+if st.session_state.pop("profile_next_rerun", False):
+    rerun_profiler = cProfile.Profile()
+    rerun_profiler.enable()
+
+@st.cache_resource
+def get_question_bank():
+    """Section A questions and answer key, loaded once per process"""
+    return QuestionBank.load(QUESTION_BANK_PATH)
 
-# Image for Question 8
-QUESTION_8_IMAGE = "https://raw.githubusercontent.com/MrSingh529/excel-practice-test/main/images/pivot_table_slicer.png"
+# Correct answers for MCQs only, by question id
+correct_answers = get_question_bank().answer_key
 
-def upload_to_drive(file_data, filename, folder_id):
-    """Upload a file to Google Drive and return its shareable link"""
+def form_question_ids():
+    """Question ids on this candidate's form, in the order they were shown"""
+    return [q_id for q_id, _ in st.session_state.shuffled_questions] or list(correct_answers)
+
+def drive_image_url(file_link):
+    """Direct image URL for a Drive share link, usable in <img> tags and ImageColumn"""
+    match = re.search(r"/file/d/([^/]+)", file_link or "")
+    return f"https://drive.google.com/uc?export=view&id={match.group(1)}" if match else ""
+
+@st.cache_resource
+def get_image_pool():
+    """Process pool for screenshot transcoding and workbook grading, shared by every session"""
+    return ProcessPoolExecutor(max_workers=IMAGE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+@tracer.traced("upload_screenshot")
+def process_and_upload_screenshot(pool, uploader, blobs, blob, stem):
+    """Runs on an upload worker: transcode the spilled file in the process pool, then upload image and thumbnail"""
     try:
-        file_metadata = {
-            "name": filename,
-            "parents": [folder_id]
-        }
-        media = MediaIoBaseUpload(io.BytesIO(file_data), mimetype="image/jpeg")
-        file = drive_service.files().create(
-            body=file_metadata,
-            media_body=media,
-            fields="id"
-        ).execute()
-        
-        # Make the file publicly accessible
-        drive_service.permissions().create(
-            fileId=file["id"],
-            body={"role": "reader", "type": "anyone"}
-        ).execute()
-        
-        # Get the shareable link
-        file_link = f"https://drive.google.com/file/d/{file['id']}/view"
-        return file_link
+        with tracer.span("prepare_screenshot"):
+            processed = pool.submit(prepare_screenshot, blob.path).result(timeout=IMAGE_TIMEOUT)
+    finally:
+        blobs.discard(blob)
+    url, thumbnail_url = uploader.upload_files([
+        (processed["data"], f"{stem}.{processed['ext']}", processed["mime"]),
+        (processed["thumbnail"], f"{stem}_thumb.{processed['thumbnail_ext']}", processed["thumbnail_mime"])
+    ], DRIVE_FOLDER_ID)
+    return {
+        "url": url,
+        "thumbnail_url": drive_image_url(thumbnail_url),
+        "bytes": len(processed["data"]),
+        "original_bytes": processed["original_bytes"]
+    }
+
+def upload_screenshot(blob, q_id):
+    """Start a background upload of one spilled screenshot and return its Future"""
+    info = st.session_state.user_info
+    stem = f"{info.get('name', '')}_{info.get('employee_id', '')}_{q_id}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    uploader = get_drive_uploader()
+    return uploader.submit(process_and_upload_screenshot, get_image_pool(), uploader, get_blob_store(), blob, stem)
+
+def upload_workbook(blob):
+    """Start a background upload of the candidate's spilled workbook, kept for admin review"""
+    info = st.session_state.user_info
+    filename = f"{info.get('name', '')}_{info.get('employee_id', '')}_pivots_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    uploader = get_drive_uploader()
+    blobs = get_blob_store()
+    
+    @tracer.traced("upload_workbook")
+    def upload():
+        try:
+            with blob.open() as stream:
+                url = uploader.upload_files([(stream, filename, XLSX_MIME)], DRIVE_FOLDER_ID)[0]
+        finally:
+            blobs.discard(blob)
+        return {"url": url, "bytes": blob.size, "original_bytes": blob.size}
+    
+    return uploader.submit(upload)
+
+def release_uploaded_file(uploaded_file):
+    """Drop Streamlit's in-memory copy of an upload we have already spilled to disk"""
+    from streamlit.runtime.memory_uploaded_file_manager import MemoryUploadedFileManager
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    
+    ctx = get_script_run_ctx()
+    # Only the in-memory manager can remove single files (st.chat_input releases its uploads the same way)
+    if ctx is not None and isinstance(ctx.uploaded_file_mgr, MemoryUploadedFileManager):
+        ctx.uploaded_file_mgr.remove_file(session_id=ctx.session_id, file_id=uploaded_file.file_id)
+
+def spill_upload(q_id, uploaded_file):
+    """Move an uploaded file out of session memory into the blob store.
+
+    The uploader widget gets a new key, so the next rerun shows an empty
+    one and Streamlit forgets the file.
+    """
+    uploaded_file.seek(0)
+    blob = get_blob_store().put(uploaded_file)
+    release_uploaded_file(uploaded_file)
+    st.session_state.upload_generations[q_id] = st.session_state.upload_generations.get(q_id, 0) + 1
+    return blob
+
+def start_upload(q_id, blob, upload):
+    """Upload a spilled file once per distinct content; a blob nobody needs is deleted at once"""
+    started = False
+    
+    def run():
+        nonlocal started
+        started = True
+        return upload()
+    
+    future = get_upload_cache().get_or_upload(st.session_state.session_key, q_id, blob.digest, blob.size, run)
+    if not started:
+        get_blob_store().discard(blob)
+    st.session_state.pending_uploads[q_id] = future
+
+def record_upload(q_id, result):
+    if "thumbnail_url" in result:
+        st.session_state.user_answers[f"{q_id}_screenshot_url"] = result["url"]
+        st.session_state.user_answers[f"{q_id}_thumbnail_url"] = result["thumbnail_url"]
+    else:
+        st.session_state.user_answers[f"{q_id}_url"] = result["url"]
+    autosave()
+
+def upload_status(q_id, url_key):
+    """Attach q_id's upload if it has finished and show where it stands; True while uploaded or uploading"""
+    future = st.session_state.pending_uploads.get(q_id)
+    if future is not None:
+        if not future.done():
+            st.info("⏳ Uploading in the background; it will be attached when you submit.")
+            return True
+        del st.session_state.pending_uploads[q_id]
+        if future.exception() is not None:
+            st.error(f"Failed to upload to Google Drive: {str(future.exception())}. Please upload the file again.")
+            return False
+        record_upload(q_id, future.result())
+    return bool(st.session_state.user_answers.get(url_key))
+
+def clear_upload(q_id, answer_keys):
+    """Button callback: forget an upload so its question shows an empty uploader again"""
+    if deadline_passed():
+        return  # the fragment rerun that follows auto-submits what was there
+    for key in answer_keys:
+        st.session_state.user_answers.pop(key, None)
+    st.session_state.pending_uploads.pop(q_id, None)
+    autosave()
+
+@tracer.traced("grade_pivot_workbook")
+def grade_pivot_workbook(blob):
+    """Auto-grade the PivotTables in a spilled workbook on the process pool, with a hard time limit"""
+    expected = dataset_artifacts(DATASET_VERSION)["pivots"]
+    future = get_image_pool().submit(grade_workbook, blob.path, expected, WORKBOOK_TIMEOUT)
+    try:
+        return future.result(timeout=WORKBOOK_TIMEOUT + 5)
+    except FutureTimeoutError:
+        return manual_review(expected, "grading took too long")
     except Exception as e:
-        st.error(f"Failed to upload to Google Drive: {str(e)}")
-        return None
+        return manual_review(expected, f"grading failed: {type(e).__name__}")
+
+def collect_screenshot_uploads(timeout):
+    """Wait up to `timeout` seconds for background uploads; returns error messages for the ones that failed"""
+    errors = []
+    deadline = time.time() + timeout
+    for q_id, future in list(st.session_state.pending_uploads.items()):
+        try:
+            result = future.result(timeout=max(0, deadline - time.time()))
+        except FutureTimeoutError:
+            errors.append(f"{q_id.upper()} is still uploading")
+            continue
+        except Exception as e:
+            errors.append(f"{q_id.upper()} upload failed: {str(e)}")
+        else:
+            record_upload(q_id, result)
+        del st.session_state.pending_uploads[q_id]
+    return errors
+
+@st.cache_resource
+def get_sheets_storage():
+    return SheetsStorage(get_sheet())
+
+@st.cache_resource
+def get_storage():
+    """Primary submissions store, chosen by the storage_backend secret"""
+    if STORAGE_BACKEND == "sqlite":
+        return SQLiteStorage(STORAGE_PATH)
+    return get_sheets_storage()
+
+@st.cache_resource
+def get_submissions_cache():
+    """Submissions cache shared across all sessions"""
+    return SubmissionsCache(get_storage(), ttl=SUBMISSIONS_CACHE_TTL)
+
+@st.cache_resource
+def get_sheet_spool():
+    """Write-ahead spool that appends submissions to the Google Sheet in batches"""
+    on_flush = None
+    if STORAGE_BACKEND != "sqlite":
+        cache = get_submissions_cache()
+        
+        def on_flush(submissions, position):
+            for i, submission in enumerate(submissions):
+                cache.record_append(submission, None if position is None else position + i)
+    
+    spool = SheetSpool(SHEET_SPOOL_PATH, get_sheets_storage(), batch_size=SHEET_BATCH_SIZE,
+                       flush_interval=SHEET_FLUSH_SECONDS, on_flush=on_flush)
+    spool.start()
+    return spool
+
+def uses_sheet_spool():
+    return STORAGE_BACKEND != "sqlite" or SHEETS_MIRROR
+
+@st.cache_resource
+def get_upload_cache():
+    """Screenshot URLs by (session, question, content hash), shared process-wide"""
+    return UploadCache()
+
+@st.cache_resource
+def get_blob_store():
+    """Temp-file store holding uploads until they reach Drive, shared process-wide"""
+    return BlobStore(BLOB_DIR)
+
+@st.cache_resource
+def get_session_memory():
+    """Latest session state footprint of every live session, shared process-wide"""
+    return SessionMemory(SESSION_MEMORY_BUDGET_MB * 1024 * 1024)
+
+@st.cache_resource
+def get_checkpoints():
+    """Autosaved in-progress attempts by employee ID, written in the background"""
+    store = CheckpointStore(CHECKPOINTS_PATH, flush_interval=AUTOSAVE_SECONDS)
+    store.start()
+    return store
+
+def autosave():
+    """Checkpoint the attempt if it changed since the last save; the store batches the actual writes"""
+    employee_id = st.session_state.user_info.get("employee_id", "").strip()
+    if st.session_state.test_submitted or not employee_id or st.session_state.checkpoint_claimed != employee_id:
+        return
+    checkpoint = {
+        "session": st.session_state.session_key,
+        "user_info": st.session_state.user_info,
+        "answers": st.session_state.user_answers,
+        "deadline": st.session_state.deadline,
+        "form_seed": st.session_state.form_seed,
+        "shuffled_questions": st.session_state.shuffled_questions,
+        "workbook_grade": st.session_state.get("workbook_grade")
+    }
+    fingerprint = json.dumps(checkpoint, sort_keys=True)
+    if fingerprint != st.session_state.last_checkpoint:
+        get_checkpoints().save(employee_id, checkpoint)
+        st.session_state.last_checkpoint = fingerprint
+
+@st.cache_resource
+def get_aggregates():
+    """Dashboard totals updated as each submission is saved, shared process-wide"""
+    return AggregateStore(AGGREGATES_PATH)
+
+def rebuild_aggregates():
+    """Recompute the aggregates from every stored submission, plus any still spooled for the sheet"""
+    with tracer.span("rebuild_aggregates"):
+        submissions = get_storage().load_since(0)
+        if STORAGE_BACKEND != "sqlite":
+            submissions += get_sheet_spool().spooled()
+        return get_aggregates().rebuild(submissions, get_question_bank(), datetime.datetime.now().isoformat())
 
 def load_submissions():
-    """Load submissions from Google Sheets"""
+    """Load submissions from the shared cache, fetching only new records from storage"""
     try:
-        records = sheet.get_all_records()
-        submissions = []
-        for record in records:
-            answers = {}
-            for key in record:
-                if key.startswith("Q") and key.endswith("Screenshot URL"):
-                    answers[key.lower().replace(" ", "_")] = record[key]
-                elif key.startswith("Q"):
-                    answers[key.lower()] = record[key]
-            submissions.append({
-                "timestamp": record["Timestamp"],
-                "user_info": {
-                    "name": record["Name"],
-                    "employee_id": record["Employee ID"],
-                    "department": record["Department"],
-                    "email": record["Email"]
-                },
-                "score": int(record["MCQ Score"].split("/")[0]),
-                "total": int(record["MCQ Score"].split("/")[1]),
-                "percentage": float(record["Percentage"].replace("%", "")),
-                "answers": answers
-            })
-        return submissions
+        with tracer.span("load_submissions"):
+            return get_submissions_cache().get()
     except Exception as e:
         st.error(f"Failed to load submissions: {str(e)}")
         return []
 
+@tracer.traced("save_submission")
 def save_submission(submission):
-    """Save a new submission to Google Sheets"""
-    try:
-        row = [
-            submission["timestamp"],
-            submission["user_info"]["name"],
-            submission["user_info"]["employee_id"],
-            submission["user_info"]["department"],
-            submission["user_info"]["email"],
-            f"{submission['score']}/{submission['total']}",
-            f"{submission['percentage']:.1f}%",
-            "PASS" if submission["percentage"] >= 70 else "FAIL",
-            submission["answers"].get("q1", ""),
-            submission["answers"].get("q2", ""),
-            submission["answers"].get("q3", ""),
-            submission["answers"].get("q4", ""),
-            submission["answers"].get("q5", ""),
-            submission["answers"].get("q6", ""),
-            submission["answers"].get("q7", ""),
-            submission["answers"].get("q8", ""),
-            submission["answers"].get("q9a_screenshot_url", ""),
-            submission["answers"].get("q9b_screenshot_url", ""),
-            submission["answers"].get("q10_screenshot_url", "")
-        ]
-        sheet.append_row(row)
-    except Exception as e:
-        st.error(f"Failed to save submission: {str(e)}")
+    """Durably record a new submission (raises on failure so the job can be retried).
+
+    Rows for the Google Sheet go through the spool, which appends them in
+    batches; saving the same submission twice never duplicates it, nor
+    counts it twice in the dashboard aggregates.
+    """
+    if STORAGE_BACKEND == "sqlite":
+        position = get_storage().append(submission)
+        get_submissions_cache().record_append(submission, position)
+    if uses_sheet_spool():
+        get_sheet_spool().add(submission)
+    get_aggregates().add(submission, get_question_bank())
+
+@st.cache_resource(max_entries=2)
+def dataset_artifacts(version):
+    """Employee data downloads, built once per dataset version (older versions are evicted)"""
+    with tracer.span("build_dataset_artifacts"):
+        return build_dataset_artifacts()
+
+@st.cache_resource
+def get_export_cache():
+    """Generated export files shared across admin sessions"""
+    return export.ExportCache(EXPORT_DIR)
+
+@st.cache_resource(max_entries=2)
+def submissions_table(version, _submissions):
+    """Flat display table for the All Submissions grid, rebuilt only when the data version changes"""
+    return build_submissions_table(_submissions)
+
+def build_submissions_table(submissions):
+    """One grid row per submission"""
+    return pd.DataFrame({
+        "Timestamp": [s['timestamp'][:19].replace('T', ' ') for s in submissions],
+        "Name": [s['user_info']['name'] for s in submissions],
+        "Employee ID": [str(s['user_info']['employee_id']) for s in submissions],
+        "Department": [s['user_info']['department'] for s in submissions],
+        "Email": [s['user_info']['email'] for s in submissions],
+        "MCQ Score": [f"{s['score']}/{s['total']}" for s in submissions],
+        "Percentage": [s['percentage'] for s in submissions],
+        "Status": ["PASS" if s['percentage'] >= 70 else "FAIL" for s in submissions],
+        "Q9a Screenshot": [s['answers'].get("q9a_screenshot_url") or None for s in submissions],
+        "Q9b Screenshot": [s['answers'].get("q9b_screenshot_url") or None for s in submissions],
+        "Q10 Screenshot": [s['answers'].get("q10_screenshot_url") or None for s in submissions],
+        "Q9a Preview": [s['answers'].get("q9a_thumbnail_url") or None for s in submissions],
+        "Q9b Preview": [s['answers'].get("q9b_thumbnail_url") or None for s in submissions],
+        "Q10 Preview": [s['answers'].get("q10_thumbnail_url") or None for s in submissions],
+        "Pivot Auto-grade": [pivot_auto_grade(s['answers']) for s in submissions],
+        "Workbook": [s['answers'].get("pivot_workbook_url") or None for s in submissions]
+    })
+
+@st.cache_resource(max_entries=2)
+def item_statistics(version, bank_version, _submissions):
+    """Item analysis of every stored answer, recomputed only when the data or question bank changes"""
+    with tracer.span("item_analysis"):
+        return analyse_submissions(_submissions, get_question_bank())
 
-def calculate_score(user_answers):
-    """Calculate test score for MCQs only"""
+@st.cache_resource(max_entries=2)
+def regrade_preview(version, bank_version, _submissions):
+    """Re-grade of every stored submission, held once per process rather than in each admin's session"""
+    with tracer.span("regrade"):
+        return regrade(_submissions, correct_answers)
+
+@st.cache_resource(max_entries=2)
+def score_trend_points(version, _submissions):
+    """Sampled individual scores and a downsampled rolling mean for the WebGL trend chart"""
+    with tracer.span("score_trend"):
+        return score_trend(_submissions, CHART_MAX_POINTS)
+
+def pivot_auto_grade(answers):
+    """e.g. "2/3 auto" when a workbook was graded, blank when only screenshots were sent"""
+    grades = [answers.get(f"{q_id}_auto_grade") for q_id in PIVOT_QUESTIONS]
+    if not any(grades):
+        return ""
+    return f"{sum(1 for grade in grades if grade == CORRECT)}/{len(grades)} auto"
+
+def filter_submissions_table(table, search, departments, status):
+    """Apply the grid's search box, department and status filters"""
+    mask = pd.Series(True, index=table.index)
+    if search:
+        mask &= (table["Name"].str.contains(search, case=False, regex=False)
+                 | table["Employee ID"].str.contains(search, case=False, regex=False))
+    if departments:
+        mask &= table["Department"].isin(departments)
+    if status != "All":
+        mask &= table["Status"] == status
+    return table[mask]
+
+@tracer.traced("apply_regrade")
+def apply_regrade(result):
+    """Write changed scores back in bulk, record the audit diff, then update the sheet mirror"""
+    updates = score_updates(result)
+    get_storage().update_scores(updates)
+    append_audit(REGRADE_AUDIT_PATH, correct_answers, result, datetime.datetime.now().isoformat())
+    get_submissions_cache().invalidate(full=True)
+    rebuild_aggregates()  # percentages changed
+    if STORAGE_BACKEND == "sqlite" and SHEETS_MIRROR:
+        # Mirror rows can be in a different order, so match them by submission ID
+        sheets = get_sheets_storage()
+        positions = sheets.submission_positions()
+        sheets.update_scores([dict(u, position=positions[u["submission_id"]])
+                              for u in updates if u["submission_id"] in positions])
+    return len(updates)
+
+def calculate_score(user_answers, question_ids):
+    """Calculate test score for the MCQs on a form"""
     score = 0
-    total = len(correct_answers)  # 8 MCQs
-    for q_id, correct_answer in correct_answers.items():
-        if user_answers.get(q_id) == correct_answer:
+    total = len(question_ids)
+    for q_id in question_ids:
+        if user_answers.get(q_id) == correct_answers[q_id]:
             score += 1
     return score, total
 
+@st.cache_resource
+def get_outbox():
+    """Process-wide outbox reusing authenticated SMTP connections"""
+    pool = SMTPPool(SMTP_SERVER, int(SMTP_PORT), EMAIL_SENDER, EMAIL_PASSWORD, use_tls=SMTP_USE_TLS, size=SMTP_POOL_SIZE)
+    outbox = Outbox(
+        pool, EMAIL_SENDER,
+        rate=SMTP_RATE_LIMIT,
+        digest_path=OUTBOX_PATH,
+        digest_recipients=[admin_email.strip() for admin_email in ADMIN_EMAILS],
+        digest_interval=ADMIN_DIGEST_MINUTES * 60
+    )
+    outbox.start_digest(admin_digest)
+    return outbox
+
+@tracer.traced("send_email")
 def send_email(recipient, subject, body):
-    """Send email notification"""
-    try:
-        msg = MIMEMultipart()
-        msg['From'] = EMAIL_SENDER
-        msg['To'] = recipient
-        msg['Subject'] = subject
-        msg.attach(MIMEText(body, 'plain'))
-
-        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-        server.starttls()
-        server.login(EMAIL_SENDER, EMAIL_PASSWORD)
-        server.send_message(msg)
-        server.quit()
-        return True
-    except Exception as e:
-        st.error(f"Failed to send email: {str(e)}")
-        return False
+    """Send email notification (raises on failure so the job can be retried)"""
+    get_outbox().send(recipient, subject, body)
+
+def candidate_email_body(submission):
+    """Results email sent to the candidate"""
+    score, total, percentage = submission["score"], submission["total"], submission["percentage"]
+    return f"""
+    Dear {submission['user_info']['name']},
+    
+    Thank you for completing the Excel Practice Test.
+    Your MCQ Score: {score}/{total} ({percentage:.1f}%)
+    Status: {'PASS' if percentage >= 70 else 'NEEDS IMPROVEMENT'} (MCQs only)
+    Note: Your PivotTable submissions (Questions 9 & 10) will be reviewed by admins.
+    
+    Regards,
+    Learning & Development Department
+    """
+
+def admin_email_body(submission):
+    """Notification email sent to each admin"""
+    info = submission["user_info"]
+    score, total, percentage = submission["score"], submission["total"], submission["percentage"]
+    return f"""
+    New Test Submission:
+    Name: {info['name']}
+    Employee ID: {info['employee_id']}
+    Department: {info['department']}
+    MCQ Score: {score}/{total} ({percentage:.1f}%)
+    Status: {'PASS' if percentage >= 70 else 'NEEDS IMPROVEMENT'} (MCQs only)
+    Note: Please review the PivotTable screenshots for Questions 9 & 10 in the Admin Dashboard.
+    """
+
+def admin_digest(entries):
+    """Collapse queued admin notifications into one summary mail"""
+    passed = sum(1 for e in entries if e["percentage"] >= 70)
+    lines = [
+        f"- {e['name']} ({e['employee_id']}, {e['department']}): {e['score']}/{e['total']} "
+        f"({e['percentage']:.1f}%) {'PASS' if e['percentage'] >= 70 else 'NEEDS IMPROVEMENT'}"
+        for e in entries
+    ]
+    body = f"""
+    New Test Submissions: {len(entries)} ({passed} passed, MCQs only)
+
+    """ + "\n".join(lines) + """
+
+    Note: Please review the PivotTable screenshots for Questions 9 & 10 in the Admin Dashboard.
+    """
+    return f"Excel Test Submissions Digest ({len(entries)} new)", body
+
+# Background jobs: the submit button only waits for the enqueue, everything
+# below runs on the job workers and is retried on failure.
+def run_save_submission_job(queue, job):
+    """Persist the submission, then fan out one notification job per recipient.
 
+    The digest entry is added before anything is enqueued and is keyed by
+    submission id, so a retried job neither duplicates it nor mails the candidate twice.
+    """
+    save_submission(job.payload)
+    outbox = get_outbox()
+    if outbox.digest_enabled:
+        info = job.payload["user_info"]
+        outbox.add_to_digest({
+            "name": info["name"],
+            "employee_id": info["employee_id"],
+            "department": info["department"],
+            "score": job.payload["score"],
+            "total": job.payload["total"],
+            "percentage": job.payload["percentage"]
+        }, key=job.payload.get("submission_id"))
+    queue.enqueue("candidate_email", job.payload, group=job.group)
+    if outbox.digest_enabled:
+        return
+    for admin_email in ADMIN_EMAILS:
+        queue.enqueue("admin_email", {"recipient": admin_email.strip(), "submission": job.payload}, group=job.group)
+
+def run_candidate_email_job(queue, job):
+    send_email(job.payload["user_info"]["email"], "Excel Practice Test Results", candidate_email_body(job.payload))
+
+def run_admin_email_job(queue, job):
+    send_email(job.payload["recipient"], "New Excel Test Submission", admin_email_body(job.payload["submission"]))
+
+@st.cache_resource
+def get_job_queue():
+    """Process-wide job queue shared by every session"""
+    get_outbox()  # build the outbox and aggregates on the script thread before workers need them
+    get_aggregates()
+    if uses_sheet_spool():
+        get_sheet_spool()  # also starts flushing anything a previous process left spooled
+    queue = JobQueue(JOB_QUEUE_PATH, workers=JOB_WORKERS)
+    queue.register("save_submission", run_save_submission_job)
+    queue.register("candidate_email", run_candidate_email_job)
+    queue.register("admin_email", run_admin_email_job)
+    queue.start()
+    return queue
+
+@tracer.traced("generate_certificate")
 def generate_certificate(name, score, total, date):
     """Generate PDF certificate"""
     pdf = FPDF()
@@ -287,600 +772,908 @@ def generate_certificate(name, score, total, date):
     output.seek(0)
     return output
 
-def create_detailed_analytics(submissions):
-    """Create detailed analytics for admin"""
-    df = pd.DataFrame([{
-        "timestamp": s["timestamp"],
-        "name": s["user_info"]["name"],
-        "department": s["user_info"]["department"],
-        "score": s["score"],
-        "total": s["total"],
-        "percentage": s["percentage"],
-        "answers": s["answers"]
-    } for s in submissions])
+@tracer.traced("create_detailed_analytics")
+def create_detailed_analytics(snapshot):
+    """Create detailed analytics for admin from the aggregates, without reading submissions"""
+    return aggregate_analytics(snapshot, correct_answers)
+
+def submit_test():
+    """Score the current answers and queue the submission; returns False if it couldn't be queued"""
+    score, total = calculate_score(st.session_state.user_answers, form_question_ids())
+    percentage = (score / total) * 100
     
-    if df.empty:
-        return None, None, None, None
+    # Create submission record
+    submission_id = uuid.uuid4().hex
+    submission = {
+        "submission_id": submission_id,
+        "timestamp": datetime.datetime.now().isoformat(),
+        "user_info": st.session_state.user_info,
+        "answers": st.session_state.user_answers,
+        "score": score,
+        "total": total,
+        "percentage": percentage,
+        # QuestionBank.form(seed, size, shuffle_questions) of this bank version draws the same form again
+        "form": {"bank_version": get_question_bank().version, "seed": st.session_state.form_seed,
+                 "size": FORM_SIZE or None, "shuffle_questions": SHUFFLE_QUESTIONS}
+    }
     
-    # Question-wise accuracy for MCQs
-    question_accuracy = {}
-    for q_id in correct_answers.keys():
-        correct_count = sum(1 for _, row in df.iterrows() if row["answers"].get(q_id) == correct_answers[q_id])
-        total_attempts = len(df)
-        question_accuracy[q_id] = (correct_count / total_attempts * 100) if total_attempts > 0 else 0
+    # Hand persistence and notifications to the background workers
+    try:
+        with tracer.span("enqueue_submission"):
+            get_job_queue().enqueue("save_submission", submission, group=submission_id)
+    except Exception as e:
+        st.error(f"Failed to queue submission: {str(e)}")
+        return False
+    st.session_state.submission_id = submission_id
+    st.session_state.test_submitted = True
+    get_checkpoints().delete(st.session_state.user_info["employee_id"].strip())
+    return True
+
+# Timer logic: the server only keeps the absolute deadline; the browser does the counting
+def time_remaining():
+    if st.session_state.deadline is None:
+        return TEST_DURATION
+    return max(0, st.session_state.deadline - time.time())
+
+def deadline_passed():
+    return (not st.session_state.test_submitted and st.session_state.deadline is not None
+            and time.time() >= st.session_state.deadline)
+
+def enforce_deadline():
+    """Auto-submit whatever was answered before the deadline once it has passed.
+
+    Every input fragment calls this before taking input: a fragment rerun
+    skips the page-level check, and late input must never be stored.
+    """
+    if not deadline_passed():
+        return
+    collect_screenshot_uploads(timeout=0)  # attach uploads that already finished
+    info = st.session_state.user_info
+    if info.get("name") and info.get("employee_id"):
+        if not submit_test():
+            st.stop()
+    else:
+        # Nothing identifies the candidate, so there is nothing worth recording
+        st.session_state.test_submitted = True
+        st.session_state.submission_id = None
+    st.session_state.auto_submitted = True
+    st.rerun()
+
+def render_countdown(seconds_left):
+    """Client-side countdown; reruns only happen on user interaction"""
+    components.html(f"""
+    <div id="timer" style="font-family: sans-serif; font-size: 24px; font-weight: bold; color: #dc3545; text-align: center;"></div>
+    <script>
+    const end = Date.now() + {int(seconds_left * 1000)};
+    const el = document.getElementById("timer");
+    function tick() {{
+        const left = Math.max(0, Math.round((end - Date.now()) / 1000));
+        const mm = Math.floor(left / 60), ss = String(left % 60).padStart(2, "0");
+        el.textContent = left > 0 ? `⏰ Time Remaining: ${{mm}}:${{ss}}`
+                                  : "⏰ Time's up! Your answers will be submitted automatically.";
+        if (left > 0) setTimeout(tick, 250);
+    }}
+    tick();
+    </script>
+    """, height=50)
+
+# Take Test page fragments. Each reruns on its own when its widgets change.
+DEPARTMENTS = ["", "TSG & IT Hardware", "Customer Service Division", "Accounts", "Sales", "HR", "Other"]
+TIMER_CHECK_SECONDS = 15  # how often the timer fragment checks the deadline on the server
+
+@st.fragment
+def user_info_block():
+    """User information form"""
+    enforce_deadline()
+    with st.expander("📋 Enter Your Information", expanded=True):
+        col1, col2 = st.columns(2)
+        with col1:
+            name = st.text_input("👤 Full Name*", value=st.session_state.user_info.get('name', ''))
+            employee_id = st.text_input("🆔 Employee ID*", value=st.session_state.user_info.get('employee_id', ''))
+        with col2:
+            department = st.selectbox("🏢 Department*", DEPARTMENTS,
+                index=DEPARTMENTS.index(st.session_state.user_info.get('department') or ""))
+            email = st.text_input("📧 Email*", value=st.session_state.user_info.get('email', ''))
     
-    # Performance over time
-    df["timestamp"] = pd.to_datetime(df["timestamp"])
-    performance_over_time = df.groupby(df["timestamp"].dt.date)["percentage"].mean().reset_index()
+    # Store user info
+    st.session_state.user_info = {
+        'name': name,
+        'employee_id': employee_id,
+        'department': department,
+        'email': email
+    }
+    resume_block()
+    autosave()
+
+def claim_checkpoint(employee_id):
+    """Button callback: start afresh, letting autosave replace the saved attempt"""
+    st.session_state.checkpoint_claimed = employee_id
+
+def resume_block():
+    """Offer to resume an attempt saved under this employee ID by another session (a refresh, or a restart)"""
+    info = st.session_state.user_info
+    employee_id = info["employee_id"].strip()
+    if not employee_id or st.session_state.checkpoint_claimed == employee_id:
+        return
+    saved = get_checkpoints().load(employee_id)
+    if saved is None or saved["session"] == st.session_state.session_key:
+        st.session_state.checkpoint_claimed = employee_id
+        return
+    # Knowing an employee ID isn't enough to take over someone's attempt
+    if saved["user_info"].get("email", "").strip().lower() != info["email"].strip().lower():
+        st.info("💾 A test in progress is saved for this Employee ID. Enter the email you started it with to resume it.")
+        return
+    answered = sum(1 for q_id, _ in saved["shuffled_questions"] if saved["answers"].get(q_id))
+    remaining = max(0, saved["deadline"] - time.time()) if saved["deadline"] else TEST_DURATION
+    st.info(f"💾 You have a test in progress: {answered} of {len(saved['shuffled_questions'])} multiple-choice "
+            f"questions answered, {int(remaining // 60)} min {int(remaining % 60)} s left.")
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("▶️ Resume my test", type="primary"):
+            st.session_state.resume_checkpoint = saved
+            st.rerun()
+    with col2:
+        st.button("🆕 Start over", on_click=claim_checkpoint, args=(employee_id,),
+                  help="Discards the saved answers once you answer a question here")
+
+@st.fragment(run_every=TIMER_CHECK_SECONDS)
+def timer_block():
+    """Countdown, plus a periodic server-side deadline check that auto-submits"""
+    enforce_deadline()
+    render_countdown(time_remaining())
+
+@st.fragment
+def mcq_block(i, q_id, order):
+    enforce_deadline()
+    question = get_question_bank()[q_id]
+    st.markdown(question.html(i), unsafe_allow_html=True)
     
-    # Department-wise performance
-    dept_performance = df.groupby("department")["percentage"].agg(["mean", "count"]).reset_index()
+    if question.image:
+        st.image(question.image, caption=question.image_caption, use_column_width=True)
     
-    # Individual question analysis
-    question_details = []
-    for q_id in correct_answers.keys():
-        answers = df["answers"].apply(lambda x: x.get(q_id, "Not answered")).value_counts()
-        question_details.append({"Question": q_id, "Answer Distribution": answers.to_dict()})
+    # Options appear in this form's order, but the stored answer is always the original letter
+    letters, labels = question.choices(order)
+    selected = st.radio(
+        f"Select your answer for Question {i}:",
+        options=letters,
+        format_func=labels.get,
+        key=q_id,
+        index=None
+    )
     
-    return question_accuracy, performance_over_time, dept_performance, question_details
-
-# Timer logic
-def update_timer():
-    if st.session_state.timer_active and st.session_state.time_remaining > 0:
-        time.sleep(1)
-        st.session_state.time_remaining -= 1
-    if st.session_state.time_remaining <= 0:
-        st.session_state.timer_active = False
-        st.session_state.test_submitted = True
-        st.rerun()
+    if selected:
+        st.session_state.user_answers[q_id] = selected
+        autosave()
+
+@st.fragment
+def screenshot_block(q_id, label, caption):
+    """Screenshot uploader for one PivotTable question"""
+    enforce_deadline()
+    answers = st.session_state.user_answers
+    url_key, thumbnail_key = f"{q_id}_screenshot_url", f"{q_id}_thumbnail_url"
+    placeholder = st.empty()
+    if not upload_status(q_id, url_key):
+        generation = st.session_state.upload_generations.get(q_id, 0)
+        with placeholder:
+            screenshot = st.file_uploader(label, type=["png", "jpg", "jpeg"], key=f"{q_id}_screenshot_{generation}")
+        if not screenshot:
+            return
+        if screenshot.size > SCREENSHOT_MAX_BYTES:
+            st.error("File size exceeds 5 MB limit. Please upload a smaller file.")
+            return
+        # Move the file to disk and out of the session, then transcode and upload it in the
+        # background, once per distinct file; screenshots for different questions upload concurrently
+        blob = spill_upload(q_id, screenshot)
+        placeholder.empty()
+        start_upload(q_id, blob, lambda: upload_screenshot(blob, q_id))
+        if not upload_status(q_id, url_key):
+            return
+    # The preview is Drive's small thumbnail, so the screenshot itself never comes back into memory
+    if answers.get(thumbnail_key):
+        st.image(answers[thumbnail_key], caption=caption, width=THUMBNAIL_WIDTH)
+    st.button("🔁 Replace screenshot", key=f"{q_id}_replace", on_click=clear_upload,
+              args=(q_id, (url_key, thumbnail_key)))
+
+PIVOT_QUESTIONS = {"q9a": "9a", "q9b": "9b", "q10": "10"}
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+def clear_workbook():
+    """Button callback: forget the workbook, withdrawing its grades too"""
+    if deadline_passed():
+        return
+    for q_id in PIVOT_QUESTIONS:
+        st.session_state.user_answers.pop(f"{q_id}_auto_grade", None)
+    st.session_state.workbook_grade = None
+    clear_upload("pivot_workbook", ("pivot_workbook_url",))
+
+@st.fragment
+def workbook_block():
+    """Optional workbook upload: PivotTables are graded automatically and the file kept for review"""
+    enforce_deadline()
+    answers = st.session_state.user_answers
+    placeholder = st.empty()
+    if st.session_state.get("workbook_grade") is None:
+        generation = st.session_state.upload_generations.get("pivot_workbook", 0)
+        with placeholder:
+            workbook = st.file_uploader("Upload your workbook (.xlsx, max 10 MB)", type=["xlsx"],
+                                        key=f"pivot_workbook_{generation}")
+        if not workbook:
+            return
+        if workbook.size > WORKBOOK_MAX_BYTES:
+            st.error("File size exceeds 10 MB limit. Please upload a smaller file.")
+            return
+        blob = spill_upload("pivot_workbook", workbook)
+        placeholder.empty()
+        # Grade before uploading: the upload deletes the spilled file once it reaches Drive
+        with st.spinner("Grading your PivotTables..."):
+            st.session_state.workbook_grade = (blob.digest, grade_pivot_workbook(blob))
+        for q_id, grade in st.session_state.workbook_grade[1]["grades"].items():
+            answers[f"{q_id}_auto_grade"] = grade
+        start_upload("pivot_workbook", blob, lambda: upload_workbook(blob))
+        autosave()
+    result = st.session_state.workbook_grade[1]
+    
+    if result["status"] == "manual_review":
+        st.warning(f"⚠️ Your workbook couldn't be graded automatically ({result['reason']}). "
+                   "It will be reviewed by admins instead.")
+    else:
+        st.success("Automatic grading: " + " · ".join(
+            f"{label} {'✅ correct' if result['grades'][q_id] == CORRECT else '🔍 needs review'}"
+            for q_id, label in PIVOT_QUESTIONS.items()))
+    upload_status("pivot_workbook", "pivot_workbook_url")
+    st.button("🔁 Replace workbook", key="replace_workbook", on_click=clear_workbook)
 
 # Sidebar navigation
 st.sidebar.title("Navigation")
 page = st.sidebar.selectbox("Choose a page:", 
     ["🏠 Home", "📝 Take Test", "👨‍💼 Admin Dashboard"])
 
-if page == "🏠 Home":
-    st.markdown('<h1 class="main-header">📊 Excel Practice Test</h1>', unsafe_allow_html=True)
-    st.markdown('<p style="text-align: center; color: #666; font-style: italic;">Learning & Development Department: Together we learn, together we soar.</p>', unsafe_allow_html=True)
-    
-    st.markdown("""
-    ## Welcome to the Digital Excel Practice Test!
-    
-    This comprehensive test evaluates your Excel knowledge across multiple areas:
-    
-    ### 📋 Test Sections:
-    - **Section A**: Multiple Choice Questions (8 questions)
-    - **Section B**: Data Analysis using Employee Dataset  
-    - **Section C**: PivotTable Understanding (2 questions)
-    
-    ### 🎯 Learning Objectives:
-    - Master Excel fundamentals
-    - Understand data analysis concepts
-    - Learn PivotTable functionality
-    - Practice conditional formatting
-    - Explore logical functions
-    
-    ### 📊 Features:
-    - Interactive online test with timer
-    - Instant score calculation and email notifications
-    - Progress tracking
-    - Admin analytics
-    - Certificate generation for passing
-    """)
-    
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.info("**Total Questions**: 10 (8 MCQs + 2 PivotTables)")
-    with col2:
-        st.success("**Time Limit**: 30 minutes")
-    with col3:
-        st.warning("**Passing Score**: 70% (MCQs only)")
-
-elif page == "📝 Take Test":
-    st.markdown('<h1 class="main-header">📝 Excel Practice Test</h1>', unsafe_allow_html=True)
-    
-    if not st.session_state.test_submitted:
-        # User information form
-        with st.expander("📋 Enter Your Information", expanded=True):
-            col1, col2 = st.columns(2)
-            with col1:
-                name = st.text_input("👤 Full Name*", value=st.session_state.user_info.get('name', ''))
-                employee_id = st.text_input("🆔 Employee ID*", value=st.session_state.user_info.get('employee_id', ''))
-            with col2:
-                department = st.selectbox("🏢 Department*", 
-                    ["", "TSG & IT Hardware", "Customer Service Division", "Accounts", "Sales", "HR", "Other"],
-                    index=0 if not st.session_state.user_info.get('department') else 
-                    ["", "TSG & IT Hardware", "Customer Service Division", "Accounts", "Sales", "HR", "Other"].index(st.session_state.user_info.get('department')))
-                email = st.text_input("📧 Email*", value=st.session_state.user_info.get('email', ''))
-        
-        # Store user info
-        st.session_state.user_info = {
-            'name': name,
-            'employee_id': employee_id,
-            'department': department,
-            'email': email
-        }
+# Always close this rerun's trace and profile, however the page ends
+try:
+    if page == "🏠 Home":
+        st.markdown('<h1 class="main-header">📊 Excel Practice Test</h1>', unsafe_allow_html=True)
+        st.markdown('<p style="text-align: center; color: #666; font-style: italic;">Learning & Development Department: Together we learn, together we soar.</p>', unsafe_allow_html=True)
         
-        # Instructions
         st.markdown("""
-        <div class="instructions-box">
-        <strong>📝 Instructions:</strong><br>
-        • Answer all 10 questions (8 multiple-choice and 2 PivotTable questions)<br>
-        • For multiple-choice, select the best answer<br>
-        • For PivotTable questions (9 & 10), download the Employee Data as an Excel file, create the PivotTables in Excel, and upload screenshots of your PivotTables (max 5 MB each)<br>
-        • PivotTable questions will be graded manually by admins<br>
-        • Review the employee data table for context<br>
-        • Submit your answers within 30 minutes<br>
-        • You can change answers before final submission
-        </div>
-        """, unsafe_allow_html=True)
-        
-        # Timer display
-        st.markdown(f"""
-        <div class="timer">
-        ⏰ Time Remaining: {int(st.session_state.time_remaining // 60)}:{int(st.session_state.time_remaining % 60):02d}
-        </div>
-        """, unsafe_allow_html=True)
-        
-        # Start timer on first interaction
-        if not st.session_state.timer_active:
-            st.session_state.timer_active = True
+        ## Welcome to the Digital Excel Practice Test!
         
-        # Update timer every second
-        st_autorefresh = st.empty()
-        update_timer()
+        This comprehensive test evaluates your Excel knowledge across multiple areas:
         
-        # Employee Data Display
-        st.markdown("## Section B: Employee Data Reference")
-        st.markdown("*Use this data to understand the context for the questions below:*")
+        ### 📋 Test Sections:
+        - **Section A**: Multiple Choice Questions (8 questions)
+        - **Section B**: Data Analysis using Employee Dataset  
+        - **Section C**: PivotTable Understanding (2 questions)
         
-        df = pd.DataFrame(employee_data)
-        st.dataframe(df, use_container_width=True)
+        ### 🎯 Learning Objectives:
+        - Master Excel fundamentals
+        - Understand data analysis concepts
+        - Learn PivotTable functionality
+        - Practice conditional formatting
+        - Explore logical functions
         
-        # Download Employee Data as Excel
-        excel_buffer = io.BytesIO()
-        df.to_excel(excel_buffer, index=False, engine='openpyxl')
-        excel_buffer.seek(0)
-        st.download_button(
-            label="📥 Download Employee Data as Excel",
-            data=excel_buffer,
-            file_name="employee_data.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
+        ### 📊 Features:
+        - Interactive online test with timer
+        - Instant score calculation and email notifications
+        - Progress tracking
+        - Admin analytics
+        - Certificate generation for passing
+        """)
         
-        # Questions
-        st.markdown("## Section A: Multiple Choice Questions")
-        
-        questions = [
-            {
-                "id": "q1",
-                "text": "The AutoSum feature adds up the numbers in a column or row that you specify.",
-                "options": ["True", "False"]
-            },
-            {
-                "id": "q2", 
-                "text": 'In Excel, the label "AAA" (as seen at the top of a worksheet) is an example of a:',
-                "options": ["Cell reference", "Column heading", "Name box entry", "Row heading"]
-            },
-            {
-                "id": "q3",
-                "text": "__________ quickly highlight important information in a spreadsheet by applying formatting options such as data bars, color scales, or icon sets.",
-                "options": ["Cell references", "Conditional Formatting", "Excel tables", "PivotTables"]
-            },
-            {
-                "id": "q4",
-                "text": "As a rule, Excel will __________-align numbers in a cell.",
-                "options": ["Right", "Left", "Top", "Bottom"]
-            },
-            {
-                "id": "q5",
-                "text": "When you copy a formula that contains an absolute reference (e.g., $A$1) to a new location, the absolute reference:",
-                "options": ["Updates automatically to reflect the new row/column", "Does not change", "Becomes bold", "Gets a dotted outline in its cell"]
-            },
-            {
-                "id": "q6",
-                "text": "Which of the following is a logical function in Excel?",
-                "options": ["AVERAGE", "IF", "SUMPRODUCT", "VLOOKUP"]
-            },
-            {
-                "id": "q7",
-                "text": "PivotTables are a powerful tool used to quickly group, summarize, and rearrange larger datasets.",
-                "options": ["True", "False"]
-            },
-            {
-                "id": "q8",
-                "text": 'Consider a PivotTable with a slicer connected to the "Category" field. If you click "Food" on that slicer, the PivotTable will:',
-                "options": ['Show only rows where Category = "Food"', 'Show all rows except those where Category = "Food"', 'Not change (slicer has no effect)'],
-                "image": QUESTION_8_IMAGE
-            }
-        ]
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.info("**Total Questions**: 10 (8 MCQs + 2 PivotTables)")
+        with col2:
+            st.success("**Time Limit**: 30 minutes")
+        with col3:
+            st.warning("**Passing Score**: 70% (MCQs only)")
+
+    elif page == "📝 Take Test":
+        st.markdown('<h1 class="main-header">📝 Excel Practice Test</h1>', unsafe_allow_html=True)
         
-        # Display questions in fixed order (no shuffling)
-        for i, question in enumerate(questions, 1):
-            st.markdown(f"""
+        if not st.session_state.test_submitted:
+            # Anything that reaches the server after the deadline is not accepted
+            enforce_deadline()
+            
+            # Each block below is a fragment: interacting with it reruns only that block,
+            # not the whole page. The submit button still triggers a full rerun.
+            user_info_block()
+            
+            # Instructions
+            st.markdown("""
+            <div class="instructions-box">
+            <strong>📝 Instructions:</strong><br>
+            • Answer all 10 questions (8 multiple-choice and 2 PivotTable questions)<br>
+            • For multiple-choice, select the best answer<br>
+            • For PivotTable questions (9 & 10), download the Employee Data as an Excel file, create the PivotTables in Excel, and upload screenshots of your PivotTables (max 5 MB each)<br>
+            • PivotTable questions will be graded manually by admins<br>
+            • Review the employee data table for context<br>
+            • Submit your answers within 30 minutes<br>
+            • You can change answers before final submission
+            </div>
+            """, unsafe_allow_html=True)
+            
+            # Start timer and draw this candidate's form on first visit
+            if st.session_state.deadline is None:
+                st.session_state.deadline = time.time() + TEST_DURATION
+            if not st.session_state.shuffled_questions:
+                st.session_state.form_seed = random.SystemRandom().getrandbits(32)
+                st.session_state.shuffled_questions = get_question_bank().form(
+                    st.session_state.form_seed, FORM_SIZE or None, SHUFFLE_QUESTIONS)
+            
+            # Timer display
+            timer_block()
+            
+            # Employee Data Display
+            st.markdown("## Section B: Employee Data Reference")
+            st.markdown("*Use this data to understand the context for the questions below:*")
+            
+            dataset = dataset_artifacts(DATASET_VERSION)
+            st.dataframe(dataset["frame"], use_container_width=True)
+            
+            # Download Employee Data (pre-built bytes shared by every session)
+            col1, col2 = st.columns(2)
+            with col1:
+                st.download_button(
+                    label="📥 Download Employee Data as Excel",
+                    data=dataset["xlsx"],
+                    file_name="employee_data.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                )
+            with col2:
+                st.download_button(
+                    label="📥 Download Employee Data as CSV",
+                    data=dataset["csv"],
+                    file_name="employee_data.csv",
+                    mime="text/csv"
+                )
+            
+            # Questions
+            st.markdown("## Section A: Multiple Choice Questions")
+            
+            for i, (q_id, order) in enumerate(st.session_state.shuffled_questions, 1):
+                mcq_block(i, q_id, order)
+            
+            # PivotTable Questions
+            st.markdown("## Section C: PivotTable Questions")
+            st.markdown("**Note**: These questions require you to create PivotTables in Excel using the downloaded Employee Data file. Please upload screenshots of your PivotTables below (max 5 MB each). These will be reviewed manually by admins.")
+            
+            # Question 9
+            st.markdown("""
             <div class="question-box">
-            <strong>Question {i}:</strong> {question['text']}
+            <strong>Question 9:</strong> Using the Employee Data table above, create two PivotTables:<br>
+            a. A PivotTable that shows, for each Region, the total of "Total Amount Due"<br>
+            b. A PivotTable that shows, for each Department, the total of "Total Amount Due"
             </div>
             """, unsafe_allow_html=True)
             
-            # Display image for Question 8
-            if "image" in question:
-                st.image(question["image"], caption="PivotTable Slicer Example", use_column_width=True)
+            # Question 9a: Upload screenshot
+            st.markdown("**9a. Total Amount Due by Region**")
+            screenshot_block("q9a", "Upload a screenshot of your PivotTable for 9a (PNG/JPG, max 5 MB)", "Uploaded PivotTable for 9a")
             
-            option_labels = [chr(97 + j) for j in range(len(question['options']))]  # a, b, c, d
-            formatted_options = [f"{label}. {option}" for label, option in zip(option_labels, question['options'])]
+            # Question 9b: Upload screenshot
+            st.markdown("**9b. Total Amount Due by Department**")
+            screenshot_block("q9b", "Upload a screenshot of your PivotTable for 9b (PNG/JPG, max 5 MB)", "Uploaded PivotTable for 9b")
             
-            selected = st.radio(
-                f"Select your answer for Question {i}:",
-                options=option_labels,
-                format_func=lambda x: formatted_options[ord(x) - 97],
-                key=question['id'],
-                index=None
-            )
+            # Question 10
+            st.markdown("""
+            <div class="question-box">
+            <strong>Question 10:</strong> Using the Employee Data table above, build a PivotTable in a new worksheet that shows, for each Region, the count of employees by Gender.
+            </div>
+            """, unsafe_allow_html=True)
             
-            if selected:
-                st.session_state.user_answers[question['id']] = selected
-        
-        # PivotTable Questions
-        st.markdown("## Section C: PivotTable Questions")
-        st.markdown("**Note**: These questions require you to create PivotTables in Excel using the downloaded Employee Data file. Please upload screenshots of your PivotTables below (max 5 MB each). These will be reviewed manually by admins.")
-        
-        # Question 9
-        st.markdown("""
-        <div class="question-box">
-        <strong>Question 9:</strong> Using the Employee Data table above, create two PivotTables:<br>
-        a. A PivotTable that shows, for each Region, the total of "Total Amount Due"<br>
-        b. A PivotTable that shows, for each Department, the total of "Total Amount Due"
-        </div>
-        """, unsafe_allow_html=True)
-        
-        # Question 9a: Upload screenshot
-        st.markdown("**9a. Total Amount Due by Region**")
-        q9a_screenshot = st.file_uploader("Upload a screenshot of your PivotTable for 9a (PNG/JPG, max 5 MB)", type=["png", "jpg", "jpeg"], key="q9a_screenshot")
-        if q9a_screenshot:
-            # Check file size (5 MB = 5 * 1024 * 1024 bytes)
-            file_data = q9a_screenshot.read()
-            if len(file_data) > 5 * 1024 * 1024:
-                st.error("File size exceeds 5 MB limit. Please upload a smaller file.")
-            else:
-                # Upload to Google Drive
-                filename = f"{name}_{employee_id}_q9a_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
-                q9a_screenshot_url = upload_to_drive(file_data, filename, DRIVE_FOLDER_ID)
-                if q9a_screenshot_url:
-                    st.session_state.user_answers["q9a_screenshot_url"] = q9a_screenshot_url
-                    st.image(file_data, caption="Uploaded PivotTable for 9a", use_column_width=True)
-        
-        # Question 9b: Upload screenshot
-        st.markdown("**9b. Total Amount Due by Department**")
-        q9b_screenshot = st.file_uploader("Upload a screenshot of your PivotTable for 9b (PNG/JPG, max 5 MB)", type=["png", "jpg", "jpeg"], key="q9b_screenshot")
-        if q9b_screenshot:
-            file_data = q9b_screenshot.read()
-            if len(file_data) > 5 * 1024 * 1024:
-                st.error("File size exceeds 5 MB limit. Please upload a smaller file.")
-            else:
-                filename = f"{name}_{employee_id}_q9b_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
-                q9b_screenshot_url = upload_to_drive(file_data, filename, DRIVE_FOLDER_ID)
-                if q9b_screenshot_url:
-                    st.session_state.user_answers["q9b_screenshot_url"] = q9b_screenshot_url
-                    st.image(file_data, caption="Uploaded PivotTable for 9b", use_column_width=True)
-        
-        # Question 10
-        st.markdown("""
-        <div class="question-box">
-        <strong>Question 10:</strong> Using the Employee Data table above, build a PivotTable in a new worksheet that shows, for each Region, the count of employees by Gender.
-        </div>
-        """, unsafe_allow_html=True)
-        
-        q10_screenshot = st.file_uploader("Upload a screenshot of your PivotTable for Question 10 (PNG/JPG, max 5 MB)", type=["png", "jpg", "jpeg"], key="q10_screenshot")
-        if q10_screenshot:
-            file_data = q10_screenshot.read()
-            if len(file_data) > 5 * 1024 * 1024:
-                st.error("File size exceeds 5 MB limit. Please upload a smaller file.")
-            else:
-                filename = f"{name}_{employee_id}_q10_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
-                q10_screenshot_url = upload_to_drive(file_data, filename, DRIVE_FOLDER_ID)
-                if q10_screenshot_url:
-                    st.session_state.user_answers["q10_screenshot_url"] = q10_screenshot_url
-                    st.image(file_data, caption="Uploaded PivotTable for Question 10", use_column_width=True)
-        
-        # Submit button
-        col1, col2, col3 = st.columns([1, 2, 1])
-        with col2:
-            if st.button("🚀 Submit Test", type="primary", use_container_width=True):
-                # Validate user info
-                if not all([name, employee_id, department, email]):
-                    st.error("⚠️ Please fill in all required information fields!")
-                elif len({k: v for k, v in st.session_state.user_answers.items() if k.startswith('q') and not k.endswith('_screenshot_url')}) < len(correct_answers):
-                    st.error(f"⚠️ Please answer all multiple-choice questions! You have answered {len({k: v for k, v in st.session_state.user_answers.items() if k.startswith('q') and not k.endswith('_screenshot_url')})} out of {len(correct_answers)} MCQs.")
-                elif not all(st.session_state.user_answers.get(key) for key in ["q9a_screenshot_url", "q9b_screenshot_url", "q10_screenshot_url"]):
-                    st.error("⚠️ Please upload screenshots for all PivotTable questions (9a, 9b, and 10)!")
-                else:
-                    # Calculate score for MCQs only
-                    score, total = calculate_score(st.session_state.user_answers)
-                    percentage = (score / total) * 100
-                    
-                    # Create submission record
-                    submission = {
-                        "timestamp": datetime.datetime.now().isoformat(),
-                        "user_info": st.session_state.user_info,
-                        "answers": st.session_state.user_answers,
-                        "score": score,
-                        "total": total,
-                        "percentage": percentage
-                    }
-                    
-                    # Save submission to Google Sheets
-                    save_submission(submission)
-                    
-                    # Send email to user
-                    user_body = f"""
-                    Dear {name},
-                    
-                    Thank you for completing the Excel Practice Test.
-                    Your MCQ Score: {score}/{total} ({percentage:.1f}%)
-                    Status: {'PASS' if percentage >= 70 else 'NEEDS IMPROVEMENT'} (MCQs only)
-                    Note: Your PivotTable submissions (Questions 9 & 10) will be reviewed by admins.
-                    
-                    Regards,
-                    Learning & Development Department
-                    """
-                    send_email(email, "Excel Practice Test Results", user_body)
-                    
-                    # Send email to admins
-                    admin_body = f"""
-                    New Test Submission:
-                    Name: {name}
-                    Employee ID: {employee_id}
-                    Department: {department}
-                    MCQ Score: {score}/{total} ({percentage:.1f}%)
-                    Status: {'PASS' if percentage >= 70 else 'NEEDS IMPROVEMENT'} (MCQs only)
-                    Note: Please review the PivotTable screenshots for Questions 9 & 10 in the Admin Dashboard.
-                    """
-                    for admin_email in ADMIN_EMAILS:
-                        send_email(admin_email.strip(), "New Excel Test Submission", admin_body)
-                    
-                    st.session_state.test_submitted = True
-                    st.session_state.timer_active = False
-                    st.rerun()
-    
-    else:
-        # Show results
-        score, total = calculate_score(st.session_state.user_answers)
-        percentage = (score / total) * 100
-        
-        st.success("🎉 Test Submitted Successfully!")
-        
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.metric("MCQ Score", f"{score}/{total}")
-        with col2:
-            st.metric("Percentage", f"{percentage:.1f}%")
-        with col3:
-            status = "PASS" if percentage >= 70 else "NEEDS IMPROVEMENT"
-            color = "green" if percentage >= 70 else "red"
-            st.metric("Result", status)
-        
-        st.info("Note: Your PivotTable submissions (Questions 9 & 10) will be reviewed by admins separately.")
-        
-        # Certificate generation for passing users (MCQs only)
-        if percentage >= 70:
-            date = datetime.datetime.now().strftime("%Y-%m-%d")
-            cert_buffer = generate_certificate(st.session_state.user_info["name"], score, total, date)
-            st.download_button(
-                label="📜 Download Certificate (MCQs only)",
-                data=cert_buffer,
-                file_name=f"Excel_Practice_Certificate_{st.session_state.user_info['name']}.pdf",
-                mime="application/pdf"
-            )
-        
-        # Detailed results for MCQs
-        st.markdown("## 📊 Detailed Results (MCQs)")
-        results_data = []
-        for i, (q_id, correct_answer) in enumerate(correct_answers.items(), 1):
-            user_answer = st.session_state.user_answers.get(q_id, "Not answered")
-            is_correct = user_answer == correct_answer
-            user_answer_display = user_answer.upper() if user_answer != "Not answered" else user_answer
-            results_data.append({
-                "Question": i,
-                "Your Answer": user_answer_display,
-                "Correct Answer": correct_answer.upper(),
-                "Result": "✅ Correct" if is_correct else "❌ Incorrect"
-            })
-        
-        results_df = pd.DataFrame(results_data)
-        st.dataframe(results_df, use_container_width=True)
-        
-        if st.button("🔄 Take Test Again"):
-            st.session_state.user_answers = {}
-            st.session_state.user_info = {}
-            st.session_state.test_submitted = False
-            st.session_state.time_remaining = 30 * 60
-            st.session_state.timer_active = False
-            st.session_state.shuffled_questions = []
-            st.rerun()
-
-elif page == "👨‍💼 Admin Dashboard":
-    st.markdown('<h1 class="main-header">👨‍💼 Admin Dashboard</h1>', unsafe_allow_html=True)
-    
-    # Admin authentication
-    if 'admin_authenticated' not in st.session_state:
-        st.session_state.admin_authenticated = False
-    
-    if not st.session_state.admin_authenticated:
-        st.warning("🔐 Admin access required")
-        password = st.text_input("Enter admin password:", type="password")
-        if st.button("Login"):
-            if password == ADMIN_PASSWORD:
-                st.session_state.admin_authenticated = True
-                st.success("✅ Admin access granted!")
-                st.rerun()
-            else:
-                st.error("❌ Invalid password!")
-    else:
-        submissions = load_submissions()
+            screenshot_block("q10", "Upload a screenshot of your PivotTable for Question 10 (PNG/JPG, max 5 MB)", "Uploaded PivotTable for Question 10")
+            
+            # Optional workbook upload for automatic grading
+            st.markdown("**⚡ Instant grading (optional)**: upload the workbook containing your PivotTables and they will be "
+                        "checked automatically. Anything that can't be checked is reviewed by admins, so screenshots are "
+                        "not needed when you upload your workbook.")
+            workbook_block()
+            
+            # Submit button
+            col1, col2, col3 = st.columns([1, 2, 1])
+            with col2:
+                if st.button("🚀 Submit Test", type="primary", use_container_width=True):
+                    with st.spinner("Finishing screenshot uploads..."):
+                        upload_errors = collect_screenshot_uploads(timeout=UPLOAD_WAIT_TIMEOUT)
+                    # Validate user info
+                    if upload_errors:
+                        st.error("⚠️ " + "; ".join(upload_errors) + ". Please re-upload and try again.")
+                    elif not all(st.session_state.user_info.get(field) for field in ["name", "employee_id", "department", "email"]):
+                        st.error("⚠️ Please fill in all required information fields!")
+                    elif sum(1 for q_id in form_question_ids() if st.session_state.user_answers.get(q_id)) < len(form_question_ids()):
+                        st.error(f"⚠️ Please answer all multiple-choice questions! You have answered {sum(1 for q_id in form_question_ids() if st.session_state.user_answers.get(q_id))} out of {len(form_question_ids())} MCQs.")
+                    elif not (st.session_state.user_answers.get("pivot_workbook_url")
+                              or all(st.session_state.user_answers.get(f"{q_id}_screenshot_url") for q_id in PIVOT_QUESTIONS)):
+                        st.error("⚠️ Please upload screenshots for all PivotTable questions (9a, 9b, and 10), or your workbook!")
+                    elif submit_test():
+                        st.rerun()
         
-        if not submissions:
-            st.info("📝 No test submissions yet.")
         else:
-            # Summary statistics
-            total_submissions = len(submissions)
-            avg_score = sum(s['percentage'] for s in submissions) / total_submissions
-            pass_rate = sum(1 for s in submissions if s['percentage'] >= 70) / total_submissions * 100
+            # Show results
+            score, total = calculate_score(st.session_state.user_answers, form_question_ids())
+            percentage = (score / total) * 100
+            
+            if st.session_state.auto_submitted:
+                st.warning("⏰ Time's up! Your test was submitted automatically with the answers given before the deadline.")
+            st.success("🎉 Test Submitted Successfully!")
             
             col1, col2, col3 = st.columns(3)
             with col1:
-                st.metric("Total Submissions", total_submissions)
+                st.metric("MCQ Score", f"{score}/{total}")
             with col2:
-                st.metric("Average MCQ Score", f"{avg_score:.1f}%")
+                st.metric("Percentage", f"{percentage:.1f}%")
             with col3:
-                st.metric("Pass Rate (MCQs)", f"{pass_rate:.1f}%")
+                status = "PASS" if percentage >= 70 else "NEEDS IMPROVEMENT"
+                color = "green" if percentage >= 70 else "red"
+                st.metric("Result", status)
             
-            # Detailed Analytics for MCQs
-            question_accuracy, performance_over_time, dept_performance, question_details = create_detailed_analytics(submissions)
+            auto_grades = [st.session_state.user_answers.get(f"{q_id}_auto_grade") for q_id in PIVOT_QUESTIONS]
+            if any(auto_grades):
+                auto_correct = sum(1 for grade in auto_grades if grade == CORRECT)
+                st.info(f"Automatic PivotTable grading: {auto_correct}/{len(PIVOT_QUESTIONS)} correct. "
+                        + ("Anything not confirmed automatically will be reviewed by admins." if auto_correct < len(PIVOT_QUESTIONS) else ""))
+            else:
+                st.info("Note: Your PivotTable submissions (Questions 9 & 10) will be reviewed by admins separately.")
             
-            st.subheader("📈 Detailed Analytics (MCQs)")
+            # Background processing status
+            if st.session_state.get("submission_id"):
+                jobs = get_job_queue().group_status(st.session_state.submission_id)
+                job_labels = {
+                    "save_submission": "💾 Saving submission",
+                    "candidate_email": "📧 Results email",
+                    "admin_email": "📨 Admin notification"
+                }
+                status_icons = {"pending": "⏳", "running": "🔄", "done": "✅", "failed": "❌"}
+                with st.expander("📦 Submission Processing Status", expanded=any(j["status"] != "done" for j in jobs)):
+                    for job in jobs:
+                        line = f"{status_icons.get(job['status'], '')} {job_labels.get(job['kind'], job['kind'])}: {job['status']}"
+                        if job["error"] and job["status"] != "done":
+                            line += f" (attempt {job['attempts']}: {job['error']})"
+                        st.write(line)
+                    if st.button("🔄 Refresh Status"):
+                        st.rerun()
             
-            col1, col2 = st.columns(2)
-            with col1:
-                # Question Accuracy
-                fig_accuracy = px.bar(x=list(question_accuracy.keys()), y=list(question_accuracy.values()),
-                                    title="Question-wise Accuracy (%)",
-                                    labels={'x': 'Question', 'y': 'Accuracy %'})
-                st.plotly_chart(fig_accuracy, use_container_width=True)
-                
-                # Performance Over Time
-                fig_time = px.line(performance_over_time, x="timestamp", y="percentage",
-                                 title="Performance Over Time",
-                                 labels={'timestamp': 'Date', 'percentage': 'Average Score %'})
-                st.plotly_chart(fig_time, use_container_width=True)
+            # Certificate generation for passing users (MCQs only)
+            if percentage >= 70:
+                date = datetime.datetime.now().strftime("%Y-%m-%d")
+                cert_buffer = generate_certificate(st.session_state.user_info["name"], score, total, date)
+                st.download_button(
+                    label="📜 Download Certificate (MCQs only)",
+                    data=cert_buffer,
+                    file_name=f"Excel_Practice_Certificate_{st.session_state.user_info['name']}.pdf",
+                    mime="application/pdf"
+                )
             
-            with col2:
-                # Department Performance
-                fig_dept = px.bar(dept_performance, x="department", y="mean",
-                                title="Department-wise Performance",
-                                labels={'department': 'Department', 'mean': 'Average Score %'},
-                                text="count")
-                fig_dept.update_traces(textposition='auto')
-                st.plotly_chart(fig_dept, use_container_width=True)
+            # Detailed results for MCQs
+            st.markdown("## 📊 Detailed Results (MCQs)")
+            results_data = []
+            form_orders = dict(st.session_state.shuffled_questions)
+            for i, q_id in enumerate(form_question_ids(), 1):
+                question = get_question_bank()[q_id]
+                order = form_orders.get(q_id, list(range(len(question.options))))
+                correct_answer = correct_answers[q_id]
+                user_answer = st.session_state.user_answers.get(q_id, "Not answered")
+                is_correct = user_answer == correct_answer
+                # Letters as this candidate saw them on their form
+                user_answer_display = question.display_letter(order, user_answer).upper() if user_answer != "Not answered" else user_answer
+                results_data.append({
+                    "Question": i,
+                    "Your Answer": user_answer_display,
+                    "Correct Answer": question.display_letter(order, correct_answer).upper(),
+                    "Result": "✅ Correct" if is_correct else "❌ Incorrect"
+                })
             
-            # Question Details
-            st.subheader("🔍 Question Analysis (MCQs)")
-            for detail in question_details:
-                st.write(f"**{detail['Question'].upper()} Answer Distribution:**")
-                dist_df = pd.DataFrame.from_dict(detail["Answer Distribution"], orient="index", columns=["Count"])
-                st.dataframe(dist_df, use_container_width=True)
+            results_df = pd.DataFrame(results_data)
+            st.dataframe(results_df, use_container_width=True)
             
-            # Detailed submissions table with PivotTable screenshot links
-            st.subheader("📋 All Submissions")
+            if st.button("🔄 Take Test Again"):
+                st.session_state.user_answers = {}
+                st.session_state.user_info = {}
+                st.session_state.test_submitted = False
+                st.session_state.deadline = None
+                st.session_state.auto_submitted = False
+                st.session_state.shuffled_questions = []
+                st.session_state.form_seed = None
+                st.session_state.submission_id = None
+                st.session_state.pending_uploads = {}
+                st.session_state.workbook_grade = None
+                st.session_state.last_checkpoint = None
+                st.rerun()
+
+    elif page == "👨‍💼 Admin Dashboard":
+        st.markdown('<h1 class="main-header">👨‍💼 Admin Dashboard</h1>', unsafe_allow_html=True)
+        
+        # Admin authentication
+        if 'admin_authenticated' not in st.session_state:
+            st.session_state.admin_authenticated = False
+        
+        if not st.session_state.admin_authenticated:
+            st.warning("🔐 Admin access required")
+            password = st.text_input("Enter admin password:", type="password")
+            if st.button("Login"):
+                if password == ADMIN_PASSWORD:
+                    st.session_state.admin_authenticated = True
+                    st.success("✅ Admin access granted!")
+                    st.rerun()
+                else:
+                    st.error("❌ Invalid password!")
+        else:
+            if st.button("🔄 Refresh Data"):
+                get_submissions_cache().invalidate(full=True)
             
-            display_data = []
-            for s in submissions:
-                row = {
-                    "Timestamp": s['timestamp'][:19].replace('T', ' '),
-                    "Name": s['user_info']['name'],
-                    "Employee ID": s['user_info']['employee_id'],
-                    "Department": s['user_info']['department'],
-                    "Email": s['user_info']['email'],
-                    "MCQ Score": f"{s['score']}/{s['total']}",
-                    "Percentage": f"{s['percentage']:.1f}%",
-                    "Status": "PASS" if s['percentage'] >= 70 else "FAIL",
-                    "Q9a Screenshot": "View",
-                    "Q9b Screenshot": "View",
-                    "Q10 Screenshot": "View"
-                }
-                display_data.append(row)
+            with st.expander("🛠️ System Status"):
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.write("**Background jobs**")
+                    st.write(get_job_queue().counts() or "No jobs yet")
+                    st.write(f"**Storage:** {get_storage().name}"
+                             + (" (mirrored to Google Sheets)" if STORAGE_BACKEND == "sqlite" and SHEETS_MIRROR else ""))
+                    if uses_sheet_spool():
+                        spool_stats = get_sheet_spool().stats()
+                        st.write("**Google Sheets spool**")
+                        st.metric("Rows waiting", spool_stats["pending"])
+                        st.metric("Rows appended", spool_stats["rows_flushed"],
+                                  help=f"in {spool_stats['append_calls']} append_rows calls; "
+                                       f"{spool_stats['duplicates_skipped']} replayed rows skipped")
+                        if spool_stats["last_error"]:
+                            st.caption(f"Last flush error: {spool_stats['last_error']}")
+                    st.write("**Dashboard aggregates**")
+                    st.caption(f"Last full rebuild: {get_aggregates().built_at() or 'never'}")
+                    if st.button("♻️ Rebuild aggregates", help="Recount every stored submission, e.g. after restoring storage"):
+                        try:
+                            counted = rebuild_aggregates()
+                        except Exception as e:
+                            st.error(f"Failed to rebuild aggregates: {str(e)}")
+                        else:
+                            st.success(f"✅ Rebuilt from {counted} submissions.")
+                with col2:
+                    upload_stats = get_upload_cache().stats()
+                    st.write("**Screenshot uploads**")
+                    st.metric("Uploaded to Drive", upload_stats["uploads"])
+                    st.metric("Re-uploads avoided", upload_stats["avoided"],
+                              help=f"{upload_stats['bytes_avoided'] / 1024 / 1024:.1f} MB not re-sent")
+                    blob_stats = get_blob_store().stats()
+                    st.metric("Files waiting on disk", blob_stats["blobs"],
+                              help=f"{blob_stats['bytes'] / 1024 / 1024:.1f} MB now; "
+                                   f"{blob_stats['spilled']} files ({blob_stats['bytes_spilled'] / 1024 / 1024:.1f} MB) "
+                                   "spilled since start-up")
+                    checkpoint_stats = get_checkpoints().stats()
+                    st.write("**Autosaved attempts**")
+                    st.metric("Attempts saved", checkpoint_stats["saved"],
+                              help=f"{checkpoint_stats['pending']} waiting to be written; {checkpoint_stats['saves']} "
+                                   f"autosaves coalesced into {checkpoint_stats['writes']} rows over "
+                                   f"{checkpoint_stats['flushes']} writes")
+                    if checkpoint_stats["last_error"]:
+                        st.caption(f"Last autosave error: {checkpoint_stats['last_error']}")
+                    memory_stats = get_session_memory().stats()
+                    st.write("**Session memory**")
+                    st.metric("Process RSS", f"{resident_bytes() / 1024 / 1024:.0f} MB")
+                    st.metric("Session state (median / largest)",
+                              f"{memory_stats['p50_bytes'] / 1024:.0f} / {memory_stats['max_bytes'] / 1024:.0f} KB",
+                              help=f"across {memory_stats['sessions']} live sessions; "
+                                   f"budget {SESSION_MEMORY_BUDGET_MB:g} MB each")
+                    st.metric("Sessions over budget", memory_stats["over_budget"],
+                              help=f"{memory_stats['evictions']} evictions freed "
+                                   f"{memory_stats['bytes_evicted'] / 1024 / 1024:.1f} MB; most often largest: "
+                                   f"{memory_stats['largest_key'] or 'n/a'}")
+                st.write("**Google API quotas** (per bucket; waits are time queued for a rate-limit token)")
+                st.dataframe(pd.DataFrame(get_api_client().stats()).T, use_container_width=True)
             
-            submissions_df = pd.DataFrame(display_data)
+            with st.expander("⏱️ Performance"):
+                summary = tracer.summary()
+                if not summary:
+                    st.info("No spans recorded yet.")
+                else:
+                    st.caption("Percentiles and error rates cover the most recent spans in this process; "
+                               "totals count everything since it started.")
+                    st.dataframe(pd.DataFrame(summary).rename(columns={
+                        "span": "Span", "recent": "Recent", "p50_ms": "p50 (ms)", "p95_ms": "p95 (ms)",
+                        "max_ms": "Max (ms)", "recent_error_rate": "Error rate", "total": "Total",
+                        "total_errors": "Total errors", "mean_ms": "Mean (ms)"
+                    }), use_container_width=True, hide_index=True)
+                    
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        span_name = st.selectbox("Latency histogram", [row["span"] for row in summary], key="perf_span")
+                        buckets, counts = zip(*tracer.histogram(span_name))
+                        fig_histogram = px.bar(x=list(buckets), y=list(counts), title=f"{span_name} (since start-up)",
+                                               labels={'x': 'Duration', 'y': 'Spans'})
+                        st.plotly_chart(fig_histogram, use_container_width=True)
+                    with col2:
+                        # Slowest recent reruns, with the spans that ran inside each
+                        reruns = sorted(tracer.spans(name="rerun"), key=lambda s: s.duration, reverse=True)[:10]
+                        if reruns:
+                            rerun = st.selectbox(
+                                "Slowest recent reruns", reruns, key="perf_rerun",
+                                format_func=lambda s: f"{s.duration * 1000:.0f} ms · {s.attrs.get('page', '')} · "
+                                                      f"{datetime.datetime.fromtimestamp(s.started).strftime('%H:%M:%S')}")
+                            st.dataframe(pd.DataFrame([
+                                {"Span": s.name, "ms": round(s.duration * 1000, 1), "Error": s.error or ""}
+                                for s in tracer.spans(trace=rerun.trace) if s is not rerun
+                            ], columns=["Span", "ms", "Error"]), use_container_width=True, hide_index=True)
+                    
+                    errors = [s for s in tracer.spans() if s.error][-20:]
+                    if errors:
+                        st.write("**Recent errors**")
+                        st.dataframe(pd.DataFrame([
+                            {"Time": datetime.datetime.fromtimestamp(s.started).strftime("%Y-%m-%d %H:%M:%S"),
+                             "Span": s.name, "ms": round(s.duration * 1000, 1), "Error": s.error}
+                            for s in reversed(errors)
+                        ]), use_container_width=True, hide_index=True)
+                
+                if st.button("🔬 Profile next rerun"):
+                    st.session_state.profile_next_rerun = True
+                    st.rerun()
+                if st.session_state.get("rerun_profile"):
+                    profiled_at, profile_text = st.session_state.rerun_profile
+                    st.caption(f"cProfile of the rerun at {profiled_at}, by cumulative time")
+                    st.code(profile_text, language=None)
+            submissions = load_submissions()
+            if submissions and get_aggregates().built_at() is None:
+                # First run with existing submissions: count them all once
+                try:
+                    rebuild_aggregates()
+                except Exception as e:
+                    st.error(f"Failed to build dashboard aggregates: {str(e)}")
+            aggregates = get_aggregates().snapshot()
             
-            # Display the table with clickable buttons to view screenshots
-            for idx, row in submissions_df.iterrows():
-                col1, col2, col3, col4, col5, col6, col7, col8, col9, col10, col11 = st.columns([2, 2, 2, 2, 2, 1, 1, 1, 1, 1, 1])
+            if not aggregates["submissions"]:
+                st.info("📝 No test submissions yet.")
+            else:
+                # Summary statistics, read from the aggregates rather than recomputed
+                total_submissions = aggregates["submissions"]
+                avg_score = aggregates["percentage_sum"] / total_submissions
+                pass_rate = aggregates["passed"] / total_submissions * 100
+                
+                col1, col2, col3 = st.columns(3)
                 with col1:
-                    st.write(row["Timestamp"])
+                    st.metric("Total Submissions", total_submissions)
                 with col2:
-                    st.write(row["Name"])
+                    st.metric("Average MCQ Score", f"{avg_score:.1f}%")
                 with col3:
-                    st.write(row["Employee ID"])
+                    st.metric("Pass Rate (MCQs)", f"{pass_rate:.1f}%")
+                
+                # Detailed Analytics for MCQs
+                question_accuracy, performance_over_time, dept_performance, question_details = create_detailed_analytics(aggregates)
+                
+                st.subheader("📈 Detailed Analytics (MCQs)")
+                
+                col1, col2 = st.columns(2)
+                with col1:
+                    # Question Accuracy
+                    fig_accuracy = px.bar(x=list(question_accuracy.keys()), y=list(question_accuracy.values()),
+                                        title="Question-wise Accuracy (%)",
+                                        labels={'x': 'Question', 'y': 'Accuracy %'})
+                    st.plotly_chart(fig_accuracy, use_container_width=True)
+                    
+                    # Performance Over Time (WebGL, downsampled on the server for long histories)
+                    daily = performance_over_time.iloc[downsample_extremes(
+                        performance_over_time.index.to_numpy(), performance_over_time["percentage"].to_numpy(), CHART_MAX_POINTS)]
+                    fig_time = go.Figure(go.Scattergl(x=daily["timestamp"], y=daily["percentage"], mode="lines+markers"))
+                    fig_time.update_layout(title="Performance Over Time", xaxis_title="Date", yaxis_title="Average Score %")
+                    st.plotly_chart(fig_time, use_container_width=True)
+                
+                with col2:
+                    # Department Performance
+                    fig_dept = px.bar(dept_performance, x="department", y="mean",
+                                    title="Department-wise Performance",
+                                    labels={'department': 'Department', 'mean': 'Average Score %'},
+                                    text="count")
+                    fig_dept.update_traces(textposition='auto')
+                    st.plotly_chart(fig_dept, use_container_width=True)
+                
+                # Question Details
+                st.subheader("🔍 Question Analysis (MCQs)")
+                for detail in question_details:
+                    st.write(f"**{detail['Question'].upper()} Answer Distribution:**")
+                    dist_df = pd.DataFrame.from_dict(detail["Answer Distribution"], orient="index", columns=["Count"])
+                    st.dataframe(dist_df, use_container_width=True)
+                
+                # Item analysis over every stored answer, cached per data version and question bank
+                if submissions:
+                    st.subheader("🧪 Item Analysis (MCQs)")
+                    analysis = item_statistics(get_submissions_cache().version, get_question_bank().version, submissions)
+                    items = analysis["items"]
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric("KR-20 Reliability", f"{analysis['kr20']:.2f}" if analysis["kr20"] is not None else "n/a",
+                                  help="Internal consistency of the MCQ section; 0.7 or above is usually considered acceptable")
+                    with col2:
+                        st.metric("Items to Review", int((items["review"] != "").sum()))
+                    with col3:
+                        st.metric("Submissions Analysed", analysis["submissions"])
+                    
+                    ratio = st.column_config.NumberColumn(format="%.2f")
+                    st.dataframe(items.rename(columns={
+                        "question": "Question", "difficulty": "Difficulty (p)", "discrimination": "Discrimination (D)",
+                        "point_biserial": "Point-biserial", "omitted": "Omitted", "review": "Review"
+                    }), use_container_width=True, hide_index=True, column_config={
+                        "Difficulty (p)": ratio, "Discrimination (D)": ratio, "Point-biserial": ratio, "Omitted": ratio
+                    })
+                    
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        fig_items = go.Figure(go.Scattergl(x=items["difficulty"], y=items["discrimination"],
+                                                           mode="markers+text", text=items["question"].str.upper(),
+                                                           textposition="top center"))
+                        fig_items.add_hline(y=WEAK_DISCRIMINATION, line_dash="dot")
+                        fig_items.update_layout(title="Item Map", xaxis_title="Difficulty (share correct)",
+                                                yaxis_title="Discrimination (upper − lower 27%)")
+                        st.plotly_chart(fig_items, use_container_width=True)
+                    with col2:
+                        # Individual scores are sampled and the rolling mean downsampled before they leave the server
+                        points, trend = score_trend_points(get_submissions_cache().version, submissions)
+                        fig_scores = go.Figure([
+                            go.Scattergl(x=points["timestamp"], y=points["percentage"], mode="markers", name="Submission",
+                                         marker={"size": 4, "opacity": 0.3}),
+                            go.Scattergl(x=trend["timestamp"], y=trend["rolling"], mode="lines", name="Rolling mean")
+                        ])
+                        fig_scores.update_layout(title="Scores Over Time", xaxis_title="Submitted", yaxis_title="Score %")
+                        st.plotly_chart(fig_scores, use_container_width=True)
+                    
+                    distractor_question = st.selectbox("Distractor analysis for", list(items["question"]),
+                                                       format_func=str.upper, key="distractor_question")
+                    distractors = analysis["distractors"]
+                    st.dataframe(distractors[distractors["question"] == distractor_question].drop(columns="question").rename(columns={
+                        "option": "Option", "is_key": "Key", "chosen": "Chosen", "upper": "Upper 27%",
+                        "lower": "Lower 27%", "discrimination": "Discrimination", "functional": "Functional distractor"
+                    }), use_container_width=True, hide_index=True, column_config={
+                        "Chosen": ratio, "Upper 27%": ratio, "Lower 27%": ratio, "Discrimination": ratio
+                    })
+                
+                # Detailed submissions table with PivotTable screenshot links.
+                # Filtering and sorting run on the cached table; only one page is sent to the browser.
+                st.subheader("📋 All Submissions")
+                table = submissions_table(get_submissions_cache().version, submissions)
+                
+                def reset_grid_page():
+                    st.session_state.grid_page = 1
+                
+                col1, col2, col3, col4 = st.columns([3, 3, 2, 3])
+                with col1:
+                    search = st.text_input("🔎 Search name or employee ID", key="grid_search", on_change=reset_grid_page)
+                with col2:
+                    departments = st.multiselect("🏢 Department", sorted(table["Department"].unique()),
+                                                 key="grid_departments", on_change=reset_grid_page)
+                with col3:
+                    status = st.selectbox("Status", ["All", "PASS", "FAIL"], key="grid_status", on_change=reset_grid_page)
                 with col4:
-                    st.write(row["Department"])
-                with col5:
-                    st.write(row["Email"])
-                with col6:
-                    st.write(row["MCQ Score"])
-                with col7:
-                    st.write(row["Percentage"])
-                with col8:
-                    st.write(row["Status"])
-                with col9:
-                    if st.button("View Q9a", key=f"q9a_{idx}"):
-                        url = submissions[idx]["answers"].get("q9a_screenshot_url")
-                        if url:
-                            st.markdown(f"[View Q9a PivotTable]({url})")
-                        else:
-                            st.warning("No screenshot uploaded.")
-                with col10:
-                    if st.button("View Q9b", key=f"q9b_{idx}"):
-                        url = submissions[idx]["answers"].get("q9b_screenshot_url")
-                        if url:
-                            st.markdown(f"[View Q9b PivotTable]({url})")
-                        else:
-                            st.warning("No screenshot uploaded.")
-                with col11:
-                    if st.button("View Q10", key=f"q10_{idx}"):
-                        url = submissions[idx]["answers"].get("q10_screenshot_url")
-                        if url:
-                            st.markdown(f"[View Q10 PivotTable]({url})")
-                        else:
-                            st.warning("No screenshot uploaded.")
-            
-            # Download submissions as Excel
-            if st.button("📥 Download All Submissions (Excel)"):
-                excel_data = []
-                for s in submissions:
-                    row = {
-                        "Timestamp": s['timestamp'][:19].replace('T', ' '),
-                        "Name": s['user_info']['name'],
-                        "Employee ID": s['user_info']['employee_id'],
-                        "Department": s['user_info']['department'],
-                        "Email": s['user_info']['email'],
-                        "MCQ Score": f"{s['score']}/{s['total']}",
-                        "Percentage": f"{s['percentage']:.1f}%",
-                        "Status": "PASS" if s['percentage'] >= 70 else "FAIL",
-                        "Q1": s['answers'].get("q1", ""),
-                        "Q2": s['answers'].get("q2", ""),
-                        "Q3": s['answers'].get("q3", ""),
-                        "Q4": s['answers'].get("q4", ""),
-                        "Q5": s['answers'].get("q5", ""),
-                        "Q6": s['answers'].get("q6", ""),
-                        "Q7": s['answers'].get("q7", ""),
-                        "Q8": s['answers'].get("q8", ""),
-                        "Q9a Screenshot URL": s['answers'].get("q9a_screenshot_url", ""),
-                        "Q9b Screenshot URL": s['answers'].get("q9b_screenshot_url", ""),
-                        "Q10 Screenshot URL": s['answers'].get("q10_screenshot_url", "")
-                    }
-                    excel_data.append(row)
+                    sort_col, sort_dir = st.columns([3, 2])
+                    with sort_col:
+                        sort_by = st.selectbox("Sort by", ["Timestamp", "Name", "Employee ID", "Department", "Percentage", "Status"],
+                                               key="grid_sort_by")
+                    with sort_dir:
+                        descending = st.selectbox("Order", ["Desc", "Asc"], key="grid_sort_order") == "Desc"
                 
-                df = pd.DataFrame(excel_data)
-                excel_buffer = io.BytesIO()
-                df.to_excel(excel_buffer, index=False, engine='openpyxl')
-                excel_buffer.seek(0)
-                st.download_button(
-                    label="Download Submissions as Excel",
-                    data=excel_buffer,
-                    file_name=f"excel_test_submissions_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                if STORAGE_BACKEND == "sqlite" and (search or departments or status != "All"):
+                    # Let SQLite's indexes pick the matching rows instead of scanning every submission
+                    with tracer.span("grid_find"):
+                        filtered = build_submissions_table(get_storage().find(
+                            search=search or None, departments=departments or None,
+                            status=None if status == "All" else status))
+                else:
+                    filtered = filter_submissions_table(table, search, departments, status)
+                filtered = filtered.sort_values(sort_by, ascending=not descending, kind="stable")
+                
+                col1, col2, col3 = st.columns([2, 2, 6])
+                with col1:
+                    page_size = st.selectbox("Rows per page", [25, 50, 100], key="grid_page_size", on_change=reset_grid_page)
+                page_count = max(1, -(-len(filtered) // page_size))
+                if st.session_state.get("grid_page", 1) > page_count:
+                    st.session_state.grid_page = page_count
+                with col2:
+                    page_number = st.number_input("Page", min_value=1, max_value=page_count, step=1, key="grid_page")
+                first_row = (page_number - 1) * page_size
+                page_rows = filtered.iloc[first_row:first_row + page_size]
+                
+                st.dataframe(
+                    page_rows,
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config={
+                        "Percentage": st.column_config.NumberColumn("Percentage", format="%.1f%%"),
+                        "Q9a Screenshot": st.column_config.LinkColumn("Q9a Screenshot", display_text="View Q9a"),
+                        "Q9b Screenshot": st.column_config.LinkColumn("Q9b Screenshot", display_text="View Q9b"),
+                        "Q10 Screenshot": st.column_config.LinkColumn("Q10 Screenshot", display_text="View Q10"),
+                        "Q9a Preview": st.column_config.ImageColumn("Q9a Preview"),
+                        "Q9b Preview": st.column_config.ImageColumn("Q9b Preview"),
+                        "Q10 Preview": st.column_config.ImageColumn("Q10 Preview"),
+                        "Workbook": st.column_config.LinkColumn("Workbook", display_text="Open")
+                    }
                 )
-        
-        if st.button("🚪 Admin Logout"):
-            st.session_state.admin_authenticated = False
-            st.rerun()
+                with col3:
+                    if len(filtered):
+                        st.caption(f"Page {page_number} of {page_count} · showing {first_row + 1}–{first_row + len(page_rows)} of {len(filtered)} submissions"
+                                   + (f" (filtered from {len(table)})" if len(filtered) != len(table) else ""))
+                    else:
+                        st.caption("No submissions match the current filters.")
+                
+                # Download submissions (cached per data version, generated in bounded memory)
+                col1, col2 = st.columns([1, 3])
+                with col1:
+                    export_format = st.selectbox("Export format", export.available_formats(),
+                                                 format_func=lambda f: export.FORMATS[f][0])
+                if st.button(f"📥 Download All Submissions ({export.FORMATS[export_format][0]})"):
+                    try:
+                        with tracer.span("export_submissions", format=export_format):
+                            export_path = get_export_cache().get(get_submissions_cache().version, export_format, submissions)
+                        with open(export_path, "rb") as f:
+                            export_bytes = f.read()
+                    except Exception as e:
+                        st.error(f"Failed to export submissions: {str(e)}")
+                    else:
+                        st.download_button(
+                            label=f"Download Submissions as {export.FORMATS[export_format][0]}",
+                            data=export_bytes,
+                            file_name=f"excel_test_submissions_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_format}",
+                            mime=export.FORMATS[export_format][1]
+                        )
+                
+                # Re-grade everything after an answer key fix in the question bank
+                with st.expander("🧮 Re-grade Submissions"):
+                    st.caption("Re-scores every stored submission against the current answer key "
+                               f"(question bank {get_question_bank().version}) and writes changed scores back.")
+                    unstored = get_storage().unstored_answers(list(correct_answers))
+                    if unstored:
+                        # Their answers were never stored, so re-scoring would mark them all wrong
+                        st.session_state.pop("regrade_preview_for", None)
+                        st.error(f"Can't re-grade: the submissions sheet has no column for "
+                                 f"{', '.join(q_id.upper() for q_id in unstored)}, so those answers were never "
+                                 "stored. Use the SQLite backend to re-grade this question bank.")
+                    elif st.button("Preview re-grade"):
+                        st.session_state.regrade_preview_for = (get_submissions_cache().version, get_question_bank().version)
+                    preview_for = st.session_state.get("regrade_preview_for")
+                    if preview_for is not None:
+                        # Same data and answer key give the same preview, so it's fine if the cache recomputes it
+                        preview = regrade_preview(*preview_for, submissions)
+                        preview_version = preview_for[0]
+                        changed = preview[preview["changed"]]
+                        st.write(f"**{len(changed)}** of {len(preview)} scores change; "
+                                 f"**{int(preview['status_changed'].sum())}** candidates change PASS/FAIL status.")
+                        if len(changed):
+                            audit_columns = ["timestamp", "name", "employee_id", "old_score", "new_score",
+                                             "total", "old_status", "new_status", "status_changed"]
+                            st.dataframe(changed[audit_columns], use_container_width=True, hide_index=True)
+                            st.download_button("📥 Download audit diff (CSV)", changed[audit_columns].to_csv(index=False),
+                                               file_name="regrade_audit.csv", mime="text/csv")
+                            if st.button("✅ Apply re-grade", type="primary"):
+                                if preview_version != get_submissions_cache().version:
+                                    st.error("Submissions changed since the preview. Please preview again.")
+                                else:
+                                    try:
+                                        updated = apply_regrade(preview)
+                                    except Exception as e:
+                                        st.error(f"Failed to apply re-grade: {str(e)}")
+                                    else:
+                                        del st.session_state.regrade_preview_for
+                                        st.success(f"✅ Updated {updated} submissions.")
+            
+            if st.button("🚪 Admin Logout"):
+                st.session_state.admin_authenticated = False
+                st.rerun()
+
+    # Footer
+    st.markdown("---")
+    st.markdown(
+        "<div style='text-align: center; color: #666;'>"
+        "📊 Excel Practice Test | Learning & Development Department<br>"
+        "Together we learn, together we soar 🚀"
+        "</div>", 
+        unsafe_allow_html=True
+    )
+
+finally:
+    # Runs even when the page ends in st.rerun() or st.stop(). Fragment reruns
+    # never get here, so these are full-page reruns only.
+    with tracer.span("session_memory"):
+        get_session_memory().measure(st.session_state.session_key, st.session_state, evictable=EVICTABLE_STATE)
+    tracer.record("rerun", time.perf_counter() - rerun_started, page=page)
+    tracer.begin_trace(None)
+    if rerun_profiler is not None:
+        rerun_profiler.disable()
+        profile_output = io.StringIO()
+        pstats.Stats(rerun_profiler, stream=profile_output).sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+        st.session_state.rerun_profile = (datetime.datetime.now().strftime("%H:%M:%S"), profile_output.getvalue())
 
-# Footer
-st.markdown("---")
-st.markdown(
-    "<div style='text-align: center; color: #666;'>"
-    "📊 Excel Practice Test | Learning & Development Department<br>"
-    "Together we learn, together we soar 🚀"
-    "</div>", 
-    unsafe_allow_html=True
-)
\ No newline at end of file
+if rerun_profiler is not None:
+    st.rerun()  # show the profile in the panel
\ No newline at end of file
@@ -0,0 +1,119 @@
+"""Benchmark the vectorised admin analytics against the original row-by-row version.
+
+Also times the incrementally maintained aggregates: the per-submission
+`add`, a full rebuild, and reading the dashboard off a snapshot (which
+should stay flat as --rows grows). Generates synthetic submissions and
+prints JSON timings:
+
+    python benchmarks/bench_analytics.py --rows 100000
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aggregates import AggregateStore  # noqa: E402
+from analytics import aggregate_analytics, detailed_analytics  # noqa: E402
+from question_bank import Question, QuestionBank  # noqa: E402
+
+CORRECT_ANSWERS = {"q1": "a", "q2": "b", "q3": "b", "q4": "a", "q5": "b", "q6": "b", "q7": "a", "q8": "a"}
+DEPARTMENTS = ["TSG & IT Hardware", "Customer Service Division", "Accounts", "Sales", "HR", "Other"]
+
+
+def synthetic_submissions(rows, seed=0):
+    rng = random.Random(seed)
+    start = datetime.datetime(2025, 1, 1)
+    submissions = []
+    for i in range(rows):
+        answers = {q: rng.choice("abcd") for q in CORRECT_ANSWERS if rng.random() > 0.02}
+        score = sum(answers.get(q) == a for q, a in CORRECT_ANSWERS.items())
+        submissions.append({
+            "timestamp": (start + datetime.timedelta(minutes=rng.randrange(60 * 24 * 90))).isoformat(),
+            "user_info": {"name": f"Candidate {i}", "employee_id": str(i),
+                          "department": rng.choice(DEPARTMENTS), "email": f"c{i}@example.com"},
+            "score": score,
+            "total": len(CORRECT_ANSWERS),
+            "percentage": score / len(CORRECT_ANSWERS) * 100,
+            "answers": answers,
+        })
+    return submissions
+
+
+def legacy_analytics(submissions, correct_answers):
+    """The original create_detailed_analytics, kept for comparison"""
+    df = pd.DataFrame([{
+        "timestamp": s["timestamp"],
+        "name": s["user_info"]["name"],
+        "department": s["user_info"]["department"],
+        "score": s["score"],
+        "total": s["total"],
+        "percentage": s["percentage"],
+        "answers": s["answers"]
+    } for s in submissions])
+    question_accuracy = {}
+    for q_id in correct_answers.keys():
+        correct_count = sum(1 for _, row in df.iterrows() if row["answers"].get(q_id) == correct_answers[q_id])
+        question_accuracy[q_id] = correct_count / len(df) * 100
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    performance_over_time = df.groupby(df["timestamp"].dt.date)["percentage"].mean().reset_index()
+    dept_performance = df.groupby("department")["percentage"].agg(["mean", "count"]).reset_index()
+    question_details = []
+    for q_id in correct_answers.keys():
+        answers = df["answers"].apply(lambda x: x.get(q_id, "Not answered")).value_counts()
+        question_details.append({"Question": q_id, "Answer Distribution": answers.to_dict()})
+    return question_accuracy, performance_over_time, dept_performance, question_details
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--skip-legacy", action="store_true", help="only time the vectorised version")
+    args = parser.parse_args()
+
+    submissions = synthetic_submissions(args.rows)
+    vectorised_s, (accuracy, *_) = timed(detailed_analytics, submissions, CORRECT_ANSWERS)
+    report = {"rows": args.rows, "vectorised_s": round(vectorised_s, 3)}
+
+    if not args.skip_legacy:
+        legacy_s, (legacy_accuracy, *_) = timed(legacy_analytics, submissions, CORRECT_ANSWERS)
+        assert all(abs(accuracy[q] - legacy_accuracy[q]) < 1e-9 for q in CORRECT_ANSWERS)
+        report["legacy_s"] = round(legacy_s, 3)
+        report["speedup"] = round(legacy_s / vectorised_s, 1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = AggregateStore(os.path.join(tmp, "aggregates.db"))
+        bank = QuestionBank([Question(q_id, q_id, ["A", "B", "C", "D"], answer) for q_id, answer in CORRECT_ANSWERS.items()])
+        rebuild_s, _ = timed(store.rebuild, submissions, bank, "bench")
+        extra = synthetic_submissions(200, seed=1)
+        for i, submission in enumerate(extra):
+            submission["submission_id"] = f"bench-{i}"
+        add_s, _ = timed(lambda: [store.add(s, bank) for s in extra])
+        read_s, (aggregate_accuracy, *_) = timed(lambda: aggregate_analytics(store.snapshot(), CORRECT_ANSWERS))
+        store.close()
+    expected, *_ = detailed_analytics(submissions + extra, CORRECT_ANSWERS)
+    assert all(abs(aggregate_accuracy[q] - expected[q]) < 1e-9 for q in CORRECT_ANSWERS)
+    report["aggregates"] = {
+        "rebuild_s": round(rebuild_s, 3),
+        "add_ms": round(add_s / len(extra) * 1000, 3),
+        "dashboard_read_ms": round(read_s * 1000, 3)
+    }
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
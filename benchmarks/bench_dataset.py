@@ -0,0 +1,52 @@
+"""Measure the per-rerun cost of the Section B dataset download.
+
+Before: every Take Test rerun built a DataFrame and serialised it with
+`to_excel`. After: the bytes are built once per dataset version and each
+rerun only looks them up. Prints JSON:
+
+    python benchmarks/bench_dataset.py --reruns 200
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dataset import DATASET_VERSION, build_dataset_artifacts  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reruns", type=int, default=200)
+    args = parser.parse_args()
+
+    rebuild = []
+    for _ in range(args.reruns):
+        start = time.perf_counter()
+        build_dataset_artifacts()
+        rebuild.append(time.perf_counter() - start)
+
+    cache = {}
+    cached = []
+    for _ in range(args.reruns):
+        start = time.perf_counter()
+        if DATASET_VERSION not in cache:
+            cache[DATASET_VERSION] = build_dataset_artifacts()
+        cache[DATASET_VERSION]["xlsx"]
+        cached.append(time.perf_counter() - start)
+
+    per_rerun_saved = statistics.median(rebuild) - statistics.median(cached[1:])
+    print(json.dumps({
+        "reruns": args.reruns,
+        "rebuild_median_ms": round(statistics.median(rebuild) * 1000, 3),
+        "cached_first_ms": round(cached[0] * 1000, 3),
+        "cached_median_ms": round(statistics.median(cached[1:]) * 1000, 4),
+        "saved_per_rerun_ms": round(per_rerun_saved * 1000, 3),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Benchmark screenshot uploads against the fake Drive server.
+
+Compares the original path (serial, non-resumable `files.create` followed by
+a separate `permissions.create` per file) with DriveUploader (concurrent
+resumable uploads, one batched permission call per screenshot). Prints JSON:
+
+    python benchmarks/bench_drive.py --candidates 20 --latency 0.05 --fail-every 7
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_client import APIClient  # noqa: E402
+from drive_uploads import DriveUploader  # noqa: E402
+from fake_drive import FakeDrive, fake_drive_service  # noqa: E402
+
+FOLDER_ID = "bench-folder"
+
+
+def legacy_upload(service, data, filename):
+    """The original upload_to_drive"""
+    from googleapiclient.http import MediaIoBaseUpload
+
+    media = MediaIoBaseUpload(io.BytesIO(data), mimetype="image/jpeg")
+    file = service.files().create(body={"name": filename, "parents": [FOLDER_ID]},
+                                  media_body=media, fields="id").execute()
+    service.permissions().create(fileId=file["id"], body={"role": "reader", "type": "anyone"}).execute()
+    return f"https://drive.google.com/file/d/{file['id']}/view"
+
+
+def run_legacy(server, candidates, image, thumbnail):
+    service = fake_drive_service(server.base_url)
+    start = time.perf_counter()
+    for c in range(candidates):
+        for q_id in ("q9a", "q9b", "q10"):
+            legacy_upload(service, image, f"{c}_{q_id}.jpg")
+    return time.perf_counter() - start
+
+
+def run_engine(server, candidates, image, thumbnail, workers, chunk_size):
+    api = APIClient({"drive": 100000}, retry_delay=0.01)
+    uploader = DriveUploader(lambda: fake_drive_service(server.base_url), api, workers=workers,
+                             chunk_size=chunk_size)
+    start = time.perf_counter()
+    futures = [
+        uploader.submit(uploader.upload_files, [
+            (image, f"{c}_{q_id}.webp", "image/webp"),
+            (thumbnail, f"{c}_{q_id}_thumb.webp", "image/webp"),
+        ], FOLDER_ID)
+        for c in range(candidates) for q_id in ("q9a", "q9b", "q10")
+    ]
+    for future in futures:
+        future.result()
+    return time.perf_counter() - start, api.stats()["drive"]["retries"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--image-kb", type=int, default=600)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake server delay per response (s)")
+    parser.add_argument("--fail-every", type=int, default=0, help="503 every Nth chunk (engine run only)")
+    parser.add_argument("--workers", type=int, default=6)
+    parser.add_argument("--chunk-kb", type=int, default=256)
+    args = parser.parse_args()
+
+    image = os.urandom(args.image_kb * 1024)
+    thumbnail = os.urandom(16 * 1024)
+
+    legacy_server = FakeDrive(latency=args.latency).start()
+    legacy_s = run_legacy(legacy_server, args.candidates, image, thumbnail)
+    legacy_server.stop()
+
+    engine_server = FakeDrive(latency=args.latency, fail_every=args.fail_every).start()
+    engine_s, retries = run_engine(engine_server, args.candidates, image, thumbnail,
+                                   args.workers, args.chunk_kb * 1024)
+    engine_server.stop()
+
+    files = args.candidates * 3
+    print(json.dumps({
+        "screenshots": files,
+        "latency": args.latency,
+        "legacy": {"seconds": round(legacy_s, 3), "files_per_second": round(files / legacy_s, 1),
+                   "requests": legacy_server.counts},
+        "engine": {"seconds": round(engine_s, 3), "files_per_second": round(files / engine_s, 1),
+                   "retries": retries, "requests": engine_server.counts},
+        "speedup": round(legacy_s / engine_s, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Per-interaction cost of the Take Test page: whole-script rerun vs. one fragment.
+
+AppTest always re-executes the whole script, so this measures what every
+radio click used to cost (wall time, CPU time and the serialized size of
+every element sent back) and compares the payload with the elements a
+single MCQ fragment re-sends now. Prints JSON:
+
+    python benchmarks/bench_fragments.py --clicks 20
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SECRETS = {
+    "admin_password": "bench",
+    "admin_emails": "admin@example.com",
+    "gcp_service_account": {},
+    "shuffle_questions": False,  # keep q1 as "Question 1"
+}
+
+
+def walk(node):
+    yield node
+    children = getattr(node, "children", None) or {}
+    for child in children.values():
+        yield from walk(child)
+
+
+def payload_bytes(nodes):
+    return sum(node.proto.ByteSize() for node in nodes if getattr(node, "proto", None) is not None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clicks", type=int, default=20)
+    args = parser.parse_args()
+
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=60)
+    for key, value in SECRETS.items():
+        at.secrets[key] = value
+    at.run()
+    at.sidebar.selectbox[0].select("📝 Take Test").run()
+
+    wall, cpu = [], []
+    for i in range(args.clicks):
+        radio = at.radio(key="q1")
+        radio.set_value("a" if i % 2 else "b")
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        radio.run()
+        wall.append(time.perf_counter() - start_wall)
+        cpu.append(time.process_time() - start_cpu)
+
+    nodes = list(walk(at._tree))
+    block = [at.radio(key="q1")] + [m for m in at.markdown if "Question 1:" in m.value]
+
+    full_bytes = payload_bytes(nodes)
+    fragment_bytes = payload_bytes(block)
+    print(json.dumps({
+        "clicks": args.clicks,
+        "full_rerun_wall_ms_p50": round(statistics.median(wall) * 1000, 2),
+        "full_rerun_cpu_ms_p50": round(statistics.median(cpu) * 1000, 2),
+        "full_rerun_elements": sum(1 for n in nodes if getattr(n, "proto", None) is not None),
+        "full_rerun_payload_bytes": full_bytes,
+        "mcq_fragment_elements": len(block),
+        "mcq_fragment_payload_bytes": fragment_bytes,
+        "payload_reduction": round(full_bytes / max(fragment_bytes, 1), 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
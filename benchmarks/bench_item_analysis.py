@@ -0,0 +1,80 @@
+"""Benchmark item analysis and chart downsampling over synthetic submissions.
+
+Candidates get a latent ability so items actually discriminate, which
+keeps KR-20 and the point-biserials in a realistic range. Prints JSON
+timings; the target is well under a second at 100k submissions:
+
+    python benchmarks/bench_item_analysis.py --rows 100000
+"""
+import argparse
+import datetime
+import json
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import score_trend  # noqa: E402
+from item_analysis import analyse_submissions  # noqa: E402
+from question_bank import QuestionBank  # noqa: E402
+
+QUESTIONS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "questions.json")
+
+
+def synthetic_submissions(bank, rows, seed=0):
+    """Rasch-style answers: P(correct) rises with ability minus a per-item difficulty"""
+    rng = random.Random(seed)
+    start = datetime.datetime(2025, 1, 1)
+    difficulty = {q_id: rng.uniform(-1.5, 1.5) for q_id in bank.answer_key}
+    submissions = []
+    for i in range(rows):
+        ability = rng.gauss(0, 1)
+        answers = {}
+        for q_id, key in bank.answer_key.items():
+            if rng.random() < 0.02:
+                continue
+            if rng.random() < 1 / (1 + math.exp(difficulty[q_id] - ability)):
+                answers[q_id] = key
+            else:
+                answers[q_id] = rng.choice([letter for letter in bank[q_id].letters if letter != key])
+        score = sum(answers.get(q_id) == key for q_id, key in bank.answer_key.items())
+        submissions.append({
+            "timestamp": (start + datetime.timedelta(minutes=rng.randrange(60 * 24 * 365))).isoformat(),
+            "user_info": {"department": "Sales"},
+            "percentage": score / len(bank) * 100,
+            "answers": answers,
+        })
+    return submissions
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--max-points", type=int, default=5000)
+    args = parser.parse_args()
+
+    bank = QuestionBank.load(QUESTIONS_PATH)
+    submissions = synthetic_submissions(bank, args.rows)
+    analysis_s, analysis = timed(analyse_submissions, submissions, bank)
+    trend_s, (points, trend) = timed(score_trend, submissions, args.max_points)
+    print(json.dumps({
+        "rows": args.rows,
+        "item_analysis_s": round(analysis_s, 3),
+        "score_trend_s": round(trend_s, 3),
+        "points_sent": len(points) + len(trend),
+        "kr20": round(analysis["kr20"], 3),
+        "point_biserial": {row.question: round(row.point_biserial, 3) for row in analysis["items"].itertuples()},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""Headless load test: concurrent candidates and admins driving app.py through AppTest.
+
+Every external service is replaced by a local stand-in with configurable
+latency: an in-memory gspread worksheet (fake_gspread), the SMTP sink
+(smtp_sink) and, for screenshot uploads, the fake Drive server
+(fake_drive). Each simulated candidate is its own AppTest session that
+opens the Take Test page, fills in its details, answers its form one radio
+click at a time and submits; admins log in and refresh the dashboard while
+that happens. All sessions share the process-wide caches, as they would on
+one Streamlit server. AppTest is not thread-safe, so the script reruns
+themselves take turns; sessions, uploads and the background workers
+(job queue, sheet spool, outbox) still overlap.
+
+AppTest can't drive `st.file_uploader`, so each candidate uploads its
+three screenshots straight through DriveUploader against the fake Drive
+server and the resulting URLs are seeded into its session.
+
+Writes machine-readable JSON (stdout and --output) with p50/p95/p99 rerun,
+submit and upload latency, memory per session and background drain stats:
+
+    python benchmarks/bench_load.py --candidates 20 --admins 2 --latency 0.1 --output load.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+
+import fake_gspread  # noqa: E402
+from smtp_sink import SMTPSink  # noqa: E402
+from storage import SHEET_HEADER  # noqa: E402
+
+ADMIN_PASSWORD = "bench"
+PIVOT_QUESTIONS = ("q9a", "q9b", "q10")
+SCREENSHOT_BYTES = 300 * 1024
+
+
+def percentiles(samples):
+    """p50/p95/p99, mean and count of a list of seconds, reported in milliseconds"""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pick(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    return {
+        "count": len(ordered),
+        "p50_ms": round(pick(50) * 1000, 2),
+        "p95_ms": round(pick(95) * 1000, 2),
+        "p99_ms": round(pick(99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+def rss_bytes():
+    """Current resident set size (Linux), falling back to the peak from getrusage"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def deep_size(value, seen=None):
+    """Approximate bytes held by a session state value, following containers"""
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(deep_size(v, seen) for v in value)
+    return size
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self.samples = {}
+        self.errors = []
+
+    def add(self, name, seconds):
+        with self._lock:
+            self.samples.setdefault(name, []).append(seconds)
+
+    def error(self, who, message):
+        with self._lock:
+            self.errors.append(f"{who}: {message}")
+
+    def timed(self, name, fn):
+        start = time.perf_counter()
+        result = fn()
+        self.add(name, time.perf_counter() - start)
+        return result
+
+    def rerun(self, name, at):
+        """Run one AppTest rerun; AppTest isn't thread-safe, so reruns take turns (the wait isn't timed)"""
+        with self._run_lock:
+            self.timed(name, at.run)
+
+
+def new_app(secrets):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=300)
+    for key, value in secrets.items():
+        at.secrets[key] = value
+    return at
+
+
+def by_label(widgets, label):
+    for widget in widgets:
+        if widget.label == label:
+            return widget
+    raise LookupError(f"no widget labelled {label!r} (found {[w.label for w in widgets]})")
+
+
+def check(at, who, recorder):
+    if at.exception:
+        recorder.error(who, at.exception[0].message)
+        return False
+    return True
+
+
+def upload_screenshots(uploader, folder_id, candidate, recorder):
+    urls = {}
+    for q_id in PIVOT_QUESTIONS:
+        data = os.urandom(SCREENSHOT_BYTES)
+        url, thumbnail = recorder.timed("upload", lambda: uploader.upload_files([
+            (data, f"{candidate}_{q_id}.webp", "image/webp"),
+            (data[:16 * 1024], f"{candidate}_{q_id}_thumb.webp", "image/webp"),
+        ], folder_id))
+        urls[f"{q_id}_screenshot_url"] = url
+        urls[f"{q_id}_thumbnail_url"] = thumbnail
+    return urls
+
+
+def run_candidate(index, secrets, bank, uploader, recorder, sessions):
+    who = f"candidate-{index}"
+    rng = random.Random(index)
+    at = new_app(secrets)
+    if uploader is not None:
+        at.session_state["user_answers"] = upload_screenshots(uploader, "bench-folder", who, recorder)
+    else:
+        at.session_state["user_answers"] = {f"{q}_screenshot_url": f"https://drive.google.com/file/d/{who}-{q}/view"
+                                            for q in PIVOT_QUESTIONS}
+
+    recorder.rerun("candidate_rerun", at)
+    at.sidebar.selectbox[0].select("📝 Take Test")
+    recorder.rerun("candidate_rerun", at)
+    if not check(at, who, recorder):
+        return
+
+    for label, value in (("👤 Full Name*", f"Bench Candidate {index}"), ("🆔 Employee ID*", f"B{index:05d}"),
+                         ("📧 Email*", f"candidate{index}@example.com")):
+        by_label(at.text_input, label).input(value)
+        recorder.rerun("candidate_rerun", at)
+    by_label(at.selectbox, "🏢 Department*").select(rng.choice(["Sales", "HR", "Accounts"]))
+    recorder.rerun("candidate_rerun", at)
+
+    for q_id, order in at.session_state["shuffled_questions"]:
+        letters, _ = bank[q_id].choices(order)
+        at.radio(key=q_id).set_value(bank.answer_key[q_id] if rng.random() < 0.7 else rng.choice(letters))
+        recorder.rerun("candidate_rerun", at)
+    if not check(at, who, recorder):
+        return
+
+    by_label(at.button, "🚀 Submit Test").click()
+    recorder.rerun("submit", at)
+    if check(at, who, recorder) and not at.session_state["test_submitted"]:
+        recorder.error(who, "submission was rejected: " + "; ".join(e.value for e in at.error))
+    sessions.append(at)
+
+
+def run_admin(index, secrets, rounds, recorder, sessions):
+    who = f"admin-{index}"
+    at = new_app(secrets)
+    recorder.rerun("admin_rerun", at)
+    at.sidebar.selectbox[0].select("👨‍💼 Admin Dashboard")
+    recorder.rerun("admin_rerun", at)
+    at.text_input[0].input(ADMIN_PASSWORD)
+    by_label(at.button, "Login").click()
+    recorder.rerun("admin_rerun", at)
+    for _ in range(rounds):
+        by_label(at.button, "🔄 Refresh Data").click()
+        recorder.rerun("admin_rerun", at)
+        if not check(at, who, recorder):
+            return
+        time.sleep(0.2)
+    sessions.append(at)
+
+
+def outstanding(path, query):
+    if not os.path.exists(path):
+        return 0
+    with sqlite3.connect(path) as conn:
+        return conn.execute(query).fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--candidates", type=int, default=10)
+    parser.add_argument("--admins", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=8, help="sessions driven at the same time")
+    parser.add_argument("--admin-rounds", type=int, default=5, help="dashboard refreshes per admin")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every fake service call")
+    parser.add_argument("--storage", choices=["sheets", "sqlite"], default="sheets")
+    parser.add_argument("--no-uploads", action="store_true", help="seed screenshot URLs without the fake Drive")
+    parser.add_argument("--drain-timeout", type=float, default=120)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_load_")
+    worksheet = fake_gspread.install(fake_gspread.FakeWorksheet(SHEET_HEADER, latency=args.latency))
+    sink = SMTPSink(latency=args.latency / 10).start()
+    secrets = {
+        "admin_password": ADMIN_PASSWORD,
+        "admin_emails": "admin@example.com",
+        "email_sender": "bench@example.com",
+        "smtp_server": "127.0.0.1",
+        "smtp_port": sink.port,
+        "smtp_use_tls": False,
+        "smtp_rate_limit": 0,
+        "GOOGLE_SHEET_URL": "https://docs.google.com/spreadsheets/d/bench",
+        "DRIVE_FOLDER_ID": "bench-folder",
+        "gcp_service_account": {},
+        "storage_backend": args.storage,
+        "sheet_flush_seconds": 0.5,
+    }
+    for key in ("job_queue_path", "outbox_path", "storage_path", "sheet_spool_path", "regrade_audit_path",
+                "aggregates_path", "checkpoints_path"):
+        secrets[key] = os.path.join(workdir, key.replace("_path", ".db"))
+    secrets["export_dir"] = workdir
+
+    uploader = drive = None
+    if not args.no_uploads:
+        from api_client import APIClient
+        from drive_uploads import DriveUploader
+        from fake_drive import FakeDrive, fake_drive_service
+        drive = FakeDrive(latency=args.latency).start()
+        uploader = DriveUploader(lambda: fake_drive_service(drive.base_url), APIClient({"drive": 100000}),
+                                 workers=args.concurrency)
+
+    from question_bank import QuestionBank
+    bank = QuestionBank.load(os.path.join(ROOT, "questions.json"))
+
+    recorder = Recorder()
+    candidate_sessions, admin_sessions = [], []
+    # Warm the process-wide caches once so the first session doesn't skew the percentiles
+    recorder.rerun("warm_up", new_app(secrets))
+    rss_before = rss_bytes()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        futures = {pool.submit(run_admin, i, secrets, args.admin_rounds, recorder, admin_sessions): f"admin-{i}"
+                   for i in range(args.admins)}
+        futures.update({pool.submit(run_candidate, i, secrets, bank, uploader, recorder, candidate_sessions): f"candidate-{i}"
+                        for i in range(args.candidates)})
+        for future, who in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                recorder.error(who, "".join(traceback.format_exception_only(e)).strip())
+    elapsed = time.perf_counter() - started
+    rss_after = rss_bytes()
+
+    # Wait for the job queue and the sheet spool to finish the submissions' background work
+    drain_started = time.perf_counter()
+    while time.perf_counter() - drain_started < args.drain_timeout:
+        pending = outstanding(secrets["job_queue_path"], "SELECT COUNT(*) FROM jobs WHERE status IN ('pending', 'running')")
+        pending += outstanding(secrets["sheet_spool_path"], "SELECT COUNT(*) FROM spool")
+        if not pending:
+            break
+        time.sleep(0.1)
+    drain_seconds = time.perf_counter() - drain_started
+
+    sessions = candidate_sessions + admin_sessions
+    state_sizes = [
+        deep_size({key: at.session_state[key] for key in ("user_answers", "user_info", "shuffled_questions",
+                                                         "pending_uploads", "session_key")
+                   if key in at.session_state})
+        for at in sessions
+    ]
+    report = {
+        "run": {
+            "at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "candidates": args.candidates,
+            "admins": args.admins,
+            "concurrency": args.concurrency,
+            "latency_s": args.latency,
+            "storage": args.storage,
+            "wall_seconds": round(elapsed, 2),
+        },
+        "latency": {
+            "candidate_rerun": percentiles(recorder.samples.get("candidate_rerun", [])),
+            "submit": percentiles(recorder.samples.get("submit", [])),
+            "admin_rerun": percentiles(recorder.samples.get("admin_rerun", [])),
+            "screenshot_upload": percentiles(recorder.samples.get("upload", [])),
+        },
+        "memory": {
+            "rss_mb_before": round(rss_before / 2 ** 20, 1),
+            "rss_mb_after": round(rss_after / 2 ** 20, 1),
+            "rss_kb_per_session": round((rss_after - rss_before) / max(1, len(sessions)) / 1024, 1),
+            "session_state_kb_p50": round(statistics.median(state_sizes) / 1024, 1) if state_sizes else None,
+        },
+        "background": {
+            "drain_seconds": round(drain_seconds, 2),
+            "rows_in_sheet": len(worksheet.rows) - 1,
+            "sheet_calls": dict(worksheet.calls),
+            "emails_sent": sink.messages,
+            "smtp_connections": sink.connections,
+            "drive_requests": dict(drive.counts) if drive else {},
+        },
+        "errors": recorder.errors,
+    }
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    sink.stop()
+    if drive:
+        drive.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Benchmark the notification outbox against a local SMTP sink.
+
+Compares the old one-connection-per-message `send_email` with the pooled
+outbox, and counts the admin mails saved by digest mode. Prints JSON.
+
+    python benchmarks/bench_outbox.py --submissions 50 --admins 2 --latency 0.02
+"""
+import argparse
+import json
+import os
+import smtplib
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from outbox import Outbox, SMTPPool  # noqa: E402
+from smtp_sink import SMTPSink  # noqa: E402
+
+SENDER = "bench@example.com"
+
+
+def send_per_connection(port, recipient, subject, body):
+    """The original send_email: connect, login, send, quit for every message"""
+    msg = MIMEMultipart()
+    msg['From'] = SENDER
+    msg['To'] = recipient
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'plain'))
+    server = smtplib.SMTP("127.0.0.1", port)
+    server.login(SENDER, "secret")
+    server.send_message(msg)
+    server.quit()
+
+
+def run(label, sink, send, messages, workers):
+    start_connections, start_messages = sink.connections, sink.messages
+    start = time.perf_counter()
+    with ThreadPoolExecutor(workers) as pool:
+        list(pool.map(lambda m: send(*m), messages))
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": label,
+        "messages": sink.messages - start_messages,
+        "connections": sink.connections - start_connections,
+        "seconds": round(elapsed, 4),
+        "messages_per_second": round(len(messages) / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--submissions", type=int, default=50)
+    parser.add_argument("--admins", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.01, help="sink delay per SMTP reply (s)")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    sink = SMTPSink(latency=args.latency).start()
+    admins = [f"admin{i}@example.com" for i in range(args.admins)]
+    messages = []
+    for i in range(args.submissions):
+        messages.append((f"candidate{i}@example.com", "Excel Practice Test Results", "score"))
+        messages.extend((admin, "New Excel Test Submission", "details") for admin in admins)
+
+    results = [run("per_connection", sink, lambda *m: send_per_connection(sink.port, *m), messages, args.workers)]
+
+    pool = SMTPPool("127.0.0.1", sink.port, SENDER, "secret", use_tls=False, size=args.workers)
+    outbox = Outbox(pool, SENDER)
+    results.append(run("pooled", sink, outbox.send, messages, args.workers))
+
+    # Digest mode: candidate mails still go out one by one, admin mails collapse
+    with tempfile.TemporaryDirectory() as tmp:
+        digest = Outbox(pool, SENDER, digest_path=os.path.join(tmp, "outbox.db"),
+                        digest_recipients=admins, digest_interval=60)
+        candidate_mails = [m for m in messages if m[0] not in admins]
+
+        def send_with_digest(recipient, subject, body):
+            digest.send(recipient, subject, body)
+            digest.add_to_digest({"recipient": recipient})
+
+        result = run("pooled_digest", sink, send_with_digest, candidate_mails, args.workers)
+        start_messages = sink.messages
+        digest.flush_digest(lambda entries: ("Digest", f"{len(entries)} submissions"))
+        result["messages"] += sink.messages - start_messages
+        results.append(result)
+        digest._db.close()
+
+    outbox.close()
+    sink.stop()
+    print(json.dumps({"latency": args.latency, "submissions": args.submissions,
+                      "admins": args.admins, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Measure Home page time-to-first-paint and per-rerun overhead.
+
+Runs the app headlessly with Streamlit's AppTest and prints JSON with the
+first-run time, rerun percentiles and the one-off cost of importing the
+Google client libraries. To compare against an older revision, export it
+next to the current one and point `--app` at it, e.g.
+
+    git show <rev>:app.py > app_before.py
+    python benchmarks/bench_startup.py --app app_before.py
+    python benchmarks/bench_startup.py
+
+The app gets placeholder secrets, which is all the current Home page
+needs. Revisions that build the Google clients at import time need real
+credentials in .streamlit/secrets.toml to get past the first run.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Enough for the app to start without a .streamlit/secrets.toml
+SECRETS = {
+    "admin_password": "bench",
+    "admin_emails": "admin@example.com",
+    "gcp_service_account": {},
+}
+
+GOOGLE_IMPORTS = "import google.oauth2.service_account, gspread, googleapiclient.discovery, googleapiclient.http"
+
+
+def google_import_seconds():
+    """Cold import time of the Google client libraries in a fresh interpreter"""
+    code = f"import time; t = time.perf_counter(); {GOOGLE_IMPORTS}; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(out.stdout.strip())
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default=os.path.join(ROOT, "app.py"))
+    parser.add_argument("--reruns", type=int, default=30)
+    args = parser.parse_args()
+
+    # AppTest would resolve a relative path against this file, not the working directory
+    at = AppTest.from_file(os.path.abspath(args.app), default_timeout=60)
+    for key, value in SECRETS.items():
+        at.secrets[key] = value
+    start = time.perf_counter()
+    at.run()
+    first_run = time.perf_counter() - start
+    if at.exception:
+        sys.exit(f"App raised on first run: {at.exception[0].message}")
+
+    reruns = []
+    for _ in range(args.reruns):
+        start = time.perf_counter()
+        at.run()
+        reruns.append(time.perf_counter() - start)
+
+    print(json.dumps({
+        "app": os.path.relpath(args.app, ROOT),
+        "page": "Home",
+        "first_run_ms": round(first_run * 1000, 1),
+        "rerun_p50_ms": round(statistics.median(reruns) * 1000, 1),
+        "rerun_p95_ms": round(percentile(reruns, 95) * 1000, 1),
+        "google_import_ms": round(google_import_seconds() * 1000, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
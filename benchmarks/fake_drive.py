@@ -0,0 +1,177 @@
+"""Fake Google Drive HTTP server for offline upload benchmarks.
+
+Implements just enough of Drive v3 for the app's upload paths: multipart
+and resumable `files.create` uploads, `permissions.create` and the batch
+endpoint. `latency` delays every response and `fail_every` answers every
+Nth upload chunk with a 503 so resumable retries can be exercised.
+Point a client at it with `rewriting_http(server.base_url)`.
+"""
+import email
+import email.policy
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+GOOGLE_ROOT = "https://www.googleapis.com/"
+_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        data = self.rfile.read(length) if length else b""
+        self.server.count("bytes_received", len(data))
+        return data
+
+    def _send(self, status, body=b"", headers=None, content_type="application/json"):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode()
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        if body:
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        body = self._body()
+        if url.path == "/upload/drive/v3/files":
+            if query.get("uploadType") == ["resumable"]:
+                self.server.count("resumable_sessions")
+                session = uuid.uuid4().hex
+                with self.server.lock:
+                    self.server.sessions[session] = 0
+                location = f"{self.server.base_url}upload/drive/v3/files?uploadType=resumable&upload_id={session}"
+                return self._send(200, headers={"Location": location})
+            self.server.count("simple_uploads")
+            return self._send(200, {"id": uuid.uuid4().hex})
+        if re.fullmatch(r"/drive/v3/files/[^/]+/permissions", url.path):
+            self.server.count("permission_calls")
+            return self._send(200, {"id": "anyoneWithLink"})
+        if url.path == "/batch/drive/v3":
+            self.server.count("batch_calls")
+            return self._batch(body)
+        self._send(404, {"error": {"code": 404, "message": url.path}})
+
+    def do_PUT(self):
+        query = parse_qs(urlparse(self.path).query)
+        session = query.get("upload_id", [None])[0]
+        body = self._body()
+        if session not in self.server.sessions:
+            return self._send(404, {"error": {"code": 404, "message": "unknown upload session"}})
+        content_range = self.headers.get("Content-Range", "")
+
+        if content_range.startswith("bytes */"):
+            # Status query after an interrupted chunk
+            self.server.count("status_queries")
+            return self._progress(session, int(content_range.split("/")[1]))
+
+        self.server.count("chunks")
+        if self.server.fail_every and self.server.counts["chunks"] % self.server.fail_every == 0:
+            self.server.count("injected_failures")
+            return self._send(503, {"error": {"code": 503, "message": "injected failure"}})
+        match = _RANGE.match(content_range)
+        total = None
+        if match:
+            start, end = int(match.group(1)), int(match.group(2))
+            total = None if match.group(3) == "*" else int(match.group(3))
+            with self.server.lock:
+                if start != self.server.sessions[session]:
+                    self.server.count("bytes_resent", self.server.sessions[session] - start)
+                self.server.sessions[session] = max(self.server.sessions[session], end + 1)
+        else:
+            with self.server.lock:
+                self.server.sessions[session] += len(body)
+            total = self.server.sessions[session]
+        return self._progress(session, total)
+
+    def _progress(self, session, total):
+        received = self.server.sessions[session]
+        if total is not None and received >= total:
+            return self._send(200, {"id": session})
+        headers = {"Range": f"bytes=0-{received - 1}"} if received else {}
+        return self._send(308, headers=headers)
+
+    def _batch(self, body):
+        content_type = self.headers["Content-Type"]
+        message = email.message_from_bytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode() + body, policy=email.policy.HTTP
+        )
+        boundary = uuid.uuid4().hex
+        parts = []
+        for part in message.iter_parts():
+            content_id = part["Content-ID"].strip("<>")
+            self.server.count("permission_calls")
+            parts.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\nContent-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n\r\n"
+                f"{json.dumps({'id': 'anyoneWithLink'})}\r\n"
+            )
+        payload = ("".join(parts) + f"--{boundary}--\r\n").encode()
+        self._send(200, payload, content_type=f"multipart/mixed; boundary={boundary}")
+
+
+class FakeDrive(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, fail_every=0):
+        super().__init__((host, port), _Handler)
+        self.latency = latency
+        self.fail_every = fail_every
+        self.lock = threading.Lock()
+        self.sessions = {}
+        self.counts = {}
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def count(self, key, amount=1):
+        with self.lock:
+            self.counts[key] = self.counts.get(key, 0) + amount
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def rewriting_http(base_url):
+    """An httplib2.Http that sends googleapis.com requests to the fake server instead"""
+    import httplib2
+
+    class RewritingHttp(httplib2.Http):
+        def request(self, uri, *args, **kwargs):
+            if uri.startswith(GOOGLE_ROOT):
+                uri = base_url + uri[len(GOOGLE_ROOT):]
+            return super().request(uri, *args, **kwargs)
+
+    http = RewritingHttp()
+    # Resumable uploads answer 308 "Resume Incomplete", which isn't a redirect (as in googleapiclient.http.build_http)
+    http.redirect_codes = http.redirect_codes - {308}
+    return http
+
+
+def fake_drive_service(base_url):
+    """A googleapiclient Drive v3 service bound to the fake server"""
+    from googleapiclient.discovery import build
+    return build("drive", "v3", http=rewriting_http(base_url), static_discovery=True)
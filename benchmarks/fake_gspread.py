@@ -0,0 +1,128 @@
+"""In-memory stand-in for gspread and service-account credentials.
+
+`install(worksheet)` puts fake `gspread`, `gspread.utils` and
+`google.oauth2.service_account` modules into `sys.modules`, so the app's
+lazy imports in `get_google_credentials` / `get_sheet` pick them up and
+every sheet call lands on `worksheet` instead of the network. Each call
+sleeps for `latency` seconds and is counted by method name.
+"""
+import re
+import sys
+import threading
+import time
+import types
+from collections import Counter
+
+_A1 = re.compile(r"([A-Z]+)(\d+)")
+
+
+def rowcol_to_a1(row, col):
+    letters = ""
+    while col:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return f"{letters}{row}"
+
+
+def _a1_row(a1):
+    match = _A1.match(a1)
+    return int(match.group(2)) if match else None
+
+
+class FakeWorksheet:
+    def __init__(self, header=None, latency=0.0):
+        self.rows = [list(header)] if header else []
+        self.latency = latency
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    def _call(self, name):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls[name] += 1
+
+    def row_values(self, row):
+        self._call("row_values")
+        with self._lock:
+            return [str(v) for v in self.rows[row - 1]] if row <= len(self.rows) else []
+
+    def col_values(self, col):
+        self._call("col_values")
+        with self._lock:
+            values = [str(row[col - 1]) if col <= len(row) else "" for row in self.rows]
+        while values and not values[-1]:
+            values.pop()
+        return values
+
+    def get_all_values(self):
+        self._call("get_all_values")
+        with self._lock:
+            return [[str(v) for v in row] for row in self.rows]
+
+    def get_values(self, range_name):
+        self._call("get_values")
+        start, _, end = range_name.partition(":")
+        first, last = _a1_row(start), _a1_row(end)
+        with self._lock:
+            return [[str(v) for v in row] for row in self.rows[first - 1:last]]
+
+    def append_rows(self, rows, **kwargs):
+        self._call("append_rows")
+        with self._lock:
+            first = len(self.rows) + 1
+            self.rows.extend(list(row) for row in rows)
+            last = len(self.rows)
+        return {"updates": {"updatedRange": f"Sheet1!A{first}:{rowcol_to_a1(last, max(len(r) for r in rows))}"}}
+
+    def append_row(self, row, **kwargs):
+        return self.append_rows([row])
+
+    def update(self, range_name=None, values=None, **kwargs):
+        self._call("update")
+        self._write(range_name, values)
+
+    def batch_update(self, data, **kwargs):
+        self._call("batch_update")
+        for item in data:
+            self._write(item["range"], item["values"])
+
+    def _write(self, range_name, values):
+        start = range_name.split(":")[0]
+        match = _A1.match(start)
+        col = 0
+        for letter in match.group(1):
+            col = col * 26 + ord(letter) - 64
+        row = int(match.group(2))
+        with self._lock:
+            for r, line in enumerate(values, row):
+                while len(self.rows) < r:
+                    self.rows.append([])
+                target = self.rows[r - 1]
+                target.extend([""] * (col - 1 + len(line) - len(target)))
+                target[col - 1:col - 1 + len(line)] = line
+
+
+def install(worksheet):
+    """Register the fake modules; returns the worksheet for convenience"""
+    spreadsheet = types.SimpleNamespace(sheet1=worksheet)
+    client = types.SimpleNamespace(open_by_url=lambda url: spreadsheet)
+
+    gspread = types.ModuleType("gspread")
+    gspread.authorize = lambda credentials: client
+    gspread.utils = types.ModuleType("gspread.utils")
+    gspread.utils.rowcol_to_a1 = rowcol_to_a1
+    sys.modules["gspread"] = gspread
+    sys.modules["gspread.utils"] = gspread.utils
+
+    for name in ("google", "google.oauth2"):
+        try:
+            __import__(name)
+        except ImportError:
+            sys.modules[name] = types.ModuleType(name)
+    service_account = types.ModuleType("google.oauth2.service_account")
+    service_account.Credentials = types.SimpleNamespace(
+        from_service_account_info=lambda info, scopes=None: types.SimpleNamespace(scopes=scopes)
+    )
+    sys.modules["google.oauth2.service_account"] = service_account
+    return worksheet
@@ -0,0 +1,109 @@
+"""Temp-file store for uploaded files, so their bytes don't stay in session memory"""
+import hashlib
+import io
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+
+COPY_CHUNK = 1024 * 1024
+
+
+@contextmanager
+def open_source(data, mapped=True):
+    """Seekable read-only file over uploaded bytes, or over a spilled file's path through a memory map.
+
+    Worker processes are handed paths rather than bytes, so nothing large is
+    pickled across; the map lets the kernel page the file in (and out) as
+    the reader needs it. Readers that need a real file object (an mmap has
+    no `seekable()` before Python 3.13) pass `mapped=False`.
+    """
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        yield io.BytesIO(data)
+        return
+    with open(data, "rb") as f:
+        if not mapped:
+            yield f
+            return
+        if os.fstat(f.fileno()).st_size == 0:  # an empty file can't be mapped
+            yield io.BytesIO(b"")
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def source_size(data):
+    return len(data) if isinstance(data, (bytes, bytearray, memoryview)) else os.path.getsize(data)
+
+
+class Blob:
+    """A spilled file: just a path, a size and a content hash, so it is cheap to pass around"""
+
+    __slots__ = ("path", "size", "digest")
+
+    def __init__(self, path, size, digest):
+        self.path = path
+        self.size = size
+        self.digest = digest
+
+    def open(self):
+        """Context manager yielding the contents as a read-only memory map"""
+        return open_source(self.path)
+
+
+class BlobStore:
+    """Spills uploads to files in one temporary directory and deletes them once used"""
+
+    def __init__(self, directory=None):
+        self.directory = directory or tempfile.mkdtemp(prefix="blobs_")
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._sizes = {}
+        self.spilled = 0
+        self.bytes_spilled = 0
+
+    def put(self, fileobj):
+        """Copy a file object to disk in chunks, hashing it on the way; returns a Blob"""
+        digest = hashlib.sha256()
+        size = 0
+        handle, path = tempfile.mkstemp(dir=self.directory, suffix=".blob")
+        try:
+            with os.fdopen(handle, "wb") as out:
+                while True:
+                    chunk = fileobj.read(COPY_CHUNK)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+        except BaseException:
+            os.remove(path)
+            raise
+        with self._lock:
+            self._sizes[path] = size
+            self.spilled += 1
+            self.bytes_spilled += size
+        return Blob(path, size, digest.hexdigest())
+
+    def discard(self, blob):
+        """Delete a blob's file; safe to call more than once"""
+        with self._lock:
+            self._sizes.pop(blob.path, None)
+        try:
+            os.remove(blob.path)
+        except FileNotFoundError:
+            pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                "blobs": len(self._sizes),
+                "bytes": sum(self._sizes.values()),
+                "spilled": self.spilled,
+                "bytes_spilled": self.bytes_spilled,
+            }
+
+    def close(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
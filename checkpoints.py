@@ -0,0 +1,132 @@
+"""Autosaved in-progress attempts, so a refresh or restart doesn't lose a candidate's test"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointStore:
+    """Latest checkpoint of each candidate's attempt, keyed by employee ID.
+
+    `save` only replaces the candidate's entry in an in-memory dirty map, so
+    a burst of clicks costs one dictionary write each. A flusher thread
+    writes whatever is dirty every `flush_interval` seconds in a single
+    transaction, keeping only the newest checkpoint per candidate. Reads
+    see unflushed checkpoints too. Checkpoints untouched for `max_age`
+    seconds are deleted as the flusher goes.
+    """
+
+    def __init__(self, path, flush_interval=2.0, max_age=24 * 3600):
+        self.flush_interval = flush_interval
+        self.max_age = max_age
+        self.saves = 0
+        self.writes = 0
+        self.flushes = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._dirty = {}
+        self._thread = None
+        self._stopping = False
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                employee_id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                updated REAL NOT NULL
+            )
+        """)
+
+    def save(self, employee_id, checkpoint):
+        """Queue `checkpoint` as the candidate's latest, replacing any not yet written"""
+        payload = json.dumps(checkpoint)
+        with self._lock:
+            self._dirty[employee_id] = (payload, time.time())
+            self.saves += 1
+
+    def load(self, employee_id):
+        """The candidate's latest checkpoint, written or not, or None"""
+        with self._lock:
+            pending = self._dirty.get(employee_id)
+            if pending is not None:
+                return json.loads(pending[0])
+            row = self._conn.execute("SELECT payload FROM checkpoints WHERE employee_id = ?",
+                                     (employee_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def delete(self, employee_id):
+        """Forget the candidate's attempt, e.g. once it has been submitted"""
+        with self._lock:
+            self._dirty.pop(employee_id, None)
+            self._conn.execute("DELETE FROM checkpoints WHERE employee_id = ?", (employee_id,))
+
+    def flush(self):
+        """Write every dirty checkpoint in one transaction; returns the number written"""
+        with self._lock:
+            if not self._dirty:
+                return 0
+            rows = [(employee_id, payload, updated) for employee_id, (payload, updated) in self._dirty.items()]
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany("""
+                    INSERT INTO checkpoints (employee_id, payload, updated) VALUES (?, ?, ?)
+                    ON CONFLICT (employee_id) DO UPDATE SET payload = excluded.payload, updated = excluded.updated
+                """, rows)
+                self._conn.execute("DELETE FROM checkpoints WHERE updated < ?", (time.time() - self.max_age,))
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            self._dirty.clear()
+            self.writes += len(rows)
+            self.flushes += 1
+        return len(rows)
+
+    def start(self):
+        """Start the flusher thread (idempotent)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="checkpoints", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        """Stop the flusher after writing anything still dirty"""
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while True:
+            with self._wakeup:
+                if not self._stopping:
+                    self._wakeup.wait(self.flush_interval)
+                stopping = self._stopping
+            try:
+                self.flush()
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                logger.warning("Failed to write attempt checkpoints: %s", self.last_error)
+            if stopping:
+                return
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._dirty)
+            stored = self._conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0]
+        return {
+            "saved": stored,
+            "pending": pending,
+            "saves": self.saves,
+            "writes": self.writes,
+            "flushes": self.flushes,
+            "last_error": self.last_error
+        }
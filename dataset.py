@@ -0,0 +1,49 @@
+"""Employee dataset used in Section B and the PivotTable questions"""
+import hashlib
+import io
+import json
+
+import pandas as pd
+
+employee_data = [
+    {"Employee": "Saravana Kumar R", "Gender": "Male", "Marital Status": "Unmarried", "Region": "South", "Location": "Trichy", "Department": "TSG & IT Hardware", "Total Amount Due": 2000},
+    {"Employee": "Narsi Ram Meena", "Gender": "Male", "Marital Status": "Married", "Region": "North", "Location": "Lucknow", "Department": "TSG & IT Hardware", "Total Amount Due": 6000},
+    {"Employee": "Shahbaz Khan", "Gender": "Male", "Marital Status": "Married", "Region": "North", "Location": "Agra", "Department": "Customer Service Division", "Total Amount Due": 4400},
+    {"Employee": "Aman Mishra", "Gender": "Male", "Marital Status": "Unmarried", "Region": "West", "Location": "Satara", "Department": "TSG & IT Hardware", "Total Amount Due": 2300},
+    {"Employee": "Bherulal Sharma", "Gender": "Male", "Marital Status": "Unmarried", "Region": "West", "Location": "Satara", "Department": "Accounts", "Total Amount Due": 10000},
+    {"Employee": "Brajesh Sharma", "Gender": "Male", "Marital Status": "Married", "Region": "North", "Location": "Lucknow", "Department": "TSG & IT Hardware", "Total Amount Due": 15000},
+    {"Employee": "Suraj Mahor", "Gender": "Male", "Marital Status": "Unmarried", "Region": "North", "Location": "Lucknow", "Department": "TSG & IT Hardware", "Total Amount Due": 14000},
+    {"Employee": "Shikha Yadav", "Gender": "Female", "Marital Status": "Married", "Region": "East", "Location": "Noida", "Department": "Sales", "Total Amount Due": 200},
+    {"Employee": "Sunita Gautam Dudhe", "Gender": "Female", "Marital Status": "Married", "Region": "West", "Location": "Nagpur", "Department": "Customer Service Division", "Total Amount Due": 123},
+    {"Employee": "Dhan Das", "Gender": "Male", "Marital Status": "Unmarried", "Region": "East", "Location": "Guwahati", "Department": "TSG & IT Hardware", "Total Amount Due": 0},
+    {"Employee": "Anamika Singh Chaudhary", "Gender": "Female", "Marital Status": "Unmarried", "Region": "North", "Location": "Agra", "Department": "Customer Service Division", "Total Amount Due": 1},
+    {"Employee": "Chaitram Dhanraj Shahu", "Gender": "Male", "Marital Status": "Married", "Region": "West", "Location": "Nagpur", "Department": "Customer Service Division", "Total Amount Due": 12300},
+    {"Employee": "Dev Singh Saharawat", "Gender": "Male", "Marital Status": "Unmarried", "Region": "North", "Location": "Ambala", "Department": "Accounts", "Total Amount Due": 5300},
+    {"Employee": "Santosh Kumar Singh", "Gender": "Male", "Marital Status": "Married", "Region": "North", "Location": "Noida", "Department": "TSG & IT Hardware", "Total Amount Due": 47000},
+]
+
+# Changes whenever the data does, so cached downloads are rebuilt automatically
+DATASET_VERSION = hashlib.sha256(json.dumps(employee_data, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def expected_pivots(df):
+    """Correct PivotTable results for questions 9a, 9b and 10, in the form pivot_grading expects"""
+    return {
+        "q9a": {"kind": "series", "values": df.groupby("Region")["Total Amount Due"].sum().astype(float).to_dict()},
+        "q9b": {"kind": "series", "values": df.groupby("Department")["Total Amount Due"].sum().astype(float).to_dict()},
+        "q10": {"kind": "crosstab",
+                "values": pd.crosstab(df["Region"], df["Gender"]).astype(float).to_dict(orient="index")},
+    }
+
+
+def build_dataset_artifacts():
+    """DataFrame, ready-to-serve XLSX and CSV bytes, and expected PivotTable results"""
+    df = pd.DataFrame(employee_data)
+    excel_buffer = io.BytesIO()
+    df.to_excel(excel_buffer, index=False, engine='openpyxl')
+    return {
+        "frame": df,
+        "xlsx": excel_buffer.getvalue(),
+        "csv": df.to_csv(index=False).encode("utf-8-sig"),
+        "pivots": expected_pivots(df),
+    }
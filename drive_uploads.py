@@ -0,0 +1,90 @@
+"""Drive upload engine: resumable chunked uploads, concurrency and batched permission grants"""
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+CHUNK_SIZE = 1024 * 1024  # must be a multiple of 256 KB
+
+
+def view_link(file_id):
+    return f"https://drive.google.com/file/d/{file_id}/view"
+
+
+class DriveUploader:
+    """Uploads files to a Drive folder from a small pool of worker threads.
+
+    googleapiclient service objects aren't thread-safe, so each worker builds
+    its own with `build_service()`. Every request goes through the shared
+    APIClient's "drive" bucket, which rate-limits it and retries transient
+    errors. Uploads use the resumable protocol: if a chunk fails, the retry
+    asks Drive how much it already has and only re-sends the remainder. Public read access is
+    granted in one batch request per group of files, or skipped entirely when
+    `inherit_permissions` is set and the folder itself is shared.
+    """
+
+    def __init__(self, build_service, api, workers=3, chunk_size=CHUNK_SIZE, inherit_permissions=False):
+        self.build_service = build_service
+        self.api = api
+        self.chunk_size = chunk_size
+        self.inherit_permissions = inherit_permissions
+        self._local = threading.local()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="drive-upload")
+
+    def _service(self):
+        service = getattr(self._local, "service", None)
+        if service is None:
+            service = self._local.service = self.build_service()
+        return service
+
+    def upload_file(self, data, filename, folder_id, mimetype):
+        """Resumable upload of one file (bytes, or a seekable file such as a blob's memory map); returns the new file id"""
+        from googleapiclient.http import MediaIoBaseUpload
+
+        stream = io.BytesIO(data) if isinstance(data, (bytes, bytearray)) else data
+        media = MediaIoBaseUpload(stream, mimetype=mimetype, chunksize=self.chunk_size, resumable=True)
+        request = self._service().files().create(
+            body={"name": filename, "parents": [folder_id]},
+            media_body=media,
+            fields="id"
+        )
+        response = None
+        while response is None:
+            # After a failure next_chunk() queries the upload's progress and resumes from there
+            _, response = self.api.call("drive", request.next_chunk)
+        return response["id"]
+
+    def grant_public(self, file_ids):
+        """Give 'anyone with the link' read access to all files in one batch request"""
+        if self.inherit_permissions or not file_ids:
+            return
+        service = self._service()
+        errors = []
+
+        def callback(request_id, response, exception):
+            if exception is not None:
+                errors.append(exception)
+
+        def execute():
+            errors.clear()
+            batch = service.new_batch_http_request(callback=callback)
+            for file_id in file_ids:
+                batch.add(service.permissions().create(
+                    fileId=file_id,
+                    body={"role": "reader", "type": "anyone"},
+                    fields="id"
+                ))
+            batch.execute()
+            if errors:
+                raise errors[0]
+
+        self.api.call("drive", execute)
+
+    def upload_files(self, files, folder_id):
+        """Upload `(data, filename, mimetype)` tuples and share them; returns view links in order"""
+        file_ids = [self.upload_file(data, filename, folder_id, mimetype) for data, filename, mimetype in files]
+        self.grant_public(file_ids)
+        return [view_link(file_id) for file_id in file_ids]
+
+    def submit(self, fn, *args, **kwargs):
+        """Run `fn` on the upload pool and return its Future"""
+        return self._pool.submit(fn, *args, **kwargs)
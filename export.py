@@ -0,0 +1,144 @@
+"""Bulk export of submissions as XLSX, CSV or Parquet.
+
+Rows are generated lazily and written straight to disk (openpyxl write-only
+mode, csv.writer, batched pyarrow row groups), so memory stays bounded by
+one batch rather than the whole cohort. Finished files are cached per data
+version and format, so repeated downloads don't regenerate them.
+"""
+import csv
+import importlib.util
+import os
+import tempfile
+import threading
+
+EXPORT_COLUMNS = [
+    "Timestamp", "Name", "Employee ID", "Department", "Email", "MCQ Score", "Percentage", "Status",
+    "Q1", "Q2", "Q3", "Q4", "Q5", "Q6", "Q7", "Q8",
+    "Q9a Screenshot URL", "Q9b Screenshot URL", "Q10 Screenshot URL",
+    "Q9a Auto Grade", "Q9b Auto Grade", "Q10 Auto Grade", "Pivot Workbook URL",
+]
+
+FORMATS = {
+    "xlsx": ("Excel", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv": ("CSV", "text/csv"),
+    "parquet": ("Parquet", "application/vnd.apache.parquet"),
+}
+
+PARQUET_BATCH_ROWS = 10_000
+
+
+def available_formats():
+    """Export formats whose libraries are installed (Parquet needs pyarrow)"""
+    formats = ["xlsx", "csv"]
+    if importlib.util.find_spec("pyarrow") is not None:
+        formats.append("parquet")
+    return formats
+
+
+def export_rows(submissions):
+    """Yield one list of cell values per submission, in EXPORT_COLUMNS order"""
+    for s in submissions:
+        answers = s['answers']
+        yield [
+            s['timestamp'][:19].replace('T', ' '),
+            s['user_info']['name'],
+            s['user_info']['employee_id'],
+            s['user_info']['department'],
+            s['user_info']['email'],
+            f"{s['score']}/{s['total']}",
+            f"{s['percentage']:.1f}%",
+            "PASS" if s['percentage'] >= 70 else "FAIL",
+            answers.get("q1", ""),
+            answers.get("q2", ""),
+            answers.get("q3", ""),
+            answers.get("q4", ""),
+            answers.get("q5", ""),
+            answers.get("q6", ""),
+            answers.get("q7", ""),
+            answers.get("q8", ""),
+            answers.get("q9a_screenshot_url", ""),
+            answers.get("q9b_screenshot_url", ""),
+            answers.get("q10_screenshot_url", ""),
+            answers.get("q9a_auto_grade", ""),
+            answers.get("q9b_auto_grade", ""),
+            answers.get("q10_auto_grade", ""),
+            answers.get("pivot_workbook_url", ""),
+        ]
+
+
+def write_xlsx(rows, path):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet("Submissions")
+    worksheet.append(EXPORT_COLUMNS)
+    for row in rows:
+        worksheet.append(row)
+    workbook.save(path)
+
+
+def write_csv(rows, path):
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(EXPORT_COLUMNS)
+        writer.writerows(rows)
+
+
+def write_parquet(rows, path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(column, pa.string()) for column in EXPORT_COLUMNS])
+    with pq.ParquetWriter(path, schema) as writer:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= PARQUET_BATCH_ROWS:
+                writer.write_table(_parquet_table(pa, schema, batch))
+                batch = []
+        if batch:
+            writer.write_table(_parquet_table(pa, schema, batch))
+
+
+def _parquet_table(pa, schema, batch):
+    columns = zip(*batch)
+    return pa.table([pa.array([str(v) for v in col], pa.string()) for col in columns], schema=schema)
+
+
+WRITERS = {"xlsx": write_xlsx, "csv": write_csv, "parquet": write_parquet}
+
+
+class ExportCache:
+    """Generated export files on disk, one per format for the latest data version"""
+
+    def __init__(self, directory=None):
+        self._tmp = None
+        if directory is None:
+            self._tmp = tempfile.TemporaryDirectory(prefix="submission-exports-")
+            directory = self._tmp.name
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._files = {}  # format -> (version, path)
+        self.hits = 0
+        self.builds = 0
+
+    def get(self, version, fmt, submissions):
+        """Return the path of the export for this data version, building it if needed"""
+        with self._lock:
+            cached = self._files.get(fmt)
+            if cached and cached[0] == version and os.path.exists(cached[1]):
+                self.hits += 1
+                return cached[1]
+
+            path = os.path.join(self.directory, f"submissions_v{version}.{fmt}")
+            partial = path + ".partial"
+            WRITERS[fmt](export_rows(submissions), partial)
+            os.replace(partial, path)
+            self.builds += 1
+
+            # Evict the previous version of this format
+            if cached and cached[1] != path and os.path.exists(cached[1]):
+                os.remove(cached[1])
+            self._files[fmt] = (version, path)
+            return path
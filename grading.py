@@ -0,0 +1,85 @@
+"""Vectorised bulk re-grading of stored submissions against an answer key"""
+import json
+
+import numpy as np
+import pandas as pd
+
+from analytics import answers_matrix
+
+PASS_MARK = 70
+MISSING = -1
+LETTERS = [chr(97 + code) for code in range(26)]
+
+
+def encode_answers(submissions, question_ids):
+    """Answers as an int8 matrix: one row per submission, 0 for "a", 1 for "b"... and -1 if blank"""
+    values = answers_matrix(submissions, question_ids).to_numpy(dtype=object)
+    # One hashed pass instead of a comparison per letter; anything else (NaN included) gets code -1
+    codes = pd.Categorical(values.ravel(), categories=LETTERS).codes
+    return codes.reshape(values.shape).astype(np.int8)
+
+
+def encode_key(answer_key, question_ids):
+    return np.array([ord(answer_key[q_id]) - 97 for q_id in question_ids], dtype=np.int8)
+
+
+def regrade(submissions, answer_key):
+    """Re-score every submission against `answer_key` in one pass.
+
+    Each submission keeps its stored total (the number of questions on its
+    form); only which answers count as correct changes. Returns a DataFrame
+    with one row per submission, in storage order, holding the old and new
+    score, percentage and status plus `changed` / `status_changed` flags.
+    """
+    question_ids = list(answer_key)
+    codes = encode_answers(submissions, question_ids)
+    key = encode_key(answer_key, question_ids)
+
+    scores = (codes == key).sum(axis=1)
+    totals = np.array([s["total"] for s in submissions], dtype=np.int64)
+    percentages = np.divide(scores * 100.0, totals, out=np.zeros(len(totals)), where=totals > 0)
+    old_scores = np.array([s["score"] for s in submissions], dtype=np.int64)
+    old_percentages = np.array([s["percentage"] for s in submissions], dtype=float)
+
+    result = pd.DataFrame({
+        "position": np.arange(len(submissions)),
+        "submission_id": [s.get("submission_id") or "" for s in submissions],
+        "timestamp": [s["timestamp"] for s in submissions],
+        "name": [s["user_info"]["name"] for s in submissions],
+        "employee_id": [str(s["user_info"]["employee_id"]) for s in submissions],
+        "total": totals,
+        "old_score": old_scores,
+        "new_score": scores,
+        "old_percentage": old_percentages,
+        "new_percentage": percentages,
+        "old_status": np.where(old_percentages >= PASS_MARK, "PASS", "FAIL"),
+        "new_status": np.where(percentages >= PASS_MARK, "PASS", "FAIL"),
+    })
+    result["changed"] = result["old_score"] != result["new_score"]
+    result["status_changed"] = result["old_status"] != result["new_status"]
+    return result
+
+
+def score_updates(result):
+    """Rows of a `regrade` result whose score changed, as dicts for `update_scores`"""
+    changed = result[result["changed"]]
+    return [
+        {"position": int(row.position), "submission_id": row.submission_id,
+         "score": int(row.new_score), "total": int(row.total), "percentage": float(row.new_percentage)}
+        for row in changed.itertuples(index=False)
+    ]
+
+
+def append_audit(path, answer_key, result, applied_at):
+    """Append one JSON line recording the key used and every submission whose score changed"""
+    changed = result[result["changed"]]
+    record = {
+        "applied_at": applied_at,
+        "answer_key": answer_key,
+        "submissions": len(result),
+        "changed": len(changed),
+        "status_changed": int(result["status_changed"].sum()),
+        "changes": changed.drop(columns=["changed"]).to_dict(orient="records"),
+    }
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, default=lambda value: value.item()) + "\n")
@@ -0,0 +1,62 @@
+"""Screenshot pre-processing before upload: downscale, strip metadata, re-encode, thumbnail.
+
+The functions here are CPU-bound and run in a process pool (see
+`get_image_pool` in app.py), so decoding a large PNG doesn't hold the GIL
+that every other session's script thread needs. Uploads arrive as the path
+of a spilled file (see blobs.py) rather than as pickled bytes.
+"""
+import io
+
+from blobs import open_source, source_size
+
+MAX_DIMENSION = 2000  # longest side kept for review; PivotTable text stays legible
+THUMBNAIL_SIZE = (320, 320)
+QUALITY = 85
+
+
+def _encode(image, lossless=False):
+    """Encode as WebP when Pillow supports it, otherwise PNG; returns (bytes, mime, ext)"""
+    from PIL import features
+
+    buffer = io.BytesIO()
+    if features.check("webp"):
+        image.save(buffer, format="WEBP", quality=QUALITY, lossless=lossless, method=4)
+        return buffer.getvalue(), "image/webp", "webp"
+    image.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue(), "image/png", "png"
+
+
+def prepare_screenshot(data, max_dimension=MAX_DIMENSION, thumbnail_size=THUMBNAIL_SIZE):
+    """Decode an uploaded screenshot (bytes or a file path) and return compact upload and thumbnail encodings.
+
+    Only pixel data is carried over to the re-encoded image, so EXIF, GPS and
+    PNG text chunks are dropped. Raises if the bytes aren't a decodable image.
+    """
+    from PIL import Image, ImageOps
+
+    with open_source(data) as stream, Image.open(stream) as source:
+        source.load()
+        original_size = source.size
+        # Apply camera rotation before the EXIF that describes it is discarded
+        image = ImageOps.exif_transpose(source)
+        if image.mode not in ("RGB", "RGBA", "L"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+        clean = Image.new(image.mode, image.size)
+        clean.paste(image)
+
+    body, mime, ext = _encode(clean)
+    thumb = clean.copy()
+    thumb.thumbnail(thumbnail_size, Image.LANCZOS)
+    thumbnail, thumbnail_mime, thumbnail_ext = _encode(thumb)
+    return {
+        "data": body,
+        "mime": mime,
+        "ext": ext,
+        "thumbnail": thumbnail,
+        "thumbnail_mime": thumbnail_mime,
+        "thumbnail_ext": thumbnail_ext,
+        "original_size": original_size,
+        "size": clean.size,
+        "original_bytes": source_size(data),
+    }
@@ -0,0 +1,137 @@
+"""Classical item analysis of the MCQs: difficulty, discrimination, distractors and KR-20"""
+import numpy as np
+import pandas as pd
+
+from grading import MISSING, encode_answers, encode_key
+
+GROUP_FRACTION = 0.27  # share of candidates in each of the upper and lower groups (Kelley's 27%)
+FUNCTIONAL_DISTRACTOR = 0.05  # a distractor chosen by fewer candidates than this is not doing its job
+TOO_EASY = 0.9  # difficulty (share answering correctly) above which an item tells candidates apart poorly
+TOO_HARD = 0.2
+WEAK_DISCRIMINATION = 0.2
+
+
+def correlation(x, y, weights):
+    """Pearson correlation of each column of `x` with the same column of `y`, over the rows weighted 1.
+
+    NaN where either is constant over those rows.
+    """
+    count = np.maximum(weights.sum(axis=0), 1)
+    dx = (x - (x * weights).sum(axis=0) / count) * weights
+    dy = (y - (y * weights).sum(axis=0) / count) * weights
+    denominator = np.sqrt((dx * dx).sum(axis=0) * (dy * dy).sum(axis=0))
+    return np.divide((dx * dy).sum(axis=0), denominator, out=np.full(x.shape[1], np.nan), where=denominator > 0)
+
+
+def share(hits, presented):
+    """Per-question share of `hits` among the rows the question was presented in (NaN if none)"""
+    count = presented.sum(axis=0)
+    return np.divide(hits.sum(axis=0), count, out=np.full(hits.shape[1], np.nan), where=count > 0)
+
+
+def review_reasons(difficulty, discrimination):
+    """Why an item deserves a second look, or "" if it looks healthy"""
+    reasons = []
+    if difficulty > TOO_EASY:
+        reasons.append("too easy")
+    elif difficulty < TOO_HARD:
+        reasons.append("too hard")
+    if discrimination < 0:
+        reasons.append("negative discrimination")
+    elif discrimination < WEAK_DISCRIMINATION:
+        reasons.append("weak discrimination")
+    return ", ".join(reasons)
+
+
+def item_analysis(codes, key, question_ids, option_counts, presented=None):
+    """Item statistics for an int8 answer matrix from `grading.encode_answers`.
+
+    `presented` is a boolean matrix of the same shape marking the questions
+    each candidate's form included (all of them if None); every statistic
+    of a question is taken over the candidates who were shown it. Blank
+    answers count as incorrect, as they do in scoring. Returns a dict with
+    an `items` DataFrame (one row per question), a `distractors` DataFrame
+    (one row per question and option) and the test's KR-20. Everything is
+    whole-matrix numpy; the only Python loop is over option letters.
+    """
+    n, k = codes.shape
+    if not n or not k:
+        return {"submissions": n, "items": pd.DataFrame(), "distractors": pd.DataFrame(), "kr20": None}
+    shown = np.ones(codes.shape, dtype=bool) if presented is None else np.asarray(presented, dtype=bool)
+    weights = shown.astype(np.float32)
+    correct = ((codes == key) & shown).astype(np.float32)
+    totals = correct.sum(axis=1)
+    form_lengths = weights.sum(axis=1)
+
+    # Upper and lower groups by share of their own form answered correctly; ties are broken by position
+    group = max(1, int(round(n * GROUP_FRACTION)))
+    ranked = np.argsort(np.divide(totals, form_lengths, out=np.zeros(n), where=form_lengths > 0), kind="stable")
+    lower, upper = ranked[:group], ranked[n - group:]
+
+    difficulty = share(correct, weights)
+    discrimination = share(correct[upper], weights[upper]) - share(correct[lower], weights[lower])
+    # Corrected point-biserial: each item against the score on the other items
+    point_biserial = correlation(correct, totals[:, None] - correct, weights)
+
+    # KR-20 with the item variances a candidate's form holds on average; the classic one when forms are complete
+    variance = totals.var()
+    length = form_lengths.mean()
+    item_variance = np.nansum(weights.mean(axis=0) * difficulty * (1 - difficulty))
+    kr20 = float(length / (length - 1) * (1 - item_variance / variance)) if length > 1 and variance > 0 else None
+
+    items = pd.DataFrame({
+        "question": question_ids,
+        "difficulty": difficulty,
+        "discrimination": discrimination,
+        "point_biserial": point_biserial,
+        "omitted": share((codes == MISSING) & shown, weights),
+    })
+    items["review"] = [review_reasons(*row) for row in zip(difficulty, discrimination)]
+
+    frames = []
+    options = np.asarray(option_counts)
+    for option in range(int(options.max())):
+        chose = (codes == option) & shown
+        chosen = share(chose, weights)
+        upper_share = share(chose[upper], weights[upper])
+        lower_share = share(chose[lower], weights[lower])
+        is_key = key == option
+        frames.append(pd.DataFrame({
+            "question": question_ids,
+            "option": chr(97 + option),
+            "is_key": is_key,
+            "chosen": chosen,
+            "upper": upper_share,
+            "lower": lower_share,
+            "discrimination": upper_share - lower_share,
+            # A working distractor draws some candidates, and more weak ones than strong ones
+            "functional": ~is_key & (chosen >= FUNCTIONAL_DISTRACTOR) & (lower_share > upper_share),
+        })[option < options])
+    # Each frame keeps the question positions as its index, so this puts options back under their question
+    distractors = pd.concat(frames).sort_index(kind="stable").reset_index(drop=True)
+
+    return {"submissions": n, "items": items, "distractors": distractors, "kr20": kr20}
+
+
+def presented_matrix(submissions, bank, question_ids):
+    """Boolean matrix, True where a submission's form included the question"""
+    column = {q_id: j for j, q_id in enumerate(question_ids)}
+    presented = np.ones((len(submissions), len(question_ids)), dtype=bool)
+    for i, submission in enumerate(submissions):
+        shown = bank.presented(submission.get("form"), submission["answers"])
+        if shown is not None:
+            presented[i] = False
+            presented[i, [column[q_id] for q_id in shown if q_id in column]] = True
+    return presented
+
+
+def analyse_submissions(submissions, bank):
+    """`item_analysis` over stored submissions, for every question in a QuestionBank"""
+    question_ids = list(bank.answer_key)
+    return item_analysis(
+        encode_answers(submissions, question_ids),
+        encode_key(bank.answer_key, question_ids),
+        question_ids,
+        [len(bank[q_id].options) for q_id in question_ids],
+        presented_matrix(submissions, bank, question_ids),
+    )
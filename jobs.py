@@ -0,0 +1,184 @@
+"""Durable background job queue for work that shouldn't block a Streamlit rerun"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from collections import namedtuple
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+Job = namedtuple("Job", ["id", "kind", "group", "payload", "attempts"])
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    """SQLite-backed job queue drained by a fixed pool of worker threads.
+
+    Jobs are written to disk before `enqueue` returns, so a crash or restart
+    never loses an accepted submission: anything left `running` is put back
+    to `pending` the next time the queue is opened. Failed jobs are retried
+    with exponential backoff until `max_attempts` is reached.
+    """
+
+    def __init__(self, path, workers=4, max_attempts=5, retry_delay=2.0):
+        self.path = path
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._handlers = {}
+        self._threads = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._stopping = False
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                grp TEXT,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                run_after REAL NOT NULL,
+                created REAL NOT NULL,
+                updated REAL NOT NULL,
+                last_error TEXT
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, run_after)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_grp ON jobs (grp)")
+        # Recover jobs that were in flight when the previous process died
+        self._conn.execute("UPDATE jobs SET status = ? WHERE status = ?", (PENDING, RUNNING))
+
+    def register(self, kind, handler):
+        """Register `handler(queue, job)` for jobs of the given kind"""
+        self._handlers[kind] = handler
+
+    def start(self):
+        """Start the worker threads (idempotent)"""
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=5):
+        """Ask the workers to exit and wait for them"""
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def enqueue(self, kind, payload, group=None):
+        """Durably record a job and return its id once it's on disk"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._wakeup:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, grp, payload, status, attempts, run_after, created, updated) "
+                "VALUES (?, ?, ?, ?, ?, 0, ?, ?, ?)",
+                (job_id, kind, group, json.dumps(payload), PENDING, now, now, now)
+            )
+            self._wakeup.notify()
+        return job_id
+
+    def status(self, job_id):
+        """Return a status dict for a single job, or None if it doesn't exist"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT kind, status, attempts, last_error FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"kind": row[0], "status": row[1], "attempts": row[2], "error": row[3]}
+
+    def group_status(self, group):
+        """Return status dicts for every job in a group, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, kind, status, attempts, last_error FROM jobs WHERE grp = ? ORDER BY created",
+                (group,)
+            ).fetchall()
+        return [
+            {"id": r[0], "kind": r[1], "status": r[2], "attempts": r[3], "error": r[4]}
+            for r in rows
+        ]
+
+    def counts(self):
+        """Return the number of jobs in each status"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+    def _claim(self):
+        """Mark the next ready job as running and return it, or the seconds to wait"""
+        now = time.time()
+        row = self._conn.execute(
+            "SELECT id, kind, grp, payload, attempts, run_after FROM jobs "
+            "WHERE status = ? ORDER BY run_after LIMIT 1",
+            (PENDING,)
+        ).fetchone()
+        if row is None:
+            return None, None
+        if row[5] > now:
+            return None, row[5] - now
+        self._conn.execute(
+            "UPDATE jobs SET status = ?, attempts = attempts + 1, updated = ? WHERE id = ?",
+            (RUNNING, now, row[0])
+        )
+        return Job(row[0], row[1], row[2], json.loads(row[3]), row[4] + 1), None
+
+    def _finish(self, job, error=None):
+        now = time.time()
+        with self._lock:
+            if error is None:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, updated = ?, last_error = NULL WHERE id = ?",
+                    (DONE, now, job.id)
+                )
+            elif job.attempts >= self.max_attempts:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, updated = ?, last_error = ? WHERE id = ?",
+                    (FAILED, now, error, job.id)
+                )
+            else:
+                delay = self.retry_delay * (2 ** (job.attempts - 1))
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, run_after = ?, updated = ?, last_error = ? WHERE id = ?",
+                    (PENDING, now + delay, now, error, job.id)
+                )
+                self._wakeup.notify()
+
+    def _worker(self):
+        while True:
+            with self._wakeup:
+                while True:
+                    if self._stopping:
+                        return
+                    job, wait = self._claim()
+                    if job is not None:
+                        break
+                    self._wakeup.wait(wait)
+
+            handler = self._handlers.get(job.kind)
+            try:
+                if handler is None:
+                    raise LookupError(f"No handler registered for job kind '{job.kind}'")
+                handler(self, job)
+            except Exception as e:
+                logger.exception("Job %s (%s) failed", job.id, job.kind)
+                self._finish(job, f"{type(e).__name__}: {e}")
+            else:
+                self._finish(job)
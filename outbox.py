@@ -0,0 +1,230 @@
+"""Notification outbox: pooled SMTP connections, send throttling and admin digests"""
+import json
+import logging
+import queue
+import smtplib
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+logger = logging.getLogger(__name__)
+
+
+class Throttle:
+    """Token bucket limiting sends to `rate` per second with bursts of `burst`"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available"""
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class SMTPPool:
+    """Small pool of authenticated SMTP connections reused across messages"""
+
+    def __init__(self, host, port, username=None, password=None, use_tls=True, size=2, idle_timeout=60):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.idle_timeout = idle_timeout
+        self._idle = queue.LifoQueue(maxsize=size)
+        self.connections_opened = 0
+
+    def _open(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=30)
+        if self.use_tls:
+            server.starttls()
+        if self.username:
+            server.login(self.username, self.password)
+        self.connections_opened += 1
+        return server
+
+    @staticmethod
+    def _close(server):
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def _checkout(self):
+        while True:
+            try:
+                server, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return self._open()
+            if time.monotonic() - last_used < self.idle_timeout:
+                return server
+            self._close(server)
+
+    def _checkin(self, server):
+        try:
+            self._idle.put_nowait((server, time.monotonic()))
+        except queue.Full:
+            self._close(server)
+
+    @contextmanager
+    def connection(self):
+        """Yield a live connection; it goes back to the pool unless the block raised"""
+        server = self._checkout()
+        try:
+            yield server
+        except Exception:
+            self._close(server)
+            raise
+        self._checkin(server)
+
+    def close(self):
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(server)
+
+
+class Outbox:
+    """Sends notification emails through an SMTPPool, throttled, with optional admin digests.
+
+    Digest entries are kept in a small SQLite table so they survive restarts.
+    Each recipient has a cursor of the last entry mailed to them, so a failed
+    send is retried for that recipient only; entries are removed once every
+    recipient has them.
+    """
+
+    def __init__(self, pool, sender, rate=None, burst=1, digest_path=None,
+                 digest_recipients=(), digest_interval=0):
+        self.pool = pool
+        self.sender = sender
+        self.throttle = Throttle(rate, burst)
+        self.digest_recipients = list(digest_recipients)
+        self.digest_interval = digest_interval
+        self.sent = 0
+        self._digest_lock = threading.Lock()
+        self._digest_thread = None
+        self._stopping = threading.Event()
+        self._db = None
+        if digest_path:
+            self._db = sqlite3.connect(digest_path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS digest (id INTEGER PRIMARY KEY AUTOINCREMENT, entry TEXT NOT NULL, key TEXT)"
+            )
+            columns = [row[1] for row in self._db.execute("PRAGMA table_info(digest)")]
+            if "key" not in columns:
+                self._db.execute("ALTER TABLE digest ADD COLUMN key TEXT")
+            self._db.execute("CREATE UNIQUE INDEX IF NOT EXISTS digest_key ON digest (key)")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS digest_sent (recipient TEXT PRIMARY KEY, last_id INTEGER NOT NULL)"
+            )
+
+    @property
+    def digest_enabled(self):
+        return self._db is not None and self.digest_interval > 0
+
+    def _message(self, recipient, subject, body):
+        msg = MIMEMultipart()
+        msg['From'] = self.sender
+        msg['To'] = recipient
+        msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'plain'))
+        return msg
+
+    def send(self, recipient, subject, body):
+        """Send one message, retrying once on a fresh connection if a pooled one went stale"""
+        msg = self._message(recipient, subject, body)
+        self.throttle.acquire()
+        try:
+            with self.pool.connection() as server:
+                server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            with self.pool.connection() as server:
+                server.send_message(msg)
+        self.sent += 1
+
+    def add_to_digest(self, entry, key=None):
+        """Queue a dict for the next admin digest; a `key` already queued is ignored"""
+        with self._digest_lock:
+            self._db.execute("INSERT OR IGNORE INTO digest (entry, key) VALUES (?, ?)", (json.dumps(entry), key))
+
+    def pending_digest(self):
+        with self._digest_lock:
+            return self._db.execute("SELECT COUNT(*) FROM digest").fetchone()[0]
+
+    def flush_digest(self, format_digest):
+        """Send `format_digest(entries) -> (subject, body)` to every digest recipient.
+
+        Each recipient gets the entries past their own cursor, so one failing
+        address doesn't resend the digest to the others; the first failure is
+        re-raised once everyone else has been tried. Returns the number of
+        entries every recipient now has.
+        """
+        with self._digest_lock:
+            rows = self._db.execute("SELECT id, entry FROM digest ORDER BY id").fetchall()
+            if not rows:
+                return 0
+            sent = dict(self._db.execute("SELECT recipient, last_id FROM digest_sent").fetchall())
+            error = None
+            for recipient in self.digest_recipients:
+                entries = [json.loads(entry) for row_id, entry in rows if row_id > sent.get(recipient, 0)]
+                if not entries:
+                    continue
+                subject, body = format_digest(entries)
+                try:
+                    self.send(recipient, subject, body)
+                except Exception as e:
+                    error = error or e
+                    continue
+                sent[recipient] = rows[-1][0]
+                self._db.execute(
+                    "INSERT OR REPLACE INTO digest_sent (recipient, last_id) VALUES (?, ?)",
+                    (recipient, rows[-1][0]),
+                )
+            done = min((sent.get(r, 0) for r in self.digest_recipients), default=rows[-1][0])
+            self._db.execute("DELETE FROM digest WHERE id <= ?", (done,))
+            if error is not None:
+                raise error
+        return sum(1 for row_id, _ in rows if row_id <= done)
+
+    def start_digest(self, format_digest):
+        """Flush the digest every `digest_interval` seconds on a background thread"""
+        if not self.digest_enabled or self._digest_thread is not None:
+            return
+
+        def run():
+            while not self._stopping.wait(self.digest_interval):
+                try:
+                    self.flush_digest(format_digest)
+                except Exception:
+                    logger.exception("Failed to send admin digest")
+
+        self._digest_thread = threading.Thread(target=run, name="outbox-digest", daemon=True)
+        self._digest_thread.start()
+
+    def close(self):
+        self._stopping.set()
+        self.pool.close()
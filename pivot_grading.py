@@ -0,0 +1,165 @@
+"""Automatic grading of PivotTable answers from an uploaded Excel workbook.
+
+The workbook is streamed with openpyxl in read-only, values-only mode, so
+what is read are the values Excel last rendered into each pivot's cells.
+Each question's expected result is a plain dict from
+`dataset.expected_pivots`:
+
+    {"kind": "series", "values": {row label: value}}
+    {"kind": "crosstab", "values": {row label: {column label: value}}}
+
+A question is graded "correct" when a block of cells in some sheet shows
+every expected label with its value; otherwise it is left for manual
+review. Auto-grading only ever awards credit, never takes it away.
+
+Like imaging.py this runs in the process pool. Reads are capped by
+uncompressed size, cell count and a deadline, so a hostile or huge file
+costs a bounded amount of time and memory in a worker process.
+"""
+import time
+import zipfile
+
+from blobs import open_source
+
+MAX_UNCOMPRESSED_BYTES = 50 * 1024 * 1024
+MAX_CELLS = 200_000
+MAX_SECONDS = 10
+TOLERANCE = 0.5
+
+CORRECT = "correct"
+REVIEW = "review"
+
+
+class WorkbookRejected(Exception):
+    """The workbook can't be graded automatically and goes to manual review"""
+
+
+def _cell(value):
+    """Normalise a cell to a casefolded label, a float, or None"""
+    if isinstance(value, str):
+        value = value.strip()
+        return value.casefold() if value else None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return None
+
+
+def read_sheets(data, max_cells=MAX_CELLS, deadline=None):
+    """Return each worksheet as a list of non-empty rows of `(column, value)` pairs.
+
+    `data` is the workbook's bytes or the path of a spilled upload.
+    """
+    # openpyxl and zipfile want a real file object, not a memory map
+    with open_source(data, mapped=False) as stream:
+        return _read_sheets(stream, max_cells, deadline)
+
+
+def _read_sheets(stream, max_cells, deadline):
+    from openpyxl import load_workbook
+
+    try:
+        archive = zipfile.ZipFile(stream)
+    except zipfile.BadZipFile:
+        raise WorkbookRejected("not an .xlsx file")
+    with archive:
+        if sum(info.file_size for info in archive.infolist()) > MAX_UNCOMPRESSED_BYTES:
+            raise WorkbookRejected("workbook is too large to grade automatically")
+
+    try:
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+    except Exception as e:
+        raise WorkbookRejected(f"couldn't open workbook ({type(e).__name__})")
+    sheets = []
+    cells = 0
+    try:
+        for worksheet in workbook.worksheets:
+            # Ignore the stored dimension, which can claim far more rows than exist
+            worksheet.reset_dimensions()
+            rows = []
+            for row in worksheet.iter_rows(values_only=True):
+                cells += len(row)
+                if cells > max_cells:
+                    raise WorkbookRejected("workbook has too many cells to grade automatically")
+                if deadline is not None and time.monotonic() > deadline:
+                    raise WorkbookRejected("workbook took too long to read")
+                compact = [(column, value) for column, value in ((c, _cell(v)) for c, v in enumerate(row))
+                           if value is not None]
+                if compact:
+                    rows.append(compact)
+            sheets.append(rows)
+    finally:
+        workbook.close()
+    return sheets
+
+
+def _matches(cell, value):
+    return isinstance(cell, float) and abs(cell - value) <= TOLERANCE
+
+
+def _row_label(row):
+    """The single text label of a pivot row, or None for header and raw data rows"""
+    labels = [value for _, value in row if isinstance(value, str)]
+    return labels[0] if len(labels) == 1 else None
+
+
+def match_series(sheets, expected):
+    want = {label.casefold(): float(value) for label, value in expected.items()}
+    for rows in sheets:
+        found = set()
+        for row in rows:
+            label = _row_label(row)
+            if label in want and any(_matches(v, want[label]) for _, v in row):
+                found.add(label)
+        if found == set(want):
+            return True
+    return False
+
+
+def match_crosstab(sheets, expected):
+    """True if some sheet holds the table with rows and columns either way round"""
+    transposed = {}
+    for row_label, columns in expected.items():
+        for column_label, value in columns.items():
+            transposed.setdefault(column_label, {})[row_label] = value
+    return any(_match_table(rows, table) for rows in sheets for table in (expected, transposed))
+
+
+def _match_table(rows, expected):
+    want = {r.casefold(): {c.casefold(): float(v) for c, v in columns.items()} for r, columns in expected.items()}
+    column_labels = set().union(*(columns.keys() for columns in want.values()))
+    header = None
+    found = set()
+    for row in rows:
+        labels = {value: column for column, value in row if isinstance(value, str)}
+        if column_labels <= labels.keys():
+            # A header naming every column: match the rows under it
+            header = {label: labels[label] for label in column_labels}
+            found = set()
+            continue
+        label = _row_label(row)
+        if header is None or label not in want:
+            continue
+        values = dict(row)
+        # Pivots leave empty combinations blank
+        if all(_matches(values.get(header[c], 0.0), v) for c, v in want[label].items()):
+            found.add(label)
+        if found == set(want):
+            return True
+    return False
+
+
+def manual_review(question_ids, reason):
+    return {"status": "manual_review", "grades": {q_id: REVIEW for q_id in question_ids}, "reason": reason}
+
+
+def grade_workbook(data, expected, max_seconds=MAX_SECONDS, max_cells=MAX_CELLS):
+    """Grade every question in `expected`; returns {"status", "grades", "reason"}"""
+    try:
+        sheets = read_sheets(data, max_cells, time.monotonic() + max_seconds)
+    except WorkbookRejected as e:
+        return manual_review(expected, str(e))
+    grades = {}
+    for q_id, spec in expected.items():
+        match = match_series if spec["kind"] == "series" else match_crosstab
+        grades[q_id] = CORRECT if match(sheets, spec["values"]) else REVIEW
+    return {"status": "graded", "grades": grades, "reason": None}
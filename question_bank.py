@@ -0,0 +1,113 @@
+"""Question bank loaded from a JSON file, and seeded per-candidate test forms.
+
+A form is a list of `[question_id, option_order]` pairs: the questions a
+candidate sees, in the order they see them, with `option_order` listing
+the original option indices in display order. Answers are always stored
+as the original option letter, so scoring, analytics and the sheet
+columns don't depend on how a form was shuffled.
+"""
+import hashlib
+import json
+import random
+
+
+def letter(index):
+    return chr(97 + index)  # a, b, c, d
+
+
+class Question:
+    """One multiple-choice question with its answer key"""
+
+    __slots__ = ("id", "text", "options", "answer", "shuffle_options", "image", "image_caption", "letters")
+
+    def __init__(self, id, text, options, answer, shuffle_options=True, image=None, image_caption=None):
+        self.id = id
+        self.text = text
+        self.options = list(options)
+        self.answer = answer
+        self.shuffle_options = shuffle_options
+        self.image = image
+        self.image_caption = image_caption
+        self.letters = [letter(i) for i in range(len(self.options))]
+
+    def html(self, number):
+        return f"""
+    <div class="question-box">
+    <strong>Question {number}:</strong> {self.text}
+    </div>
+    """
+
+    def choices(self, order):
+        """Original letters in display order, and the label shown for each"""
+        return ([self.letters[i] for i in order],
+                {self.letters[i]: f"{letter(position)}. {self.options[i]}" for position, i in enumerate(order)})
+
+    def display_letter(self, order, answer):
+        """The letter a candidate saw for the option stored as `answer`"""
+        return letter(order.index(self.letters.index(answer)))
+
+
+class QuestionBank:
+    """All questions by id, loaded once; `version` identifies the file contents"""
+
+    def __init__(self, questions, version=""):
+        self.questions = {}
+        for question in questions:
+            if question.id in self.questions:
+                raise ValueError(f"Duplicate question id '{question.id}'")
+            if question.answer not in question.letters:
+                raise ValueError(f"Question '{question.id}' has no option '{question.answer}'")
+            self.questions[question.id] = question
+        self.answer_key = {q_id: question.answer for q_id, question in self.questions.items()}
+        self.version = version
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            raw = f.read()
+        data = json.loads(raw)
+        return cls([Question(**item) for item in data["questions"]], hashlib.sha256(raw).hexdigest()[:12])
+
+    def __getitem__(self, q_id):
+        return self.questions[q_id]
+
+    def __len__(self):
+        return len(self.questions)
+
+    def _sample(self, rng, size):
+        ids = list(self.questions)
+        if size and size < len(ids):
+            sampled = set(rng.sample(ids, size))
+            ids = [q_id for q_id in ids if q_id in sampled]
+        return ids
+
+    def form_questions(self, seed, size=None):
+        """Ids of the questions on `seed`'s form, in bank order; drawn exactly as `form` draws them"""
+        return self._sample(random.Random(seed), size)
+
+    def presented(self, form, answers):
+        """Ids of the questions a stored submission was shown, or None if it was shown the whole bank.
+
+        A sampled form is drawn again from its seed. If it came from another
+        version of the bank that can't be reproduced, so the questions the
+        candidate answered stand in for it.
+        """
+        if not form or not form.get("size") or form["size"] >= len(self):
+            return None
+        if form.get("bank_version") == self.version:
+            return self.form_questions(form["seed"], form["size"])
+        return [q_id for q_id in self.questions if answers.get(q_id)]
+
+    def form(self, seed, size=None, shuffle_questions=True):
+        """Deterministic form for `seed`: `size` sampled questions (all if None), options shuffled"""
+        rng = random.Random(seed)
+        ids = self._sample(rng, size)
+        if shuffle_questions:
+            rng.shuffle(ids)
+        form = []
+        for q_id in ids:
+            order = list(range(len(self.questions[q_id].options)))
+            if self.questions[q_id].shuffle_options:
+                rng.shuffle(order)
+            form.append([q_id, order])
+        return form
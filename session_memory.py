@@ -0,0 +1,87 @@
+"""Per-session memory accounting: approximate session state footprints against a budget"""
+import os
+import statistics
+import sys
+import threading
+import time
+
+
+def footprint(value, seen=None):
+    """Approximate bytes held by a value, following containers and counting DataFrames deeply"""
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if hasattr(value, "memory_usage") and hasattr(value, "columns"):  # pandas DataFrame
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if hasattr(value, "nbytes") and not isinstance(value, (bytes, bytearray, memoryview)):  # numpy arrays
+        return int(value.nbytes)
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(footprint(k, seen) + footprint(v, seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(footprint(v, seen) for v in value)
+    return size
+
+
+def resident_bytes():
+    """The process's current resident set size (Linux), or its peak where /proc isn't available"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class SessionMemory:
+    """Latest measured footprint of every live session, shared process-wide.
+
+    `measure` is called once per rerun with the session's state. When the
+    total is over `budget` bytes, entries named in `evictable` (values that
+    can be recomputed on demand) are dropped, biggest first, until it fits.
+    Sessions not seen for `stale_after` seconds are forgotten.
+    """
+
+    def __init__(self, budget, stale_after=3600):
+        self.budget = budget
+        self.stale_after = stale_after
+        self.evictions = 0
+        self.bytes_evicted = 0
+        self._lock = threading.Lock()
+        self._sessions = {}
+
+    def measure(self, session_id, state, evictable=()):
+        """Record `state`'s footprint, evicting from it if over budget; returns the evicted keys"""
+        sizes = {key: footprint(value) for key, value in state.items()}
+        evicted = []
+        candidates = sorted((key for key in evictable if key in sizes), key=sizes.get, reverse=True)
+        while sum(sizes.values()) > self.budget and candidates:
+            key = candidates.pop(0)
+            del state[key]
+            evicted.append(key)
+            with self._lock:
+                self.evictions += 1
+                self.bytes_evicted += sizes.pop(key)
+        now = time.monotonic()
+        with self._lock:
+            self._sessions[session_id] = (now, sum(sizes.values()), max(sizes, key=sizes.get, default=None))
+            for stale in [sid for sid, (seen, _, _) in self._sessions.items() if now - seen > self.stale_after]:
+                del self._sessions[stale]
+        return evicted
+
+    def stats(self):
+        with self._lock:
+            totals = sorted(total for _, total, _ in self._sessions.values())
+            largest_keys = [key for _, _, key in self._sessions.values() if key]
+        return {
+            "sessions": len(totals),
+            "total_bytes": sum(totals),
+            "p50_bytes": statistics.median(totals) if totals else 0,
+            "max_bytes": totals[-1] if totals else 0,
+            "over_budget": sum(1 for total in totals if total > self.budget),
+            "evictions": self.evictions,
+            "bytes_evicted": self.bytes_evicted,
+            "largest_key": statistics.mode(largest_keys) if largest_keys else None,
+        }
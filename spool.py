@@ -0,0 +1,169 @@
+"""Write-ahead spool that batches submissions into Google Sheets `append_rows` calls"""
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class SheetSpool:
+    """Durable queue of submissions waiting to be appended to the sheet.
+
+    `add` records a submission on disk and returns immediately; a flusher
+    thread appends whatever is pending in batches of up to `batch_size`
+    with a single `append_rows` call, backing off (with jitter) while the
+    API is failing. Delivery is exactly-once: every row carries its
+    submission ID, a row is marked as attempted before the call goes out,
+    and any batch containing previously attempted rows is first checked
+    against the sheet's Submission ID column so a replay never appends a
+    row twice.
+    """
+
+    def __init__(self, path, storage, batch_size=50, flush_interval=2.0,
+                 retry_delay=1.0, max_retry_delay=60.0, on_flush=None):
+        self.storage = storage
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.on_flush = on_flush
+        self.append_calls = 0
+        self.rows_flushed = 0
+        self.duplicates_skipped = 0
+        self.failures = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS spool (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                submission_id TEXT NOT NULL UNIQUE,
+                payload TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created REAL NOT NULL
+            )
+        """)
+
+    def add(self, submission):
+        """Durably queue a submission; adding the same submission ID again is a no-op"""
+        with self._wakeup:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO spool (submission_id, payload, created) VALUES (?, ?, ?)",
+                (submission["submission_id"], json.dumps(submission), time.time())
+            )
+            if self._pending() >= self.batch_size:
+                self._wakeup.notify()
+
+    def _pending(self):
+        return self._conn.execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+
+    def pending(self):
+        with self._lock:
+            return self._pending()
+
+    def spooled(self):
+        """Submissions still waiting to be appended, oldest first"""
+        with self._lock:
+            rows = self._conn.execute("SELECT payload FROM spool ORDER BY seq").fetchall()
+        return [json.loads(payload) for payload, in rows]
+
+    def flush(self):
+        """Append one batch of pending rows; returns the number of rows written"""
+        with self._flush_lock:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT seq, submission_id, payload, attempts FROM spool ORDER BY seq LIMIT ?",
+                    (self.batch_size,)
+                ).fetchall()
+            if not rows:
+                return 0
+
+            if any(attempts for _, _, _, attempts in rows):
+                # An earlier call may have landed without us hearing back
+                stored = self.storage.submission_ids()
+                landed = [seq for seq, submission_id, _, _ in rows if submission_id in stored]
+                if landed:
+                    self._delete(landed)
+                    self.duplicates_skipped += len(landed)
+                    rows = [row for row in rows if row[0] not in landed]
+                    if not rows:
+                        return 0
+
+            seqs = [seq for seq, _, _, _ in rows]
+            with self._lock:
+                self._conn.execute(
+                    f"UPDATE spool SET attempts = attempts + 1 WHERE seq IN ({','.join('?' * len(seqs))})", seqs
+                )
+            submissions = [json.loads(payload) for _, _, payload, _ in rows]
+            self.append_calls += 1
+            position = self.storage.append_many(submissions)
+            self._delete(seqs)
+            self.rows_flushed += len(submissions)
+            if self.on_flush:
+                self.on_flush(submissions, position)
+            return len(submissions)
+
+    def _delete(self, seqs):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM spool WHERE seq IN ({','.join('?' * len(seqs))})", seqs)
+
+    def start(self):
+        """Start the flusher thread (idempotent)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="sheet-spool", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        consecutive_failures = 0
+        while True:
+            with self._wakeup:
+                if consecutive_failures:
+                    # Back off without letting new submissions cut the delay short
+                    delay = min(self.max_retry_delay, self.retry_delay * 2 ** min(consecutive_failures - 1, 16))
+                    resume_at = time.monotonic() + delay * random.uniform(0.5, 1.0)
+                    while not self._stopping and time.monotonic() < resume_at:
+                        self._wakeup.wait(resume_at - time.monotonic())
+                elif not self._stopping and self._pending() < self.batch_size:
+                    # Give a burst of submissions time to collect into one batch
+                    self._wakeup.wait(self.flush_interval)
+                if self._stopping:
+                    return
+            try:
+                while self.flush() == self.batch_size:
+                    pass
+            except Exception as e:
+                consecutive_failures += 1
+                self.failures += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                logger.warning("Failed to flush submissions to Google Sheets: %s", self.last_error)
+            else:
+                consecutive_failures = 0
+
+    def stats(self):
+        return {
+            "pending": self.pending(),
+            "append_calls": self.append_calls,
+            "rows_flushed": self.rows_flushed,
+            "duplicates_skipped": self.duplicates_skipped,
+            "failures": self.failures,
+            "last_error": self.last_error
+        }
@@ -0,0 +1,365 @@
+"""Submission storage backends: an indexed local SQLite store and the Google Sheet.
+
+Both expose the same small interface used by `save_submission`, the
+submissions cache and the dashboard:
+
+    append(submission) -> 0-based position of the new record, or None if unknown
+    append_many(submissions) -> position of the first of several records
+    count()            -> number of stored submissions
+    load_since(offset) -> submissions from position `offset` onwards, oldest first
+    find(...)          -> submissions filtered by employee ID, departments, name search, status and time
+    update_scores(updates) -> rewrite score/total/percentage for positions, in bulk
+    unstored_answers(question_ids) -> the ids whose answers this backend can't keep
+
+Submissions are the dicts built by `submit_test`. The SQLite backend keeps
+scores and percentages as numbers; only the sheet formats them as "6/8"
+and "75.0%". Every submission carries a `submission_id`; storing the same
+one twice is a no-op in SQLite and is prevented by the spool for the sheet.
+Its `form` (question bank version, seed, size and shuffling) is kept as
+JSON, so the exact form a candidate saw can be drawn again for an audit.
+"""
+import json
+import re
+import sqlite3
+import threading
+
+# Column headers of the submissions sheet, in row order
+SHEET_HEADER = [
+    "Timestamp", "Name", "Employee ID", "Department", "Email", "MCQ Score", "Percentage", "Status",
+    "Q1", "Q2", "Q3", "Q4", "Q5", "Q6", "Q7", "Q8",
+    "Q9a Screenshot URL", "Q9b Screenshot URL", "Q10 Screenshot URL",
+    "Q9a Thumbnail URL", "Q9b Thumbnail URL", "Q10 Thumbnail URL",
+    "Submission ID",
+    "Q9a Auto Grade", "Q9b Auto Grade", "Q10 Auto Grade", "Pivot Workbook URL",
+    "Form"
+]
+SUBMISSION_ID_COLUMN = SHEET_HEADER.index("Submission ID") + 1
+SCORE_COLUMN = SHEET_HEADER.index("MCQ Score") + 1  # followed by Percentage and Status
+
+_UPDATED_ROW = re.compile(r"![A-Z]+(\d+)")
+
+
+def column_letter(col):
+    """Sheet column letters for a 1-based column number"""
+    letters = ""
+    while col:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def rowcol_to_a1(row, col):
+    """A1 notation for a 1-based row/column (kept local so gspread stays a lazy import)"""
+    return f"{column_letter(col)}{row}"
+
+
+FIXED_COLUMNS = {
+    "Timestamp", "Name", "Employee ID", "Department", "Email", "MCQ Score", "Percentage", "Status", "Submission ID",
+    "Form"
+}
+
+
+def answer_key(column):
+    """Answers key for a non-fixed sheet column ("Q9a Auto Grade" -> q9a_auto_grade)"""
+    return column.lower().replace(" ", "_")
+
+
+# Only these answers survive a round trip through the sheet
+ANSWER_KEYS = {answer_key(column) for column in SHEET_HEADER if column not in FIXED_COLUMNS}
+
+
+def passed(percentage):
+    return percentage >= 70
+
+
+def sheet_row(submission):
+    """Format a submission as one row of the sheet, in SHEET_HEADER order"""
+    answers = submission["answers"]
+    info = submission["user_info"]
+    values = {
+        "Timestamp": submission["timestamp"],
+        "Name": info["name"],
+        "Employee ID": info["employee_id"],
+        "Department": info["department"],
+        "Email": info["email"],
+        "MCQ Score": f"{submission['score']}/{submission['total']}",
+        "Percentage": f"{submission['percentage']:.1f}%",
+        "Status": "PASS" if passed(submission["percentage"]) else "FAIL",
+        "Submission ID": submission.get("submission_id", ""),
+        # Bank version, seed, size and shuffling: enough to draw the candidate's form again
+        "Form": json.dumps(submission["form"], sort_keys=True) if submission.get("form") else ""
+    }
+    # Everything else holds an answer, an auto-grade or an upload URL
+    return [values[column] if column in values else answers.get(answer_key(column), "")
+            for column in SHEET_HEADER]
+
+
+def parse_sheet_record(record):
+    """Turn one sheet row (as a header -> value dict) into a submission dict"""
+    # Every column that isn't a fixed field is an answer, grade or upload URL
+    answers = {answer_key(key): value for key, value in record.items() if key not in FIXED_COLUMNS}
+    return {
+        "submission_id": record.get("Submission ID", ""),
+        "timestamp": record["Timestamp"],
+        "user_info": {
+            "name": record["Name"],
+            "employee_id": record["Employee ID"],
+            "department": record["Department"],
+            "email": record["Email"]
+        },
+        "score": int(record["MCQ Score"].split("/")[0]),
+        "total": int(record["MCQ Score"].split("/")[1]),
+        "percentage": float(record["Percentage"].replace("%", "")),
+        "answers": answers,
+        "form": json.loads(record["Form"]) if record.get("Form") else None
+    }
+
+
+class SubmissionStorage:
+    """Base class for storage backends; `find` falls back to filtering everything in Python"""
+
+    name = "base"
+
+    def append(self, submission):
+        raise NotImplementedError
+
+    def append_many(self, submissions):
+        position = None
+        for i, submission in enumerate(submissions):
+            stored_at = self.append(submission)
+            if i == 0:
+                position = stored_at
+        return position
+
+    def count(self):
+        raise NotImplementedError
+
+    def unstored_answers(self, question_ids):
+        """Ids among `question_ids` whose answers this backend doesn't keep"""
+        return []
+
+    def load_since(self, offset):
+        raise NotImplementedError
+
+    def update_scores(self, updates):
+        """Apply `{"position", "score", "total", "percentage"}` dicts in one write"""
+        raise NotImplementedError
+
+    def find(self, employee_id=None, departments=None, search=None, status=None, since=None, until=None):
+        """Submissions matching every given filter, oldest first.
+
+        `search` is a case-insensitive substring of the name or employee ID,
+        `status` is "PASS" or "FAIL", and `since`/`until` compare ISO
+        timestamps.
+        """
+        needle = search.casefold() if search else None
+        return [
+            s for s in self.load_since(0)
+            if (employee_id is None or str(s["user_info"]["employee_id"]) == str(employee_id))
+            and (not departments or s["user_info"]["department"] in departments)
+            and (needle is None or needle in s["user_info"]["name"].casefold()
+                 or needle in str(s["user_info"]["employee_id"]).casefold())
+            and (status is None or passed(s["percentage"]) == (status == "PASS"))
+            and (since is None or s["timestamp"] >= since)
+            and (until is None or s["timestamp"] < until)
+        ]
+
+
+class SheetsStorage(SubmissionStorage):
+    """Submissions kept as formatted rows in a gspread worksheet"""
+
+    name = "sheets"
+
+    def __init__(self, sheet):
+        self.sheet = sheet
+        self._header = None
+
+    def append(self, submission):
+        return self.append_many([submission])
+
+    def unstored_answers(self, question_ids):
+        """The sheet has a fixed set of answer columns; anything else is dropped on append"""
+        return [q_id for q_id in question_ids if q_id not in ANSWER_KEYS]
+
+    def append_many(self, submissions):
+        """Append every submission with a single `append_rows` call"""
+        response = self.sheet.append_rows([sheet_row(submission) for submission in submissions])
+        match = _UPDATED_ROW.search(response.get("updates", {}).get("updatedRange", "")) if response else None
+        return int(match.group(1)) - 2 if match else None
+
+    def submission_ids(self):
+        """Set of submission IDs already in the sheet"""
+        return set(self.submission_positions())
+
+    def submission_positions(self):
+        """Submission ID -> position, for rows that have one"""
+        ids = self.sheet.col_values(SUBMISSION_ID_COLUMN)[1:]
+        return {submission_id: position for position, submission_id in enumerate(ids) if submission_id}
+
+    def update_scores(self, updates):
+        """Rewrite MCQ Score, Percentage and Status for each row with one `batch_update` call"""
+        if not updates:
+            return
+        data = []
+        for update in updates:
+            row = update["position"] + 2
+            data.append({
+                "range": f"{rowcol_to_a1(row, SCORE_COLUMN)}:{rowcol_to_a1(row, SCORE_COLUMN + 2)}",
+                "values": [[f"{update['score']}/{update['total']}", f"{update['percentage']:.1f}%",
+                            "PASS" if passed(update["percentage"]) else "FAIL"]]
+            })
+        self.sheet.batch_update(data)
+
+    def count(self):
+        # Column A is the timestamp, which every row has
+        return max(0, len(self.sheet.col_values(1)) - 1)
+
+    def load_since(self, offset):
+        if offset == 0 or self._header is None:
+            values = self.sheet.get_all_values()
+            self._header = values[0] if values else None
+            rows = values[1 + offset:]
+        else:
+            # Open-ended range: every row from the first one we don't have yet
+            rows = self.sheet.get_values(f"{rowcol_to_a1(offset + 2, 1)}:{column_letter(len(self._header))}")
+        return [self._parse(row) for row in rows]
+
+    def _parse(self, row):
+        row = [str(value) for value in row] + [""] * (len(self._header) - len(row))
+        return parse_sheet_record(dict(zip(self._header, row)))
+
+
+class SQLiteStorage(SubmissionStorage):
+    """Submissions in a local SQLite database (WAL mode), indexed for dashboard queries"""
+
+    name = "sqlite"
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # SQLite's LIKE and lower() only fold ASCII; search names the way Python does
+        self._conn.create_function("casefold", 1, lambda value: value.casefold() if value else value,
+                                   deterministic=True)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS submissions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                submission_id TEXT,
+                timestamp TEXT NOT NULL,
+                name TEXT NOT NULL,
+                employee_id TEXT NOT NULL,
+                department TEXT NOT NULL,
+                email TEXT NOT NULL,
+                score INTEGER NOT NULL,
+                total INTEGER NOT NULL,
+                percentage REAL NOT NULL,
+                passed INTEGER NOT NULL,
+                answers TEXT NOT NULL,
+                form TEXT
+            )
+        """)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(submissions)")]
+        if "submission_id" not in columns:
+            self._conn.execute("ALTER TABLE submissions ADD COLUMN submission_id TEXT")
+        if "form" not in columns:
+            self._conn.execute("ALTER TABLE submissions ADD COLUMN form TEXT")
+        self._conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS submissions_submission_id ON submissions (submission_id)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS submissions_employee ON submissions (employee_id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS submissions_department ON submissions (department, timestamp)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS submissions_timestamp ON submissions (timestamp)")
+
+    _COLUMNS = "submission_id, timestamp, name, employee_id, department, email, score, total, percentage, answers, form"
+
+    def append(self, submission):
+        """Store a submission; returns None without storing it again if its ID is already present"""
+        info = submission["user_info"]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                inserted = self._conn.execute(
+                    "INSERT OR IGNORE INTO submissions (submission_id, timestamp, name, employee_id, department, "
+                    "email, score, total, percentage, passed, answers, form) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (submission.get("submission_id"), submission["timestamp"], info["name"],
+                     str(info["employee_id"]), info["department"], info["email"], submission["score"],
+                     submission["total"], submission["percentage"], int(passed(submission["percentage"])),
+                     json.dumps(submission["answers"]),
+                     json.dumps(submission["form"]) if submission.get("form") else None)
+                ).rowcount
+                position = self._conn.execute("SELECT COUNT(*) FROM submissions").fetchone()[0] - 1
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return position if inserted else None
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM submissions").fetchone()[0]
+
+    def load_since(self, offset):
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {self._COLUMNS} FROM submissions ORDER BY id LIMIT -1 OFFSET ?", (offset,)
+            ).fetchall()
+        return [self._submission(row) for row in rows]
+
+    def update_scores(self, updates):
+        if not updates:
+            return
+        with self._lock:
+            ids = [row[0] for row in self._conn.execute("SELECT id FROM submissions ORDER BY id")]
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "UPDATE submissions SET score = ?, total = ?, percentage = ?, passed = ? WHERE id = ?",
+                    [(u["score"], u["total"], u["percentage"], int(passed(u["percentage"])), ids[u["position"]])
+                     for u in updates]
+                )
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def find(self, employee_id=None, departments=None, search=None, status=None, since=None, until=None):
+        """One query using the employee, department and timestamp indexes"""
+        clauses, params = [], []
+        for clause, value in (("employee_id = ?", None if employee_id is None else str(employee_id)),
+                              ("passed = ?", None if status is None else int(status == "PASS")),
+                              ("timestamp >= ?", since),
+                              ("timestamp < ?", until)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        if departments:
+            clauses.append(f"department IN ({','.join('?' * len(departments))})")
+            params.extend(departments)
+        if search:
+            clauses.append("(instr(casefold(name), ?) > 0 OR instr(casefold(employee_id), ?) > 0)")
+            params.extend([search.casefold()] * 2)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {self._COLUMNS} FROM submissions {where} ORDER BY id", params
+            ).fetchall()
+        return [self._submission(row) for row in rows]
+
+    @staticmethod
+    def _submission(row):
+        return {
+            "submission_id": row[0],
+            "timestamp": row[1],
+            "user_info": {"name": row[2], "employee_id": row[3], "department": row[4], "email": row[5]},
+            "score": row[6],
+            "total": row[7],
+            "percentage": row[8],
+            "answers": json.loads(row[9]),
+            "form": json.loads(row[10]) if row[10] else None
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
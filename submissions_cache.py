@@ -0,0 +1,76 @@
+"""Shared, incrementally refreshed cache of submissions read from a storage backend"""
+import threading
+import time
+
+
+class SubmissionsCache:
+    """Parsed submissions shared by every session in the process.
+
+    A full `load_since(0)` only happens on first use or after
+    `invalidate(full=True)`. Otherwise a refresh asks the backend for its
+    current count and loads just the submissions added since the last one
+    we saw. Appends made through `record_append` are written through without
+    any read at all.
+    """
+
+    def __init__(self, storage, ttl=30):
+        self.storage = storage
+        self.ttl = ttl
+        self.version = 0
+        self._lock = threading.RLock()
+        self._submissions = []
+        self._checked_at = 0.0
+        self._needs_full_reload = True
+
+    def get(self):
+        """Return the cached submissions, refreshing first if the TTL has expired"""
+        with self._lock:
+            if self._needs_full_reload or time.monotonic() - self._checked_at >= self.ttl:
+                self.refresh()
+            return list(self._submissions)
+
+    def invalidate(self, full=False):
+        """Force a refresh on the next `get`; `full` re-reads every submission"""
+        with self._lock:
+            self._checked_at = 0.0
+            if full:
+                self._needs_full_reload = True
+
+    def refresh(self):
+        with self._lock:
+            if self._needs_full_reload:
+                self._full_reload()
+            else:
+                count = self.storage.count()
+                if count < len(self._submissions):
+                    # Records were deleted or the store was rewritten
+                    self._full_reload()
+                elif count > len(self._submissions):
+                    self._extend(self.storage.load_since(len(self._submissions)))
+            self._checked_at = time.monotonic()
+
+    def record_append(self, submission, position):
+        """Write through a submission the backend just stored at `position`.
+
+        It is only cached directly if it landed right after the last one we
+        know about; otherwise another writer got in between and the next
+        refresh picks everything up incrementally.
+        """
+        with self._lock:
+            if self._needs_full_reload:
+                return
+            if position == len(self._submissions):
+                self._extend([submission])
+            else:
+                self._checked_at = 0.0
+
+    def _full_reload(self):
+        self._submissions = []
+        self._extend(self.storage.load_since(0))
+        self.version += 1
+        self._needs_full_reload = False
+
+    def _extend(self, submissions):
+        self._submissions.extend(submissions)
+        if submissions:
+            self.version += 1
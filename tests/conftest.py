@@ -0,0 +1,35 @@
+"""The app's modules live at the repository root, next to app.py; the fake backends under benchmarks/"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+
+USER_INFO_FIELDS = ("name", "employee_id", "department", "email")
+
+
+@pytest.fixture
+def make_submission():
+    """Builds a stored submission; keyword arguments replace its fields, user_info's included.
+
+    Pass `submission_id=None` for a record saved before submissions had IDs.
+    """
+    def make(submission_id="s1", **fields):
+        record = {
+            "timestamp": "2026-01-01T09:00:00",
+            "user_info": {"name": "A", "employee_id": "E1", "department": "IT", "email": "a@example.com"},
+            "answers": {"q1": "a"},
+            "score": 1,
+            "total": 8,
+            "percentage": 12.5
+        }
+        if submission_id is not None:
+            record["submission_id"] = submission_id
+        for key in USER_INFO_FIELDS:
+            if key in fields:
+                record["user_info"][key] = fields.pop(key)
+        record.update(fields)
+        return record
+    return make
@@ -0,0 +1,82 @@
+import sqlite3
+
+import pytest
+
+from aggregates import AggregateStore
+from analytics import aggregate_analytics
+from question_bank import Question, QuestionBank
+
+BANK = QuestionBank([Question(f"q{i}", f"Question {i}", ["A", "B", "C", "D"], "a") for i in range(1, 9)], version="v1")
+
+
+@pytest.fixture
+def submission(make_submission):
+    def make(submission_id, employee_id, percentage, **fields):
+        return make_submission(submission_id, employee_id=employee_id, percentage=percentage,
+                               answers={"q1": "a", "q2": "b"}, **fields)
+    return make
+
+
+def test_a_retried_save_is_counted_once(tmp_path, submission):
+    store = AggregateStore(str(tmp_path / "aggregates.db"))
+
+    assert store.add(submission("s1", "E1", 100.0), BANK)
+    assert not store.add(submission("s1", "E1", 100.0), BANK)
+
+    snapshot = store.snapshot()
+    assert snapshot["submissions"] == 1
+    assert snapshot["answers"] == {"q1": {"a": 1}, "q2": {"b": 1}}
+    assert snapshot["presented"] == {f"q{i}": 1 for i in range(1, 9)}
+
+
+def test_records_without_a_submission_id_dedupe_on_timestamp_and_employee(tmp_path, submission):
+    store = AggregateStore(str(tmp_path / "aggregates.db"))
+
+    assert store.add(submission(None, "E1", 50.0), BANK)
+    assert not store.add(submission(None, "E1", 50.0), BANK)
+    assert store.add(submission(None, "E2", 100.0), BANK)
+
+    snapshot = store.snapshot()
+    assert (snapshot["submissions"], snapshot["passed"], snapshot["percentage_sum"]) == (2, 1, 150.0)
+
+
+def test_rebuild_starts_over_and_skips_duplicates(tmp_path, submission):
+    store = AggregateStore(str(tmp_path / "aggregates.db"))
+    store.add(submission("old", "E9", 10.0), BANK)
+
+    counted = store.rebuild([submission("s1", "E1", 80.0), submission("s1", "E1", 80.0),
+                             submission("s2", "E2", 40.0, department="HR")], BANK, "2026-01-02T00:00:00")
+
+    snapshot = store.snapshot()
+    assert counted == 2
+    assert [d["department"] for d in snapshot["departments"]] == ["HR", "IT"]
+    assert snapshot["submissions"] == 2
+    assert store.built_at() == "2026-01-02T00:00:00"
+
+
+def test_question_accuracy_counts_only_candidates_shown_the_question(tmp_path, make_submission):
+    store = AggregateStore(str(tmp_path / "aggregates.db"))
+    for seed in range(200):
+        form = {"bank_version": BANK.version, "seed": seed, "size": 4, "shuffle_questions": True}
+        answers = {q_id: "a" for q_id in BANK.form_questions(seed, 4)}
+        store.add(make_submission(f"s{seed}", answers=answers, form=form), BANK)
+
+    snapshot = store.snapshot()
+    accuracy, _, _, details = aggregate_analytics(snapshot, BANK.answer_key)
+
+    assert sum(snapshot["presented"].values()) == 200 * 4
+    assert accuracy == {q_id: 100.0 for q_id in BANK.answer_key}
+    assert all("Not answered" not in d["Answer Distribution"] for d in details)
+
+
+def test_a_store_from_before_presented_counts_asks_for_a_rebuild(tmp_path, submission):
+    path = str(tmp_path / "aggregates.db")
+    store = AggregateStore(path)
+    store.rebuild([submission("s1", "E1", 80.0)], BANK, "2026-01-02T00:00:00")
+    store.close()
+    conn = sqlite3.connect(path)
+    conn.execute("DROP TABLE presented")
+    conn.commit()
+    conn.close()
+
+    assert AggregateStore(path).built_at() is None
@@ -0,0 +1,79 @@
+import types
+
+import pytest
+from requests.exceptions import ConnectionError as RequestsConnectionError, ReadTimeout
+
+from api_client import APIClient, RateLimitedWorksheet, is_transient
+from fake_gspread import FakeWorksheet
+from spool import SheetSpool
+from storage import SHEET_HEADER, SheetsStorage
+
+
+class StatusError(Exception):
+    """Shaped like gspread.exceptions.APIError"""
+
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.response = types.SimpleNamespace(status_code=status)
+
+
+class FlakyWorksheet(FakeWorksheet):
+    """Applies the first `failures` appends and then reports them failed anyway, as a lost response would"""
+
+    def __init__(self, status, failures=1):
+        super().__init__(SHEET_HEADER)
+        self.status = status
+        self.failures = failures
+
+    def append_rows(self, rows, **kwargs):
+        response = super().append_rows(rows, **kwargs)
+        if self.failures:
+            self.failures -= 1
+            raise StatusError(self.status)
+        return response
+
+
+def client():
+    return APIClient({"sheets_read": 60000, "sheets_write": 60000}, retry_delay=0)
+
+
+def test_a_write_that_may_have_landed_is_not_retried():
+    worksheet = FlakyWorksheet(503)
+    with pytest.raises(StatusError):
+        RateLimitedWorksheet(worksheet, client()).append_rows([["row"]])
+    assert len(worksheet.rows) == 2
+    assert worksheet.calls["append_rows"] == 1
+
+
+def test_a_rate_limited_write_is_retried():
+    worksheet = FlakyWorksheet(429)
+    RateLimitedWorksheet(worksheet, client()).append_rows([["row"]])
+    assert worksheet.calls["append_rows"] == 2
+
+
+@pytest.mark.parametrize("error", [RequestsConnectionError("reset"), ReadTimeout("slow"), StatusError(503)])
+def test_reads_are_retried_on_transport_errors_and_5xx(error):
+    assert is_transient(error)
+    failures = [error]
+
+    def read():
+        if failures:
+            raise failures.pop()
+        return "ok"
+
+    assert client().call("sheets_read", read) == "ok"
+
+
+def test_spool_appends_each_submission_once_when_a_response_is_lost(make_submission):
+    worksheet = FlakyWorksheet(503)
+    spool = SheetSpool(":memory:", SheetsStorage(RateLimitedWorksheet(worksheet, client())))
+    spool.add(make_submission("s1"))
+
+    with pytest.raises(StatusError):
+        spool.flush()
+    assert spool.flush() == 0
+
+    ids = [row[SHEET_HEADER.index("Submission ID")] for row in worksheet.rows[1:]]
+    assert ids == ["s1"]
+    assert spool.duplicates_skipped == 1
+    assert spool.pending() == 0
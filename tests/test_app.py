@@ -0,0 +1,44 @@
+"""The app driven headlessly through Streamlit's AppTest"""
+import sys
+from pathlib import Path
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import fake_gspread
+from storage import SHEET_HEADER
+
+APP = str(Path(__file__).resolve().parent.parent / "app.py")
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # Credentials and the sheet come from fakes; monkeypatch puts the real modules back afterwards
+    for name in ("gspread", "gspread.utils", "google.oauth2.service_account"):
+        monkeypatch.setitem(sys.modules, name, sys.modules.get(name))
+    fake_gspread.install(fake_gspread.FakeWorksheet(SHEET_HEADER))
+    at = AppTest.from_file(APP, default_timeout=60)
+    secrets = {"admin_password": "secret", "admin_emails": "admin@example.com", "storage_backend": "sqlite",
+               "gcp_service_account": {}, "export_dir": str(tmp_path), "smtp_rate_limit": 0}
+    for key in ("job_queue_path", "outbox_path", "storage_path", "sheet_spool_path", "aggregates_path",
+                "checkpoints_path"):
+        secrets[key] = str(tmp_path / f"{key}.db")
+    secrets["regrade_audit_path"] = str(tmp_path / "regrade_audit.jsonl")
+    for key, value in secrets.items():
+        at.secrets[key] = value
+    return at
+
+
+def test_a_profiled_rerun_that_ends_in_st_rerun_still_keeps_its_profile(app):
+    app.run()
+    app.sidebar.selectbox[0].select("👨‍💼 Admin Dashboard").run()
+    app.text_input[0].input("secret")
+    next(b for b in app.button if b.label == "Login").click().run()
+    assert app.session_state["admin_authenticated"]
+
+    app.session_state["profile_next_rerun"] = True
+    next(b for b in app.button if b.label == "🚪 Admin Logout").click().run()
+
+    assert not app.exception
+    assert not app.session_state["admin_authenticated"]
+    assert "cumulative" in app.session_state["rerun_profile"][1]
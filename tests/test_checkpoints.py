@@ -0,0 +1,73 @@
+import checkpoints
+from checkpoints import CheckpointStore
+
+
+def checkpoint(index, answers=None):
+    return {"current_question": index, "answers": answers or {}}
+
+
+def test_saves_between_flushes_coalesce_into_one_write_per_candidate(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.db"))
+    for i in range(10):
+        store.save("E1", checkpoint(i))
+    store.save("E2", checkpoint(0))
+
+    assert store.flush() == 2
+    assert store.flush() == 0
+    stats = store.stats()
+    assert (stats["saves"], stats["writes"], stats["flushes"]) == (11, 2, 1)
+    assert (stats["saved"], stats["pending"]) == (2, 0)
+    assert store.load("E1") == checkpoint(9)
+
+
+def test_load_returns_checkpoints_not_yet_written(tmp_path):
+    path = str(tmp_path / "checkpoints.db")
+    store = CheckpointStore(path)
+    store.save("E1", checkpoint(1))
+    store.flush()
+    store.save("E1", checkpoint(2, {"q1": "a"}))
+
+    assert store.load("E1") == checkpoint(2, {"q1": "a"})
+    assert CheckpointStore(path).load("E1") == checkpoint(1)
+    assert store.load("E2") is None
+
+
+def test_delete_forgets_written_and_pending_checkpoints(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.db"))
+    store.save("E1", checkpoint(1))
+    store.flush()
+    store.save("E1", checkpoint(2))
+    store.delete("E1")
+
+    assert store.load("E1") is None
+    assert store.flush() == 0
+    assert store.stats()["saved"] == 0
+
+
+def test_checkpoints_older_than_max_age_expire_on_flush(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(checkpoints.time, "time", lambda: now[0])
+    store = CheckpointStore(str(tmp_path / "checkpoints.db"), max_age=3600)
+    store.save("E1", checkpoint(1))
+    store.flush()
+
+    now[0] += 3599
+    store.save("E2", checkpoint(1))
+    store.flush()
+    assert store.load("E1") == checkpoint(1)
+
+    now[0] += 2
+    store.save("E2", checkpoint(2))
+    store.flush()
+    assert store.load("E1") is None
+    assert store.load("E2") == checkpoint(2)
+
+
+def test_stop_writes_whatever_is_still_dirty(tmp_path):
+    path = str(tmp_path / "checkpoints.db")
+    store = CheckpointStore(path, flush_interval=60)
+    store.start()
+    store.save("E1", checkpoint(3))
+    store.stop()
+
+    assert CheckpointStore(path).load("E1") == checkpoint(3)
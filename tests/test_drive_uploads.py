@@ -0,0 +1,30 @@
+import pytest
+
+from api_client import APIClient
+from drive_uploads import DriveUploader
+from fake_drive import FakeDrive, fake_drive_service
+
+CHUNK = 256 * 1024
+
+
+@pytest.fixture
+def drive():
+    server = FakeDrive(fail_every=3).start()
+    yield server
+    server.stop()
+
+
+def test_a_multi_chunk_upload_resumes_after_failed_chunks(drive):
+    uploader = DriveUploader(lambda: fake_drive_service(drive.base_url),
+                             APIClient({"drive": 100000}, retry_delay=0), workers=1, chunk_size=CHUNK)
+    image = bytes(range(256)) * (600 * 1024 // 256)
+
+    links = uploader.submit(uploader.upload_files, [(image, "q9a.webp", "image/webp")], "folder").result(timeout=30)
+
+    assert len(links) == 1 and links[0].startswith("https://drive.google.com/file/d/")
+    counts = drive.counts
+    assert counts["chunks"] > 3 and counts["injected_failures"] >= 1
+    # Each failed chunk costs one progress query, and nothing already received is sent again
+    assert counts["status_queries"] == counts["injected_failures"]
+    assert counts.get("bytes_resent", 0) == 0
+    assert counts["permission_calls"] == 1
@@ -0,0 +1,59 @@
+from fake_gspread import FakeWorksheet
+from grading import regrade, score_updates
+from storage import SHEET_HEADER, SheetsStorage, SQLiteStorage, parse_sheet_record, sheet_row
+
+KEY = {f"q{i}": "a" for i in range(1, 9)}
+
+
+def scored(make_submission, submission_id, answers, key):
+    score = sum(answers.get(q_id) == answer for q_id, answer in key.items())
+    return make_submission(submission_id, answers=answers, score=score, total=len(key),
+                           percentage=100 * score / len(key))
+
+
+def through_sheet(submissions):
+    return [parse_sheet_record(dict(zip(SHEET_HEADER, sheet_row(s)))) for s in submissions]
+
+
+def test_a_fixed_key_changes_only_the_affected_scores(make_submission):
+    all_a = scored(make_submission, "s1", dict(KEY), KEY)
+    q2_b = scored(make_submission, "s2", dict(KEY, q2="b"), KEY)
+
+    result = regrade([all_a, q2_b], dict(KEY, q2="b"))
+
+    assert result["changed"].tolist() == [True, True]
+    assert result["new_score"].tolist() == [7, 8]
+    assert score_updates(result) == [
+        {"position": 0, "submission_id": "s1", "score": 7, "total": 8, "percentage": 87.5},
+        {"position": 1, "submission_id": "s2", "score": 8, "total": 8, "percentage": 100.0},
+    ]
+
+
+def test_a_sampled_form_keeps_its_total(make_submission):
+    form_of_four = make_submission("s1", answers={"q1": "a", "q2": "a", "q3": "b", "q4": "a"},
+                                   score=3, total=4, percentage=75.0)
+
+    result = regrade([form_of_four], KEY)
+
+    assert not result["changed"].any()
+    assert score_updates(result) == []
+
+
+def test_regrading_what_the_sheet_stored_changes_nothing(make_submission):
+    submissions = [scored(make_submission, "s1", dict(KEY), KEY),
+                   scored(make_submission, "s2", dict(KEY, q5="c", q8=""), KEY)]
+
+    result = regrade(through_sheet(submissions), KEY)
+
+    assert not result["changed"].any()
+    assert SheetsStorage(FakeWorksheet(SHEET_HEADER)).unstored_answers(list(KEY)) == []
+
+
+def test_the_sheet_reports_questions_it_has_no_column_for(make_submission, tmp_path):
+    key = dict(KEY, q9="a", q10="a")
+    everything_right = scored(make_submission, "s1", dict(key), key)
+
+    # The sheet drops q9 and q10, so re-scoring what it read back would lower a perfect score
+    assert regrade(through_sheet([everything_right]), key)["new_score"].tolist() == [8]
+    assert SheetsStorage(FakeWorksheet(SHEET_HEADER)).unstored_answers(list(key)) == ["q9", "q10"]
+    assert SQLiteStorage(str(tmp_path / "submissions.db")).unstored_answers(list(key)) == []
@@ -0,0 +1,68 @@
+import random
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from item_analysis import analyse_submissions
+from question_bank import QuestionBank
+
+BANK = QuestionBank.load(Path(__file__).resolve().parent.parent / "questions.json")
+
+
+def wrong(q_id):
+    return next(letter for letter in BANK[q_id].letters if letter != BANK.answer_key[q_id])
+
+
+def sampled_forms(make_submission, candidates, size, answer):
+    """Submissions on seeded `size`-question forms; `answer(i, q_id)` is True for a correct answer"""
+    submissions = []
+    for i in range(candidates):
+        form = {"bank_version": BANK.version, "seed": i, "size": size, "shuffle_questions": True}
+        answers = {q_id: BANK.answer_key[q_id] if answer(i, q_id) else wrong(q_id)
+                   for q_id in BANK.form_questions(i, size)}
+        submissions.append(make_submission(f"s{i}", answers=answers, form=form))
+    return submissions
+
+
+def test_questions_a_candidate_never_saw_are_not_scored_as_wrong(make_submission):
+    submissions = sampled_forms(make_submission, 400, 4, lambda i, q_id: True)
+
+    items = analyse_submissions(submissions, BANK)["items"]
+
+    assert items["difficulty"].tolist() == [1.0] * len(BANK)
+    assert items["omitted"].tolist() == [0.0] * len(BANK)
+    assert not items["review"].str.contains("negative").any()
+
+
+def test_item_statistics_follow_ability_on_sampled_forms(make_submission):
+    rng = random.Random(7)
+    ability = [rng.random() for _ in range(600)]
+    outcomes = {}
+
+    def answer(i, q_id):
+        outcomes[i, q_id] = rng.random() < ability[i]
+        return outcomes[i, q_id]
+
+    result = analyse_submissions(sampled_forms(make_submission, 600, 4, answer), BANK)
+    items = result["items"].set_index("question")
+
+    for q_id in BANK.answer_key:
+        seen = [correct for (_, question), correct in outcomes.items() if question == q_id]
+        assert items.loc[q_id, "difficulty"] == pytest.approx(np.mean(seen), abs=1e-6)
+    assert (items["discrimination"] > 0.2).all()
+    assert (items["point_biserial"] > 0).all()
+    assert 0 < result["kr20"] < 1
+
+
+def test_whole_bank_forms_count_every_question(make_submission):
+    answers = dict(BANK.answer_key, q1=wrong("q1"))
+    submissions = [make_submission("s1", answers=answers, form=None),
+                   make_submission("s2", answers=dict(BANK.answer_key),
+                                   form={"bank_version": BANK.version, "seed": 1, "size": None,
+                                         "shuffle_questions": True})]
+
+    items = analyse_submissions(submissions, BANK)["items"].set_index("question")
+
+    assert items.loc["q1", "difficulty"] == 0.5
+    assert items.loc["q2", "difficulty"] == 1.0
@@ -0,0 +1,85 @@
+import time
+
+import jobs
+from jobs import DONE, FAILED, PENDING, RUNNING, JobQueue
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def run_once(queue, error=None):
+    """Claim the next ready job and finish it the way a worker would"""
+    job, wait = queue._claim()
+    assert job is not None, f"no job ready (next in {wait}s)"
+    queue._finish(job, error)
+    return job
+
+
+def test_running_jobs_go_back_to_pending_when_the_queue_is_reopened(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    queue = JobQueue(path)
+    job_id = queue.enqueue("save_submission", {"submission_id": "s1"}, group="s1")
+    job, _ = queue._claim()
+    assert queue.status(job_id)["status"] == RUNNING
+    queue._conn.close()
+
+    reopened = JobQueue(path)
+    assert reopened.status(job_id) == {"kind": "save_submission", "status": PENDING, "attempts": 1, "error": None}
+    job, _ = reopened._claim()
+    assert (job.id, job.payload, job.attempts) == (job_id, {"submission_id": "s1"}, 2)
+
+
+def test_failed_jobs_are_retried_with_exponential_backoff(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(jobs.time, "time", clock)
+    queue = JobQueue(str(tmp_path / "jobs.db"), max_attempts=5, retry_delay=10)
+    job_id = queue.enqueue("candidate_email", {})
+
+    for delay in (10, 20, 40):
+        run_once(queue, "ConnectionError: refused")
+        run_after = queue._conn.execute("SELECT run_after FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+        assert run_after == clock.now + delay
+        assert queue._claim() == (None, delay)
+        clock.now = run_after
+
+    run_once(queue)
+    assert queue.status(job_id) == {"kind": "candidate_email", "status": DONE, "attempts": 4, "error": None}
+
+
+def test_a_job_fails_for_good_after_max_attempts(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(jobs.time, "time", clock)
+    queue = JobQueue(str(tmp_path / "jobs.db"), max_attempts=3, retry_delay=1)
+    job_id = queue.enqueue("admin_email", {})
+
+    for _ in range(3):
+        run_once(queue, "SMTPException: rejected")
+        clock.now += 60
+
+    assert queue.status(job_id) == {"kind": "admin_email", "status": FAILED, "attempts": 3,
+                                    "error": "SMTPException: rejected"}
+    assert queue._claim() == (None, None)
+    assert queue.counts() == {FAILED: 1}
+
+
+def test_workers_run_registered_handlers(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), workers=2)
+    seen = []
+    queue.register("save_submission", lambda q, job: seen.append(job.payload["submission_id"]))
+    ids = [queue.enqueue("save_submission", {"submission_id": f"s{i}"}, group="g") for i in range(5)]
+    queue.start()
+    try:
+        for _ in range(200):
+            if queue.counts() == {DONE: 5}:
+                break
+            time.sleep(0.01)
+    finally:
+        queue.stop()
+
+    assert sorted(seen) == ["s0", "s1", "s2", "s3", "s4"]
+    assert sorted(s["id"] for s in queue.group_status("g")) == sorted(ids)
@@ -0,0 +1,107 @@
+import sqlite3
+from contextlib import contextmanager
+
+from outbox import Outbox
+
+
+class RecordingPool:
+    """Stands in for SMTPPool; addresses in `failing` are refused"""
+
+    def __init__(self):
+        self.failing = set()
+        self.delivered = []
+
+    @contextmanager
+    def connection(self):
+        yield self
+
+    def send_message(self, msg):
+        if msg['To'] in self.failing:
+            raise ConnectionError(f"refused {msg['To']}")
+        self.delivered.append((msg['To'], msg['Subject']))
+
+    def close(self):
+        pass
+
+
+def digest_of(entries):
+    return f"{len(entries)} submissions", ""
+
+
+def flush_expecting_failure(outbox):
+    try:
+        outbox.flush_digest(digest_of)
+    except ConnectionError:
+        return
+    raise AssertionError("flush should have failed")
+
+
+def make_outbox(tmp_path, pool):
+    return Outbox(pool, "quiz@example.com", digest_path=str(tmp_path / "outbox.db"),
+                  digest_recipients=["a@example.com", "b@example.com"], digest_interval=60)
+
+
+def test_flush_sends_each_recipient_the_digest_once(tmp_path):
+    pool = RecordingPool()
+    outbox = make_outbox(tmp_path, pool)
+    outbox.add_to_digest({"name": "A"})
+    outbox.add_to_digest({"name": "B"})
+
+    assert outbox.flush_digest(digest_of) == 2
+    assert pool.delivered == [("a@example.com", "2 submissions"), ("b@example.com", "2 submissions")]
+    assert outbox.pending_digest() == 0
+    assert outbox.flush_digest(digest_of) == 0
+
+
+def test_a_failing_recipient_is_retried_without_resending_to_the_others(tmp_path):
+    pool = RecordingPool()
+    outbox = make_outbox(tmp_path, pool)
+    outbox.add_to_digest({"name": "A"})
+    pool.failing.add("a@example.com")
+
+    flush_expecting_failure(outbox)
+    assert pool.delivered == [("b@example.com", "1 submissions")]
+    assert outbox.pending_digest() == 1
+
+    outbox.add_to_digest({"name": "B"})
+    pool.failing.clear()
+    assert outbox.flush_digest(digest_of) == 2
+    assert pool.delivered[1:] == [("a@example.com", "2 submissions"), ("b@example.com", "1 submissions")]
+    assert outbox.pending_digest() == 0
+
+
+def test_delivery_cursors_survive_a_restart(tmp_path):
+    pool = RecordingPool()
+    outbox = make_outbox(tmp_path, pool)
+    outbox.add_to_digest({"name": "A"})
+    pool.failing.add("b@example.com")
+    flush_expecting_failure(outbox)
+    outbox._db.close()
+
+    pool.failing.clear()
+    reopened = make_outbox(tmp_path, pool)
+    assert reopened.flush_digest(digest_of) == 1
+    assert pool.delivered == [("a@example.com", "1 submissions"), ("b@example.com", "1 submissions")]
+
+
+def test_an_entry_queued_again_under_the_same_key_is_ignored(tmp_path):
+    outbox = make_outbox(tmp_path, RecordingPool())
+    outbox.add_to_digest({"name": "A"}, key="s1")
+    outbox.add_to_digest({"name": "A"}, key="s1")
+    outbox.add_to_digest({"name": "B"}, key="s2")
+
+    assert outbox.pending_digest() == 2
+
+
+def test_a_digest_table_without_keys_is_upgraded(tmp_path):
+    db = sqlite3.connect(tmp_path / "outbox.db")
+    db.execute("CREATE TABLE digest (id INTEGER PRIMARY KEY AUTOINCREMENT, entry TEXT NOT NULL)")
+    db.execute("INSERT INTO digest (entry) VALUES ('{}')")
+    db.commit()
+    db.close()
+
+    outbox = make_outbox(tmp_path, RecordingPool())
+    outbox.add_to_digest({"name": "A"}, key="s1")
+    outbox.add_to_digest({"name": "A"}, key="s1")
+
+    assert outbox.pending_digest() == 2
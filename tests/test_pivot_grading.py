@@ -0,0 +1,119 @@
+import io
+
+import pandas as pd
+from openpyxl import Workbook
+
+from dataset import employee_data, expected_pivots
+from pivot_grading import CORRECT, REVIEW, grade_workbook, match_crosstab, match_series
+
+
+def pivot_workbook(expected):
+    """An .xlsx laid out the way Excel renders the three PivotTables, next to the raw data"""
+    workbook = Workbook()
+    data = workbook.active
+    data.title = "Data"
+    frame = pd.DataFrame(employee_data)
+    data.append(list(frame.columns))
+    for row in frame.itertuples(index=False):
+        data.append(list(row))
+
+    pivots = workbook.create_sheet("Pivots")
+    for q_id in ("q9a", "q9b"):
+        pivots.append(["Row Labels", "Sum of Total Amount Due"])
+        for label, value in expected[q_id]["values"].items():
+            pivots.append([label, value])
+        pivots.append(["Grand Total", sum(expected[q_id]["values"].values())])
+        pivots.append([])
+
+    table = expected["q10"]["values"]
+    columns = sorted({column for row in table.values() for column in row})
+    pivots.append(["Count of Gender", "Column Labels"])
+    pivots.append(["Row Labels", *columns, "Grand Total"])
+    for label, counts in table.items():
+        pivots.append([label, *(counts.get(column) or None for column in columns), sum(counts.values())])
+
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def workbook_bytes(rows):
+    workbook = Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def sheet(*rows):
+    """Rows as read_sheets returns them: (column, value) pairs, labels already casefolded"""
+    return [[(column, value) for column, value in enumerate(row, 1) if value is not None] for row in rows]
+
+
+def test_grades_a_spilled_workbook_from_its_path(tmp_path):
+    expected = expected_pivots(pd.DataFrame(employee_data))
+    path = tmp_path / "upload.blob"
+    path.write_bytes(pivot_workbook(expected))
+
+    result = grade_workbook(str(path), expected)
+
+    assert result == {"status": "graded", "grades": {q_id: CORRECT for q_id in expected}, "reason": None}
+
+
+def test_path_and_bytes_grade_alike(tmp_path):
+    expected = expected_pivots(pd.DataFrame(employee_data))
+    data = pivot_workbook(expected)
+    path = tmp_path / "upload.blob"
+    path.write_bytes(data)
+
+    assert grade_workbook(str(path), expected) == grade_workbook(data, expected)
+
+
+def test_wrong_totals_are_left_for_review(tmp_path):
+    expected = expected_pivots(pd.DataFrame(employee_data))
+    wrong = {q_id: dict(spec) for q_id, spec in expected.items()}
+    wrong["q9a"]["values"] = {label: value + 100 for label, value in expected["q9a"]["values"].items()}
+    path = tmp_path / "upload.blob"
+    path.write_bytes(pivot_workbook(wrong))
+
+    grades = grade_workbook(str(path), expected)["grades"]
+
+    assert grades == {"q9a": REVIEW, "q9b": CORRECT, "q10": CORRECT}
+
+
+def test_a_file_that_is_not_a_workbook_goes_to_manual_review(tmp_path):
+    path = tmp_path / "upload.blob"
+    path.write_bytes(b"not a zip")
+
+    result = grade_workbook(str(path), expected_pivots(pd.DataFrame(employee_data)))
+
+    assert result["status"] == "manual_review"
+    assert result["reason"] == "not an .xlsx file"
+
+
+def test_labels_match_ignoring_case_and_padding():
+    expected = {"q1": {"kind": "series", "values": {"North": 10, "South": 20}}}
+    data = workbook_bytes([["Row Labels", "Sum"], ["  NORTH ", 10], ["south", 20]])
+
+    assert grade_workbook(data, expected)["grades"] == {"q1": CORRECT}
+
+
+def test_a_series_needs_every_label_on_one_sheet():
+    expected = {"north": 10, "south": 20}
+
+    assert not match_series([sheet(["north", 10.0]), sheet(["south", 20.0])], expected)
+    assert match_series([sheet(["north", 10.0], ["south", 20.0], ["grand total", 30.0])], expected)
+
+
+def test_raw_data_rows_with_several_labels_are_not_pivot_rows():
+    assert not match_series([sheet(["north", "ada", 10.0], ["south", "bob", 20.0])], {"north": 10, "south": 20})
+
+
+def test_a_crosstab_matches_either_way_round_under_its_header():
+    expected = {"IT": {"Male": 2, "Female": 1}, "HR": {"Female": 3}}
+    rows = sheet(["row labels", "it", "hr"], ["female", 1.0, 3.0], ["male", 2.0, None])
+
+    assert match_crosstab([rows], expected)
+    # Without the header row the columns can't be told apart
+    assert not match_crosstab([rows[1:]], expected)
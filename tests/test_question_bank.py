@@ -0,0 +1,55 @@
+import pytest
+
+from question_bank import Question, QuestionBank
+
+BANK = QuestionBank([
+    Question("q1", "Fixed", ["True", "False"], "a", shuffle_options=False),
+    Question("q2", "Which?", ["Red", "Green", "Blue", "Yellow"], "c"),
+    Question("q3", "Pick", ["One", "Two", "Three"], "b"),
+], version="test")
+
+
+def test_the_same_seed_gives_the_same_form():
+    assert BANK.form(42) == BANK.form(42)
+    assert sorted(q_id for q_id, _ in BANK.form(42)) == ["q1", "q2", "q3"]
+
+
+def test_a_sized_form_samples_without_repeats():
+    form = BANK.form(7, size=2)
+    assert len({q_id for q_id, _ in form}) == 2
+
+
+def test_options_keep_their_order_when_shuffling_is_off():
+    for seed in range(20):
+        assert dict(BANK.form(seed))["q1"] == [0, 1]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_displayed_options_map_back_to_the_original_letters(seed):
+    for q_id, order in BANK.form(seed):
+        question = BANK[q_id]
+        values, labels = question.choices(order)
+
+        assert sorted(values) == question.letters
+        for position, value in enumerate(values):
+            # The option shown at `position` is stored as its original letter
+            assert labels[value] == f"{chr(97 + position)}. {question.options[question.letters.index(value)]}"
+            assert question.display_letter(order, value) == chr(97 + position)
+        assert labels[question.answer].endswith(question.options[ord(question.answer) - 97])
+
+
+def test_a_bank_rejects_duplicate_ids_and_missing_answers():
+    with pytest.raises(ValueError, match="Duplicate"):
+        QuestionBank([Question("q1", "A", ["x", "y"], "a"), Question("q1", "B", ["x", "y"], "a")])
+    with pytest.raises(ValueError, match="no option"):
+        QuestionBank([Question("q1", "A", ["x", "y"], "c")])
+
+
+def test_presented_redraws_a_sampled_form_from_its_seed():
+    form = {"bank_version": "test", "seed": 7, "size": 2, "shuffle_questions": True}
+
+    assert sorted(BANK.presented(form, {})) == sorted(q_id for q_id, _ in BANK.form(7, 2))
+    assert BANK.presented(dict(form, size=None), {}) is None
+    assert BANK.presented(None, {"q1": "a"}) is None
+    # Another bank version can't be redrawn, so the answered questions stand in for the form
+    assert BANK.presented(dict(form, bank_version="old"), {"q3": "b", "q1": ""}) == ["q3"]
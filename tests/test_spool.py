@@ -0,0 +1,77 @@
+from fake_gspread import FakeWorksheet
+from spool import SheetSpool
+from storage import SHEET_HEADER, SheetsStorage
+
+
+class UnreliableWorksheet(FakeWorksheet):
+    """Fails the next append, after applying it if `lose_response` (a response lost on the way back)"""
+
+    def __init__(self):
+        super().__init__(SHEET_HEADER)
+        self.fail_next = None
+
+    def append_rows(self, rows, **kwargs):
+        failure, self.fail_next = self.fail_next, None
+        if failure == "before":
+            raise ConnectionError("refused")
+        response = super().append_rows(rows, **kwargs)
+        if failure == "after":
+            raise ConnectionError("reset")
+        return response
+
+
+def sheet_ids(worksheet):
+    return [row[SHEET_HEADER.index("Submission ID")] for row in worksheet.rows[1:]]
+
+
+def flush_expecting_failure(spool):
+    try:
+        spool.flush()
+    except ConnectionError:
+        return
+    raise AssertionError("flush should have failed")
+
+
+def test_adding_a_submission_twice_queues_it_once(make_submission):
+    spool = SheetSpool(":memory:", SheetsStorage(FakeWorksheet(SHEET_HEADER)))
+    spool.add(make_submission("s1"))
+    spool.add(make_submission("s1"))
+
+    assert spool.pending() == 1
+
+
+def test_a_batch_that_landed_without_a_response_is_not_appended_again(make_submission):
+    worksheet = UnreliableWorksheet()
+    spool = SheetSpool(":memory:", SheetsStorage(worksheet))
+    spool.add(make_submission("s1"))
+    worksheet.fail_next = "after"
+    flush_expecting_failure(spool)
+
+    spool.add(make_submission("s2"))
+    assert spool.flush() == 1
+
+    assert sheet_ids(worksheet) == ["s1", "s2"]
+    assert spool.duplicates_skipped == 1
+    assert spool.pending() == 0
+
+
+def test_an_attempted_batch_that_never_landed_is_appended(make_submission):
+    worksheet = UnreliableWorksheet()
+    spool = SheetSpool(":memory:", SheetsStorage(worksheet))
+    spool.add(make_submission("s1"))
+    worksheet.fail_next = "before"
+    flush_expecting_failure(spool)
+
+    assert spool.flush() == 1
+
+    assert sheet_ids(worksheet) == ["s1"]
+    assert spool.duplicates_skipped == 0
+
+
+def test_pending_rows_survive_a_restart(tmp_path, make_submission):
+    worksheet = UnreliableWorksheet()
+    path = str(tmp_path / "spool.db")
+    SheetSpool(path, SheetsStorage(worksheet)).add(make_submission("s1"))
+
+    assert SheetSpool(path, SheetsStorage(worksheet)).flush() == 1
+    assert sheet_ids(worksheet) == ["s1"]
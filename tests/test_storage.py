@@ -0,0 +1,69 @@
+import sqlite3
+from pathlib import Path
+
+from question_bank import QuestionBank
+from storage import SHEET_HEADER, SQLiteStorage, SubmissionStorage, parse_sheet_record, sheet_row
+
+BANK = QuestionBank.load(Path(__file__).resolve().parent.parent / "questions.json")
+FORM = {"bank_version": BANK.version, "seed": 1234, "size": 3, "shuffle_questions": True}
+ANSWERS = {"q1": "a", "q9a_screenshot_url": "https://drive.google.com/file/d/x/view"}
+
+
+def test_sqlite_keeps_the_form(tmp_path, make_submission):
+    storage = SQLiteStorage(str(tmp_path / "submissions.db"))
+    storage.append(make_submission(answers=ANSWERS, form=FORM))
+
+    stored = storage.load_since(0)[0]
+
+    assert stored["form"] == FORM
+    assert BANK.form(stored["form"]["seed"], stored["form"]["size"], stored["form"]["shuffle_questions"]) \
+        == BANK.form(1234, 3, True)
+
+
+def test_sqlite_adds_the_form_column_to_an_older_database(tmp_path, make_submission):
+    path = str(tmp_path / "submissions.db")
+    SQLiteStorage(path).close()
+    conn = sqlite3.connect(path)
+    conn.execute("ALTER TABLE submissions DROP COLUMN form")
+    conn.execute("INSERT INTO submissions (submission_id, timestamp, name, employee_id, department, email, score, "
+                 "total, percentage, passed, answers) VALUES ('old', 't', 'n', 'e', 'd', 'm', 1, 8, 12.5, 0, '{}')")
+    conn.commit()
+    conn.close()
+
+    storage = SQLiteStorage(path)
+    storage.append(make_submission("new", answers=ANSWERS, form=FORM))
+
+    assert [s["form"] for s in storage.load_since(0)] == [None, FORM]
+
+
+def test_sheet_rows_keep_the_form(make_submission):
+    row = sheet_row(make_submission(answers=ANSWERS, form=FORM))
+    record = parse_sheet_record(dict(zip(SHEET_HEADER, row)))
+
+    assert record["form"] == FORM
+    assert "form" not in record["answers"]
+    assert record["answers"]["q9a_screenshot_url"] == "https://drive.google.com/file/d/x/view"
+
+
+def test_sheet_rows_written_before_the_form_column_parse(make_submission):
+    header = SHEET_HEADER[:SHEET_HEADER.index("Form")]
+    record = parse_sheet_record(dict(zip(header, sheet_row(make_submission(answers=ANSWERS, form=FORM)))))
+
+    assert record["form"] is None
+
+
+def test_sqlite_find_matches_the_generic_filters(tmp_path, make_submission):
+    storage = SQLiteStorage(str(tmp_path / "submissions.db"))
+    people = [("Ada", "E1", "IT", 100.0), ("ÉLODIE STRASSE", "E2", "Finance", 50.0),
+              ("Grace", "X7", "IT", 40.0), ("élodie Straße", "E4", "HR", 80.0)]
+    for i, (name, employee_id, department, percentage) in enumerate(people):
+        storage.append(make_submission(f"s{i}", timestamp=f"2026-01-0{i + 1}T09:00:00", name=name,
+                                       employee_id=employee_id, department=department, percentage=percentage))
+
+    for filters in [{}, {"search": "élodie straße"}, {"search": "e"}, {"departments": ["IT", "HR"]},
+                    {"status": "PASS"}, {"status": "FAIL", "departments": ["IT"]}, {"employee_id": "X7"},
+                    {"since": "2026-01-02", "until": "2026-01-04"}]:
+        found = [s["submission_id"] for s in storage.find(**filters)]
+        assert found == [s["submission_id"] for s in SubmissionStorage.find(storage, **filters)], filters
+
+    assert [s["submission_id"] for s in storage.find(search="élodie straße")] == ["s1", "s3"]
@@ -0,0 +1,38 @@
+from concurrent.futures import Future
+
+from uploads import UploadCache
+
+
+def test_same_content_shares_one_upload_and_counts_it_once_it_succeeds():
+    cache = UploadCache()
+    started = []
+
+    def upload():
+        started.append(Future())
+        return started[-1]
+
+    first = cache.get_or_upload("session", "q9a", "abc", 100, upload)
+    second = cache.get_or_upload("session", "q9a", "abc", 100, upload)
+
+    assert second is first and len(started) == 1
+    assert cache.stats()["uploads"] == 0
+    first.set_result({"url": "https://drive.google.com/file/d/x/view"})
+    assert cache.stats() == {"uploads": 1, "avoided": 1, "bytes_avoided": 100, "cached": 1}
+
+
+def test_failed_upload_is_not_counted_and_is_retried():
+    cache = UploadCache()
+    started = []
+
+    def upload():
+        started.append(Future())
+        return started[-1]
+
+    cache.get_or_upload("session", "q9a", "abc", 100, upload)
+    started[0].set_exception(ConnectionError("reset"))
+    assert cache.stats()["uploads"] == 0 and cache.stats()["cached"] == 0
+
+    retry = cache.get_or_upload("session", "q9a", "abc", 100, upload)
+    assert retry is started[1]
+    retry.set_result({"url": "https://drive.google.com/file/d/y/view"})
+    assert cache.stats()["uploads"] == 1 and cache.stats()["avoided"] == 0
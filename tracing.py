@@ -0,0 +1,139 @@
+"""In-process span timing: a ring buffer of recent spans plus cumulative latency histograms"""
+import bisect
+import collections
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# Upper bounds (seconds) of the histogram buckets; the last bucket takes everything slower
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Span:
+    __slots__ = ("name", "started", "duration", "error", "trace", "attrs")
+
+    def __init__(self, name, started, duration, error, trace, attrs):
+        self.name = name
+        self.started = started
+        self.duration = duration
+        self.error = error
+        self.trace = trace
+        self.attrs = attrs
+
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+
+
+def percentile(ordered, p):
+    """Nearest-rank percentile of an already sorted list"""
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def bucket_label(index):
+    if index == len(BUCKETS):
+        return f"> {BUCKETS[-1]:g}s"
+    bound = BUCKETS[index]
+    return f"≤ {bound * 1000:g}ms" if bound < 1 else f"≤ {bound:g}s"
+
+
+class Tracer:
+    """Records named spans from any thread, cheaply enough to leave on in production.
+
+    The last `capacity` spans are kept in a ring buffer for percentiles and
+    drill-down; per-name histograms count every span since start-up. Spans
+    recorded on a thread after `begin_trace` carry that trace ID, which is
+    how the spans of one Streamlit rerun are grouped.
+    """
+
+    def __init__(self, capacity=5000):
+        self._spans = collections.deque(maxlen=capacity)
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def begin_trace(self, trace_id):
+        """Tag spans recorded on this thread from now on with `trace_id`"""
+        self._local.trace = trace_id
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """Time the block; an exception escaping it is counted as an error and re-raised"""
+        started = time.time()
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"[:300]
+            raise
+        finally:
+            self.record(name, time.perf_counter() - start, error, started, **attrs)
+
+    def traced(self, name):
+        """Decorator running the whole function inside `span(name)`"""
+        def decorate(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def record(self, name, duration, error=None, started=None, **attrs):
+        """Add a span measured elsewhere"""
+        span = Span(name, time.time() - duration if started is None else started, duration, error,
+                    getattr(self._local, "trace", None), attrs)
+        index = bisect.bisect_left(BUCKETS, duration)
+        with self._lock:
+            self._spans.append(span)
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = _Histogram()
+            histogram.counts[index] += 1
+            histogram.count += 1
+            histogram.total += duration
+            if error:
+                histogram.errors += 1
+
+    def spans(self, name=None, trace=None):
+        """Recent spans, oldest first, optionally only those with this name or trace ID"""
+        with self._lock:
+            spans = list(self._spans)
+        return [s for s in spans if (name is None or s.name == name) and (trace is None or s.trace == trace)]
+
+    def summary(self):
+        """Per span name: p50/p95/max over the recent buffer, error rate and totals since start-up"""
+        recent = collections.defaultdict(list)
+        for span in self.spans():
+            recent[span.name].append(span)
+        with self._lock:
+            histograms = {name: (h.count, h.errors, h.total) for name, h in self._histograms.items()}
+        rows = []
+        for name, (count, errors, total) in histograms.items():
+            spans = recent.get(name, [])
+            durations = sorted(s.duration for s in spans)
+            rows.append({
+                "span": name,
+                "recent": len(spans),
+                "p50_ms": round(percentile(durations, 50) * 1000, 1) if durations else None,
+                "p95_ms": round(percentile(durations, 95) * 1000, 1) if durations else None,
+                "max_ms": round(durations[-1] * 1000, 1) if durations else None,
+                "recent_error_rate": round(sum(1 for s in spans if s.error) / len(spans), 3) if spans else None,
+                "total": count,
+                "total_errors": errors,
+                "mean_ms": round(total / count * 1000, 1)
+            })
+        return sorted(rows, key=lambda row: row["p95_ms"] or 0, reverse=True)
+
+    def histogram(self, name):
+        """(bucket label, count) pairs for every span named `name` since start-up"""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            counts = list(histogram.counts) if histogram else [0] * (len(BUCKETS) + 1)
+        return [(bucket_label(i), count) for i, count in enumerate(counts)]
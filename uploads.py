@@ -0,0 +1,58 @@
+"""Content-addressed cache so each screenshot is uploaded to Drive exactly once"""
+import threading
+from collections import OrderedDict
+
+
+class UploadCache:
+    """Maps (session, question, SHA-256 of the file bytes) to the Future of uploading it.
+
+    A candidate who clears a screenshot and picks the same file again, or
+    picks it again while the first upload is still running, gets the
+    existing Future instead of a second Drive upload. A failed upload is
+    forgotten, so the next attempt starts over.
+    """
+
+    def __init__(self, max_entries=10_000):
+        self.max_entries = max_entries
+        self._futures = OrderedDict()
+        self._lock = threading.Lock()
+        self.uploads = 0
+        self.avoided = 0
+        self.bytes_avoided = 0
+
+    def get_or_upload(self, session_id, q_id, digest, size, upload):
+        """Future for content with this SHA-256, calling `upload()` (which returns a Future) only on a miss"""
+        key = (session_id, q_id, digest)
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None and not _failed(future):
+                self._futures.move_to_end(key)
+                self.avoided += 1
+                self.bytes_avoided += size
+                return future
+            future = self._futures[key] = upload()
+            while len(self._futures) > self.max_entries:
+                self._futures.popitem(last=False)
+        # Outside the lock: an already finished Future runs the callback right here
+        future.add_done_callback(lambda done: self._finished(key, done))
+        return future
+
+    def _finished(self, key, future):
+        with self._lock:
+            if not _failed(future):
+                self.uploads += 1
+            elif self._futures.get(key) is future:
+                del self._futures[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "uploads": self.uploads,
+                "avoided": self.avoided,
+                "bytes_avoided": self.bytes_avoided,
+                "cached": len(self._futures),
+            }
+
+
+def _failed(future):
+    return future.done() and (future.cancelled() or future.exception() is not None)